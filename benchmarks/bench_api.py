@@ -0,0 +1,205 @@
+"""
+Measure the throughput, the latency and the peak memory of the client
+against the local mock of the Icinga2 API (``tests/mock_api.py``), without
+an Icinga server.
+
+.. code-block:: shell
+
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --hosts 2000 --services 20 --latency 0.002
+
+Store the results as a baseline and compare later runs against it. A
+scenario regresses if its throughput drops or its peak memory grows by more
+than ``--tolerance``. Baselines depend on the machine, store one per machine.
+
+.. code-block:: shell
+
+    python -m benchmarks.bench_api --save benchmarks/baselines/default.json
+    python -m benchmarks.bench_api --compare benchmarks/baselines/default.json
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from pretiac.client import Client
+from tests.mock_api import MockApi
+
+Result = dict[str, float]
+
+
+def _percentile(timings: list[float], percentile: float) -> float:
+    timings = sorted(timings)
+    return timings[min(int(len(timings) * percentile), len(timings) - 1)]
+
+
+def _measure(func: Callable[[], int], repeat: int) -> Result:
+    """
+    :param func: Executes the scenario once and returns the number of
+        processed items (objects, check results or events).
+    """
+    # Warm up the connection pool and the pydantic validators.
+    func()
+    timings: list[float] = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items += func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "items_per_second": items / sum(timings),
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": _percentile(timings, 0.95) * 1000,
+        "p99_ms": _percentile(timings, 0.99) * 1000,
+        "peak_memory_mb": peak / 1e6,
+    }
+
+
+def _get_services(client: Client) -> int:
+    return len(client.get_services())
+
+
+def _send_service_check_result(
+    client: Client, hosts: int, services: int, counter: Iterator[int]
+) -> int:
+    index = next(counter)
+    client.send_service_check_result(
+        f"service{index % services:03d}",
+        f"host{index // services % hosts:05d}.example.org",
+        index % 4,
+        "PING OK - Packet loss = 0%",
+        performance_data=["rta=0.1ms;3000;5000;0", "pl=0%;80;100;0"],
+    )
+    return 1
+
+
+def _consume_events(client: Client) -> int:
+    return sum(1 for _ in client.subscribe_events(["CheckResult"], "benchmark"))
+
+
+def _list_all_config_stage_files(client: Client) -> int:
+    return sum(len(stage.files) for stage in client.list_all_config_stage_files())
+
+
+def run(args: argparse.Namespace) -> dict[str, Result]:
+    with MockApi(
+        hosts=args.hosts,
+        services=args.services,
+        events=args.events,
+        packages=args.packages,
+        latency=args.latency,
+    ) as api:
+        with Client(config=api.get_config()) as client:
+            return {
+                "get_services": _measure(
+                    functools.partial(_get_services, client), args.repeat
+                ),
+                "send_service_check_result": _measure(
+                    functools.partial(
+                        _send_service_check_result,
+                        client,
+                        args.hosts,
+                        args.services,
+                        itertools.count(),
+                    ),
+                    args.check_results,
+                ),
+                "events": _measure(
+                    functools.partial(_consume_events, client), args.repeat
+                ),
+                "list_all_config_stage_files": _measure(
+                    functools.partial(_list_all_config_stage_files, client),
+                    args.repeat,
+                ),
+            }
+
+
+def compare(
+    results: dict[str, Result], baseline: dict[str, Result], tolerance: float
+) -> list[str]:
+    """
+    :returns: The regressions, for example
+        ``get_services: items_per_second 812 < 1030 (-21%)``.
+    """
+    regressions: list[str] = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key, higher_is_better in (
+            ("items_per_second", True),
+            ("peak_memory_mb", False),
+        ):
+            value, base = result[key], baseline[name][key]
+            change = (value - base) / base if base else 0
+            if (higher_is_better and change < -tolerance) or (
+                not higher_is_better and change > tolerance
+            ):
+                regressions.append(
+                    f"{name}: {key} {value:.4g} vs. {base:.4g} ({change:+.0%})"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--services", type=int, default=10)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--packages", type=int, default=5)
+    parser.add_argument("--check-results", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="Server delay per request in s."
+    )
+    parser.add_argument("--save", type=Path, help="Store the results as baseline.")
+    parser.add_argument("--compare", type=Path, help="Compare with a baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args)
+    print(
+        f"{'scenario':<30}{'items/s':>12}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'peak MB':>10}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<30}{result['items_per_second']:>12.1f}{result['p50_ms']:>10.2f}"
+            f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['peak_memory_mb']:>10.2f}"
+        )
+
+    parameters: dict[str, Any] = {
+        key: getattr(args, key)
+        for key in ("hosts", "services", "events", "packages", "latency")
+    }
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(
+            json.dumps({"parameters": parameters, "results": results}, indent=2) + "\n"
+        )
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline["parameters"] != parameters:
+            print(f"The parameters differ from the baseline: {baseline['parameters']}")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression compared with {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compare the JSON codecs of pretiac on a large ``objects/services`` listing,
+an event stream and the encoding of check results.
+
+.. code-block:: shell
+
+    python benchmarks/bench_codec.py --objects 20000 --events 100000
+"""
+
+import argparse
+import functools
+import io
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+import requests
+
+from pretiac.codec import Codec, OrjsonCodec, StdlibCodec, get_codec
+from pretiac.request_handler import RequestHandler
+
+
+def _service(index: int) -> dict[str, Any]:
+    return {
+        "attrs": {
+            "__name": f"host{index // 10}!service{index % 10}",
+            "name": f"service{index % 10}",
+            "host_name": f"host{index // 10}",
+            "display_name": f"Service {index}",
+            "check_command": "dummy",
+            "state": float(index % 4),
+            "last_state": 0.0,
+            "state_type": 1.0,
+            "last_check": 1700000000.123456 + index,
+            "next_check": 1700000060.123456 + index,
+            "groups": ["linux", "production"],
+            "vars": {"notification": {"mail": {"groups": ["admins"]}}},
+            "last_check_result": {
+                "exit_status": float(index % 4),
+                "output": f"Check {index} ✓ " + "x" * 80,
+                "performance_data": [f"time={index / 1000}s;1;2;0"],
+                "schedule_start": 1700000000.1,
+                "schedule_end": 1700000000.2,
+            },
+        },
+        "joins": {},
+        "meta": {},
+        "name": f"host{index // 10}!service{index % 10}",
+        "type": "Service",
+    }
+
+
+def _event(index: int) -> dict[str, Any]:
+    return {
+        "type": "CheckResult",
+        "host": f"host{index // 10}",
+        "service": f"service{index % 10}",
+        "timestamp": 1700000000.123456 + index,
+        "check_result": _service(index)["attrs"]["last_check_result"],
+    }
+
+
+def _best(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _stream(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def _count_events(body: bytes, codec: Codec) -> int:
+    return sum(1 for _ in RequestHandler._get_message_from_stream(_stream(body), codec))
+
+
+def _encode(results: list[dict[str, Any]], codec: Codec) -> list[bytes]:
+    return [codec.dumps(result) for result in results]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    codecs: list[Codec] = [StdlibCodec()]
+    if get_codec().name == "orjson":
+        codecs.append(OrjsonCodec())
+    else:
+        print("orjson is not installed, only the standard library is measured")
+
+    listing = json.dumps(
+        {"results": [_service(i) for i in range(args.objects)]}
+    ).encode()
+    events = b"".join(
+        json.dumps(_event(i)).encode() + b"\n" for i in range(args.events)
+    )
+    results = [
+        {
+            "type": "Service",
+            "filter": f'service.__name=="host{i // 10}!service{i % 10}"',
+            "exit_status": i % 4,
+            "plugin_output": f"Check {i} " + "x" * 80,
+            "performance_data": [f"time={i / 1000}s;1;2;0"],
+        }
+        for i in range(args.objects)
+    ]
+
+    print(
+        f"objects/services: {args.objects} objects, {len(listing) / 1e6:.1f} MB; "
+        f"events: {args.events} lines, {len(events) / 1e6:.1f} MB"
+    )
+    print(f"{'codec':<8}{'listing':>16}{'events':>16}{'encode':>16}")
+    baseline: list[float] = []
+    for codec in codecs:
+        timings = [
+            _best(functools.partial(codec.loads, listing), args.repeat),
+            _best(functools.partial(_count_events, events, codec), args.repeat),
+            _best(functools.partial(_encode, results, codec), args.repeat),
+        ]
+        baseline = baseline or timings
+        print(
+            f"{codec.name:<8}"
+            + "".join(
+                f"{timing * 1000:>7.0f} ms ({base / timing:.1f}x)"
+                for timing, base in zip(timings, baseline)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
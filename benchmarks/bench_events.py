@@ -0,0 +1,97 @@
+"""
+Measure the validation of a mixed event stream, as done by
+:meth:`pretiac.client.Client.subscribe_events`.
+
+Compares the JSON decoding alone, a plain union of the event models (pydantic
+tries the members one after the other) and the tagged union
+:data:`pretiac.object_types.EventStream`, which dispatches on the ``type``
+field.
+
+.. code-block:: shell
+
+    python -m benchmarks.bench_events --events 100000
+    python -m benchmarks.bench_events --file recordings/events-20231114T221320-0001.ndjson.gz
+"""
+
+import argparse
+import functools
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Union, get_args
+
+from pydantic import TypeAdapter
+
+from pretiac.codec import Codec, get_codec
+from pretiac.event_recording import read_recording
+from pretiac.object_types import EventStream
+from tests.mock_api import create_mixed_event
+
+
+def _best(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _read(path: Path, codec: Codec) -> list[bytes]:
+    return [codec.dumps(event) for _, event in read_recording([path], codec)]
+
+
+def _decode(lines: list[bytes], codec: Codec) -> int:
+    return sum(1 for line in lines if codec.loads(line))
+
+
+def _validate(lines: list[bytes], codec: Codec, adapter: TypeAdapter[Any]) -> int:
+    return sum(
+        1 for line in lines if adapter.validate_python(codec.loads(line)) is not None
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--services", type=int, default=10)
+    parser.add_argument(
+        "--file", type=Path, help="A file recorded by pretiac events record."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    codec = get_codec()
+    if args.file:
+        lines = _read(args.file, codec)
+    else:
+        lines = [
+            codec.dumps(create_mixed_event(index, args.hosts, args.services))
+            for index in range(args.events)
+        ]
+    types = {codec.loads(line)["type"] for line in lines}
+    print(f"{len(lines)} events of {len(types)} types, codec {codec.name}")
+
+    # Annotated[Union[...], Field(discriminator="type")]
+    members = get_args(get_args(EventStream)[0])
+    scenarios: dict[str, Callable[[], int]] = {
+        "decode only": functools.partial(_decode, lines, codec),
+        "plain union": functools.partial(
+            _validate,
+            lines,
+            codec,
+            TypeAdapter(Union[members]),  # type: ignore
+        ),
+        "tagged union": functools.partial(
+            _validate, lines, codec, TypeAdapter(EventStream)
+        ),
+    }
+    print(f"{'scenario':<16}{'events/s':>12}{'ms':>10}")
+    for name, func in scenarios.items():
+        timing = _best(func, args.repeat)
+        print(f"{name:<16}{len(lines) / timing:>12.0f}{timing * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,11 +31,22 @@ pretiac is a `Python <http://www.python.org>`_ module to interact with the
 """
 
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Optional
 
-from pretiac.client import Client
+if TYPE_CHECKING:
+    from pretiac.client import Client
 
-__client: Optional[Client] = None
+# The client is imported on first use, so that the stdlib-only modules like
+# pretiac.submit do not load requests and pydantic.
+__client: Optional["Client"] = None
+
+
+def __getattr__(name: str) -> Any:
+    if name == "Client":
+        from pretiac.client import Client
+
+        return Client
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def set_default_client(
@@ -48,7 +59,7 @@ def set_default_client(
     client_certificate: Optional[str] = None,
     ca_certificate: Optional[str] = None,
     suppress_exception: Optional[bool] = None,
-) -> Client:
+) -> "Client":
     """
     Set and configure the default client.
 
@@ -69,6 +80,8 @@ def set_default_client(
         Authority)**, for example ``/var/lib/icinga2/certs/ca.crt``.
     :param suppress_exception: If set to ``True``, no exceptions are thrown.
     """
+    from pretiac.client import Client
+
     global __client
     __client = Client(
         config_file=config_file,
@@ -84,7 +97,7 @@ def set_default_client(
     return __client
 
 
-def get_default_client() -> Client:
+def get_default_client() -> "Client":
     """
     Get the default client.
 
@@ -114,6 +127,8 @@ def get_default_client() -> Client:
                 check_interval: monthly
 
     """
+    from pretiac.client import Client
+
     global __client
     if not __client:
         __client = Client()
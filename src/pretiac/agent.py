@@ -0,0 +1,392 @@
+"""
+A long-running agent that executes the checks of a check collection file on
+their own intervals and sends the results via the API (``pretiac agent``).
+
+Compared to running ``pretiac check`` from cron, the check collection is
+loaded and validated only once and all results are sent over one pooled
+connection. The file is reloaded on ``SIGHUP``, including the sizes of the
+check and send pools.
+
+The scheduler thread itself never waits for the API: the reload and the
+reports run in the background, so a slow or unreachable master does not
+delay the checks.
+
+.. code-block:: yaml
+
+    ---
+    host: wrasp-passive
+    interval: 60
+
+    checks:
+
+    - service: memory
+      check_command: check_linux_memory -f -w 2 -c 0
+
+    - service: apt
+      check_command: check_apt
+      interval: 3600
+"""
+
+import heapq
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Optional, Union
+
+from pretiac import get_default_client
+from pretiac.check_executor import (
+    CheckCollection,
+    CheckExecution,
+    ServiceCheck,
+    _read_check_collection,
+)
+from pretiac.client import Client
+from pretiac.log import logger
+from pretiac.object_types import ServiceState
+
+DEFAULT_INTERVAL: float = 60
+"""The default number of seconds between two executions of a check."""
+
+
+@dataclass
+class SchedulingStats:
+    """The scheduling statistics of the agent since the last report."""
+
+    executions: int = 0
+    """The number of checks started."""
+
+    skipped: int = 0
+    """
+    The number of executions skipped because the previous execution of the
+    same check was still running.
+    """
+
+    lag_sum: float = 0
+    """
+    The sum of the scheduling lags in seconds: the time from when a check was
+    due until it started, including the wait for a free check worker.
+    """
+
+    lag_max: float = 0
+    """The maximum scheduling lag in seconds."""
+
+    def add(self, lag: float) -> None:
+        self.executions += 1
+        self.lag_sum += lag
+        self.lag_max = max(self.lag_max, lag)
+
+    @property
+    def lag_avg(self) -> float:
+        """The average scheduling lag in seconds."""
+        if self.executions == 0:
+            return 0
+        return self.lag_sum / self.executions
+
+
+@dataclass(order=True)
+class _Job:
+    due: float
+    """The :func:`time.monotonic` timestamp the check is due."""
+
+    sequence: int
+
+    check: ServiceCheck = field(compare=False)
+
+    interval: float = field(compare=False)
+
+
+class Agent:
+    """
+    Execute the checks of a check collection file periodically.
+
+    :param file_path: The path of the check collection file (defaults to
+        ``/etc/pretiac/checks.yml``).
+    :param client: The client to send the results with. If not specified,
+        the default client is used.
+    :param jitter: The random deviation of each interval as a fraction of the
+        interval, to avoid that all checks run at the same time.
+    :param report_interval: The number of seconds between two reports of the
+        scheduling statistics.
+    :param report_service: If specified, the scheduling statistics are also
+        sent as a check result of this service.
+    """
+
+    file_path: Path
+
+    client: Client
+
+    jitter: float
+
+    report_interval: float
+
+    report_service: Optional[str]
+
+    collection: CheckCollection
+
+    stats: SchedulingStats
+
+    __queue: list[_Job]
+
+    __running: set[int]
+
+    __running_lock: threading.Lock
+
+    __wakeup: threading.Event
+
+    __reload: bool = False
+
+    __reloader: Optional[threading.Thread] = None
+
+    __loaded: Optional[tuple[CheckCollection, list[_Job]]] = None
+    """A collection loaded in the background, not yet scheduled."""
+
+    __stopped: bool = False
+
+    __sequence: int = 0
+
+    def __init__(
+        self,
+        file_path: Optional[Union[str, Path]] = None,
+        client: Optional[Client] = None,
+        jitter: float = 0.1,
+        report_interval: float = 300,
+        report_service: Optional[str] = None,
+    ) -> None:
+        self.file_path = Path(
+            file_path if file_path is not None else "/etc/pretiac/checks.yml"
+        )
+        self.client = client if client is not None else get_default_client()
+        self.jitter = jitter
+        self.report_interval = report_interval
+        self.report_service = report_service
+        self.stats = SchedulingStats()
+        self.__queue = []
+        self.__running = set()
+        self.__running_lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.load()
+
+    def load(self) -> None:
+        """
+        Load the check collection file and schedule all checks. The first
+        execution of each check is spread randomly over its interval.
+        """
+        self.__apply(*self.__read())
+
+    def __read(self) -> tuple[CheckCollection, list[_Job]]:
+        collection = _read_check_collection(self.file_path)
+        collection.prepare(self.client)
+        now = time.monotonic()
+        queue: list[_Job] = []
+        for check in collection.checks:
+            interval = self._get_interval(collection, check)
+            queue.append(
+                _Job(now + random.uniform(0, interval), self.__next(), check, interval)
+            )
+        heapq.heapify(queue)
+        return collection, queue
+
+    def __apply(self, collection: CheckCollection, queue: list[_Job]) -> None:
+        self.collection = collection
+        self.__queue = queue
+        logger.info(
+            "Agent loaded %s checks from %s", len(collection.checks), self.file_path
+        )
+
+    def __read_in_background(self) -> None:
+        try:
+            self.__loaded = self.__read()
+        except Exception as e:
+            logger.info("Keep the old checks, reload failed: %s", e)
+        self.__wakeup.set()
+
+    @staticmethod
+    def _get_interval(collection: CheckCollection, check: ServiceCheck) -> float:
+        if check.interval is not None:
+            return check.interval
+        if collection.interval is not None:
+            return collection.interval
+        return DEFAULT_INTERVAL
+
+    def __next(self) -> int:
+        self.__sequence += 1
+        return self.__sequence
+
+    def __reschedule(self, job: _Job, now: float) -> None:
+        due = job.due + job.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        if due < now:
+            # The agent fell behind: don’t try to catch up with missed runs.
+            due = now + job.interval * random.uniform(0, self.jitter)
+        heapq.heappush(self.__queue, _Job(due, job.sequence, job.check, job.interval))
+
+    def reload(self) -> None:
+        """Reload the check collection file at the next opportunity (``SIGHUP``)."""
+        self.__reload = True
+        self.__wakeup.set()
+
+    def stop(self) -> None:
+        """Stop the agent after the running checks have finished."""
+        self.__stopped = True
+        self.__wakeup.set()
+
+    def __handle_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        if signum == signal.SIGHUP:
+            self.reload()
+        else:
+            self.stop()
+
+    def __send(self, check: ServiceCheck, execution: CheckExecution) -> None:
+        try:
+            check.send(execution, self.client)
+        except Exception as e:
+            logger.info("Sending the result of %s failed: %s", check.service, e)
+
+    def __run_job(self, job: _Job, sender: ThreadPoolExecutor) -> None:
+        with self.__running_lock:
+            # Measured here to include the wait for a free check worker.
+            self.stats.add(time.monotonic() - job.due)
+        try:
+            execution = self.collection.execute_check(job.check)
+            sender.submit(self.__send, job.check, execution)
+        except Exception as e:
+            logger.info("Check %s failed: %s", job.check.service, e)
+        finally:
+            with self.__running_lock:
+                self.__running.discard(id(job.check))
+
+    def __report(self) -> None:
+        try:
+            self.report()
+        except Exception as e:
+            logger.info("Report failed: %s", e)
+
+    @staticmethod
+    def _get_pool_sizes(collection: CheckCollection) -> tuple[int, int]:
+        return collection.concurrency or 4, collection.send_concurrency or 2
+
+    def __create_pools(self) -> tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        """Create the check pool and the send pool sized by the collection."""
+        concurrency, send_concurrency = self._get_pool_sizes(self.collection)
+        return (
+            ThreadPoolExecutor(
+                max_workers=concurrency, thread_name_prefix="pretiac-check"
+            ),
+            ThreadPoolExecutor(
+                max_workers=send_concurrency, thread_name_prefix="pretiac-send"
+            ),
+        )
+
+    @staticmethod
+    def __shutdown_pools(
+        executor: ThreadPoolExecutor, sender: ThreadPoolExecutor
+    ) -> None:
+        # The check pool is shut down first, so that the running checks can
+        # still hand over their results to the send pool.
+        executor.shutdown(wait=True)
+        sender.shutdown(wait=True)
+
+    def report(self) -> None:
+        """Log the scheduling statistics and reset them."""
+        with self.__running_lock:
+            stats = self.stats
+            self.stats = SchedulingStats()
+        logger.info(
+            "Agent: %s checks executed, %s skipped, lag avg %.3fs max %.3fs",
+            stats.executions,
+            stats.skipped,
+            stats.lag_avg,
+            stats.lag_max,
+        )
+        if self.report_service is not None:
+            self.client.send_service_check_result(
+                service=self.report_service,
+                host=self.collection.host,
+                exit_status=ServiceState.OK,
+                plugin_output=f"{stats.executions} checks executed, "
+                f"{stats.skipped} skipped, max lag {stats.lag_max:.3f}s",
+                performance_data=[
+                    f"executions={stats.executions}",
+                    f"skipped={stats.skipped}",
+                    f"lag_avg={stats.lag_avg:.6f}s",
+                    f"lag_max={stats.lag_max:.6f}s",
+                ],
+            )
+
+    def run(self) -> None:
+        """
+        Execute the checks until :meth:`stop` is called or ``SIGTERM`` or
+        ``SIGINT`` is received.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, self.__handle_signal)
+            signal.signal(signal.SIGTERM, self.__handle_signal)
+            signal.signal(signal.SIGINT, self.__handle_signal)
+
+        self.__stopped = False
+        next_report = time.monotonic() + self.report_interval
+        executor, sender = self.__create_pools()
+        retired: list[threading.Thread] = []
+        try:
+            while not self.__stopped:
+                if self.__reload and (
+                    self.__reloader is None or not self.__reloader.is_alive()
+                ):
+                    self.__reload = False
+                    self.__reloader = threading.Thread(
+                        target=self.__read_in_background,
+                        name="pretiac-agent-reload",
+                        daemon=True,
+                    )
+                    self.__reloader.start()
+
+                loaded = self.__loaded
+                if loaded is not None:
+                    self.__loaded = None
+                    pool_sizes = self._get_pool_sizes(self.collection)
+                    self.__apply(*loaded)
+                    if self._get_pool_sizes(self.collection) != pool_sizes:
+                        # The running checks finish in the old pools.
+                        thread = threading.Thread(
+                            target=self.__shutdown_pools,
+                            args=(executor, sender),
+                            name="pretiac-agent-retire",
+                        )
+                        thread.start()
+                        retired.append(thread)
+                        executor, sender = self.__create_pools()
+
+                now = time.monotonic()
+                if now >= next_report:
+                    next_report = now + self.report_interval
+                    sender.submit(self.__report)
+
+                if not self.__queue:
+                    self.__wakeup.wait(next_report - now)
+                    self.__wakeup.clear()
+                    continue
+
+                job = self.__queue[0]
+                if job.due > now:
+                    self.__wakeup.wait(min(job.due, next_report) - now)
+                    self.__wakeup.clear()
+                    continue
+
+                heapq.heappop(self.__queue)
+                with self.__running_lock:
+                    running = id(job.check) in self.__running
+                    if running:
+                        self.stats.skipped += 1
+                    else:
+                        self.__running.add(id(job.check))
+                if not running:
+                    executor.submit(self.__run_job, job, sender)
+                self.__reschedule(job, now)
+        finally:
+            self.__shutdown_pools(executor, sender)
+            for thread in retired:
+                thread.join()
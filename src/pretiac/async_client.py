@@ -0,0 +1,572 @@
+"""
+Asyncio versions of the raw client and the typed high level client.
+
+These clients are a thread-offload wrapper, not a native asyncio HTTP client:
+the requests are performed by the synchronous clients using the shared
+keep-alive connection pool of :class:`pretiac.raw_client.RawClient`, and each
+call is dispatched to a thread pool of the async client. Coroutines can await
+check submissions and queries from a single event loop, but at most
+``max_workers`` requests are in flight at the same time and the rest wait for
+a free worker. ``max_workers`` defaults to
+:attr:`pretiac.config.Config.async_max_workers` or else to
+:attr:`pretiac.config.Config.pool_maxsize` and can be raised beyond the size
+of the connection pool, for example to overlap many slow requests.
+
+Event streams block until the next event arrives, so each stream is read on a
+dedicated thread instead of the shared pool. Idle subscribers therefore never
+delay other calls, but every open stream costs one thread.
+
+.. code-block:: python
+
+    import asyncio
+
+    from pretiac.async_client import AsyncClient
+
+
+    async def main() -> None:
+        async with AsyncClient() as client:
+            await asyncio.gather(
+                *(
+                    client.send_service_check_result(f"service{i}", "myhost")
+                    for i in range(1000)
+                )
+            )
+
+
+    asyncio.run(main())
+"""
+
+import asyncio
+import copy
+import functools
+import socket
+from collections.abc import AsyncGenerator, Callable, Coroutine, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    Any,
+    Concatenate,
+    Generic,
+    Literal,
+    Optional,
+    ParamSpec,
+    TypeVar,
+    Union,
+)
+
+import requests
+from requests.adapters import DEFAULT_POOLSIZE
+
+from pretiac.client import Client, _get_adapter
+from pretiac.config import Config
+from pretiac.deadline import Timeout, bind
+from pretiac.exceptions import PretiacException
+from pretiac.object_types import EventStream, EventStreamType, FilterVars
+from pretiac.raw_client import (
+    ActionsUrlEndpoint,
+    ConfigUrlEndpoint,
+    EventsUrlEndpoint,
+    ObjectsUrlEndpoint,
+    RawClient,
+    StatusUrlEndpoint,
+    TemplatesUrlEndpoint,
+    TypesUrlEndpoint,
+    VariablesUrlEndpoint,
+)
+from pretiac.retry import RetryPolicy
+
+P = ParamSpec("P")
+R = TypeVar("R")
+S = TypeVar("S")
+
+_END = object()
+"""Marks the end of a synchronous iterator that is consumed in a thread."""
+
+
+class _AsyncWrapper(Generic[S]):
+    """Runs the methods of a synchronous object in a thread pool."""
+
+    _sync: S
+
+    _executor: ThreadPoolExecutor
+
+    def __init__(self, sync: S, executor: ThreadPoolExecutor) -> None:
+        self._sync = sync
+        self._executor = executor
+
+    async def _run(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(bind(func), *args, **kwargs)
+        )
+
+    async def _iterate(self, iterator: Iterator[R]) -> AsyncGenerator[R, None]:
+        try:
+            while True:
+                item = await self._run(next, iterator, _END)
+                if item is _END:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except ValueError:
+                    # The generator is still running in a worker thread.
+                    pass
+
+    async def _read_stream(
+        self, stream: requests.Response, iterator: Iterator[R]
+    ) -> AsyncGenerator[R, None]:
+        """
+        Read a streamed response on a dedicated thread, because each read may
+        block until the next event arrives.
+
+        If the consumer stops early or is cancelled while a read is pending,
+        the socket is shut down from the event loop. This ends the blocked
+        read, so the thread can be joined and the response closed.
+
+        :param stream: The response opened by
+            :meth:`pretiac.raw_client.EventsUrlEndpoint.open`.
+        :param iterator: Reads the items of the stream.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="pretiac-stream"
+        )
+        reading = False
+        try:
+            while True:
+                reading = True
+                item = await loop.run_in_executor(
+                    executor, functools.partial(next, iterator, _END)
+                )
+                reading = False
+                if item is _END:
+                    return
+                yield item
+        finally:
+            if reading and not _shutdown_socket(stream):
+                # The read cannot be interrupted, the thread ends with it.
+                executor.shutdown(wait=False)
+            else:
+                await loop.run_in_executor(None, executor.shutdown)
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+                stream.close()
+
+
+def _shutdown_socket(stream: requests.Response) -> bool:
+    """
+    Shut down the socket of a streamed response. Unlike closing it, this wakes
+    up a thread that is blocked reading from the socket.
+
+    :returns: Whether the response has a socket that was shut down.
+    """
+    connection = getattr(getattr(stream, "raw", None), "connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        return False
+    try:
+        # Bypass ssl.SSLSocket.shutdown(), which also discards the TLS state
+        # that the reading thread still uses.
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass
+    return True
+
+
+def _awaitable(
+    method: Callable[Concatenate[Any, P], R],
+) -> Callable[Concatenate[Any, P], Coroutine[Any, Any, R]]:
+    """Turn a method of the synchronous object into a coroutine method."""
+
+    @functools.wraps(method)
+    async def wrapper(self: _AsyncWrapper[Any], *args: P.args, **kwargs: P.kwargs) -> R:
+        return await self._run(method, self._sync, *args, **kwargs)
+
+    return wrapper
+
+
+def _async_iterator(
+    method: Callable[Concatenate[Any, P], Iterator[R]],
+) -> Callable[Concatenate[Any, P], AsyncGenerator[R, None]]:
+    """Turn a generator method of the synchronous object into an async generator
+    method."""
+
+    @functools.wraps(method)
+    async def wrapper(
+        self: _AsyncWrapper[Any], *args: P.args, **kwargs: P.kwargs
+    ) -> AsyncGenerator[R, None]:
+        async for item in self._iterate(method(self._sync, *args, **kwargs)):
+            yield item
+
+    return wrapper
+
+
+########################################################################################
+# AsyncRawClient
+########################################################################################
+
+
+class AsyncObjectsUrlEndpoint(_AsyncWrapper[ObjectsUrlEndpoint]):
+    """Async version of :class:`pretiac.raw_client.ObjectsUrlEndpoint`."""
+
+    list = _awaitable(ObjectsUrlEndpoint.list)
+    iter = _async_iterator(ObjectsUrlEndpoint.iter)
+    get = _awaitable(ObjectsUrlEndpoint.get)
+    create = _awaitable(ObjectsUrlEndpoint.create)
+    update = _awaitable(ObjectsUrlEndpoint.update)
+    delete = _awaitable(ObjectsUrlEndpoint.delete)
+
+
+class AsyncActionsUrlEndpoint(_AsyncWrapper[ActionsUrlEndpoint]):
+    """Async version of :class:`pretiac.raw_client.ActionsUrlEndpoint`."""
+
+    process_check_result = _awaitable(ActionsUrlEndpoint.process_check_result)
+    process_check_results = _awaitable(ActionsUrlEndpoint.process_check_results)
+    reschedule_check = _awaitable(ActionsUrlEndpoint.reschedule_check)
+    send_custom_notification = _awaitable(ActionsUrlEndpoint.send_custom_notification)
+    delay_notification = _awaitable(ActionsUrlEndpoint.delay_notification)
+    acknowledge_problem = _awaitable(ActionsUrlEndpoint.acknowledge_problem)
+    remove_acknowledgement = _awaitable(ActionsUrlEndpoint.remove_acknowledgement)
+    add_comment = _awaitable(ActionsUrlEndpoint.add_comment)
+    remove_comment = _awaitable(ActionsUrlEndpoint.remove_comment)
+    schedule_downtime = _awaitable(ActionsUrlEndpoint.schedule_downtime)
+    remove_downtime = _awaitable(ActionsUrlEndpoint.remove_downtime)
+    shutdown_process = _awaitable(ActionsUrlEndpoint.shutdown_process)
+    restart_process = _awaitable(ActionsUrlEndpoint.restart_process)
+    generate_ticket = _awaitable(ActionsUrlEndpoint.generate_ticket)
+
+
+class AsyncEventsUrlEndpoint(_AsyncWrapper[EventsUrlEndpoint]):
+    """Async version of :class:`pretiac.raw_client.EventsUrlEndpoint`.
+
+    .. code-block:: python
+
+        async for event in raw_client.events.subscribe(["CheckResult"], "monitor"):
+            print(event)
+    """
+
+    open = _awaitable(EventsUrlEndpoint.open)
+
+    async def subscribe(
+        self,
+        types: Sequence[EventStreamType],
+        queue: str,
+        filter: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        timeout: Optional[Timeout] = None,
+        decode: bool = True,
+    ) -> AsyncGenerator[Any, None]:
+        """See :meth:`pretiac.raw_client.EventsUrlEndpoint.subscribe`."""
+        stream = await self.open(types, queue, filter, filter_vars, timeout)
+        async for event in self.read(stream, decode):
+            yield event
+
+    async def read(
+        self, stream: requests.Response, decode: bool = True
+    ) -> AsyncGenerator[Any, None]:
+        """See :meth:`pretiac.raw_client.EventsUrlEndpoint.read`."""
+        async for event in self._read_stream(stream, self._sync.read(stream, decode)):
+            yield event
+
+
+class AsyncStatusUrlEndpoint(_AsyncWrapper[StatusUrlEndpoint]):
+    """Async version of :class:`pretiac.raw_client.StatusUrlEndpoint`."""
+
+    list = _awaitable(StatusUrlEndpoint.list)
+
+
+class AsyncConfigUrlEndpoint(_AsyncWrapper[ConfigUrlEndpoint]):
+    """Async version of :class:`pretiac.raw_client.ConfigUrlEndpoint`."""
+
+    create_package = _awaitable(ConfigUrlEndpoint.create_package)
+    create_stage = _awaitable(ConfigUrlEndpoint.create_stage)
+    list_packages = _awaitable(ConfigUrlEndpoint.list_packages)
+    list_stage_files = _awaitable(ConfigUrlEndpoint.list_stage_files)
+    fetch_stage_file = _awaitable(ConfigUrlEndpoint.fetch_stage_file)
+    get_package_stage_errors = _awaitable(ConfigUrlEndpoint.get_package_stage_errors)
+    delete_stage = _awaitable(ConfigUrlEndpoint.delete_stage)
+    delete_package = _awaitable(ConfigUrlEndpoint.delete_package)
+
+
+class AsyncTypesUrlEndpoint(_AsyncWrapper[TypesUrlEndpoint]):
+    """Async version of :class:`pretiac.raw_client.TypesUrlEndpoint`."""
+
+    list = _awaitable(TypesUrlEndpoint.list)
+
+
+class AsyncTemplatesUrlEndpoint(_AsyncWrapper[TemplatesUrlEndpoint]):
+    """Async version of :class:`pretiac.raw_client.TemplatesUrlEndpoint`."""
+
+    list = _awaitable(TemplatesUrlEndpoint.list)
+
+
+class AsyncVariablesUrlEndpoint(_AsyncWrapper[VariablesUrlEndpoint]):
+    """Async version of :class:`pretiac.raw_client.VariablesUrlEndpoint`."""
+
+    list = _awaitable(VariablesUrlEndpoint.list)
+
+
+def _create_executor(config: Config, max_workers: Optional[int]) -> ThreadPoolExecutor:
+    if max_workers is None:
+        max_workers = config.async_max_workers
+    if max_workers is None:
+        max_workers = (
+            config.pool_maxsize if config.pool_maxsize is not None else DEFAULT_POOLSIZE
+        )
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pretiac")
+
+
+class AsyncRawClient:
+    """
+    The asyncio version of :class:`pretiac.raw_client.RawClient`.
+
+    .. code-block:: python
+
+        async with AsyncRawClient(config) as raw_client:
+            hosts = await raw_client.objects.list("Host")
+    """
+
+    raw_client: RawClient
+    """The synchronous client that performs the requests."""
+
+    objects: AsyncObjectsUrlEndpoint
+    """Connects to the URL endpoint ``objects`` of the Icinga2 API."""
+
+    actions: AsyncActionsUrlEndpoint
+    """Connects to the URL endpoint ``actions`` of the Icinga2 API."""
+
+    events: AsyncEventsUrlEndpoint
+    """Connects to the URL endpoint ``events`` of the Icinga2 API."""
+
+    status: AsyncStatusUrlEndpoint
+    """Connects to the URL endpoint ``status`` of the Icinga2 API."""
+
+    config: AsyncConfigUrlEndpoint
+    """Connects to the URL endpoint ``config`` of the Icinga2 API."""
+
+    types: AsyncTypesUrlEndpoint
+    """Connects to the URL endpoint ``types`` of the Icinga2 API."""
+
+    templates: AsyncTemplatesUrlEndpoint
+    """Connects to the URL endpoint ``templates`` of the Icinga2 API."""
+
+    variables: AsyncVariablesUrlEndpoint
+    """Connects to the URL endpoint ``variables`` of the Icinga2 API."""
+
+    _executor: ThreadPoolExecutor
+
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        raw_client: Optional[RawClient] = None,
+        max_workers: Optional[int] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ) -> None:
+        """
+        :param config: The client configuration. Required if no ``raw_client``
+            is specified.
+        :param raw_client: An existing synchronous client whose connection pool
+            should be used.
+        :param max_workers: The maximum number of requests in flight (defaults
+            to ``async_max_workers`` or ``pool_maxsize`` of the
+            configuration).
+        :param executor: An existing thread pool to run the requests in.
+        """
+        if raw_client is None:
+            if config is None:
+                raise PretiacException("Specify config OR raw_client!")
+            raw_client = RawClient(config)
+        self.raw_client = raw_client
+        if executor is None:
+            executor = _create_executor(raw_client.get_client_config(), max_workers)
+        self._executor = executor
+
+        self.objects = AsyncObjectsUrlEndpoint(raw_client.objects, self._executor)
+        self.actions = AsyncActionsUrlEndpoint(raw_client.actions, self._executor)
+        self.events = AsyncEventsUrlEndpoint(raw_client.events, self._executor)
+        self.status = AsyncStatusUrlEndpoint(raw_client.status, self._executor)
+        self.config = AsyncConfigUrlEndpoint(raw_client.config, self._executor)
+        self.types = AsyncTypesUrlEndpoint(raw_client.types, self._executor)
+        self.templates = AsyncTemplatesUrlEndpoint(raw_client.templates, self._executor)
+        self.variables = AsyncVariablesUrlEndpoint(raw_client.variables, self._executor)
+
+    def get_client_config(self) -> Config:
+        return self.raw_client.get_client_config()
+
+    def close(self) -> None:
+        """Stop the worker threads and close all pooled connections."""
+        self._executor.shutdown(wait=True)
+        self.raw_client.close()
+
+    async def __aenter__(self) -> "AsyncRawClient":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        # Waiting for the worker threads must not block the event loop.
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+########################################################################################
+# AsyncClient
+########################################################################################
+
+
+class AsyncClient(_AsyncWrapper[Client]):
+    """
+    The asyncio version of the typed :class:`pretiac.client.Client`.
+
+    All methods return the same pydantic models as the synchronous client.
+
+    .. code-block:: python
+
+        async with AsyncClient(config_file="/etc/pretiac/config.yml") as client:
+            hosts, services = await asyncio.gather(
+                client.get_hosts(), client.get_services()
+            )
+    """
+
+    client: Client
+    """The synchronous client that performs the requests."""
+
+    raw_client: AsyncRawClient
+    """The async raw client, sharing the worker threads of this client."""
+
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        config_file: Optional[Union[str, Path, Literal[False]]] = None,
+        client: Optional[Client] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """
+        :param config: A configuration object that has already been populated.
+        :param config_file: The path of the configuration file to load.
+        :param client: An existing synchronous client whose connection pool
+            should be used.
+        :param max_workers: The maximum number of requests in flight (defaults
+            to ``async_max_workers`` or ``pool_maxsize`` of the
+            configuration).
+        """
+        if client is None:
+            client = Client(config=config, config_file=config_file)
+        self.client = client
+        super().__init__(
+            client,
+            _create_executor(client.raw_client.get_client_config(), max_workers),
+        )
+        self.raw_client = AsyncRawClient(
+            raw_client=client.raw_client, executor=self._executor
+        )
+
+    def with_options(
+        self,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> "AsyncClient":
+        """
+        Get a copy of this client with different options. The copy shares the
+        worker threads, the connection pool and the circuit breaker with this
+        client.
+
+        :param retry_policy: Which requests are retried how often.
+        :param timeout: The connect and read timeouts of each request in
+            seconds, a single value for both or a tuple ``(connect, read)``.
+        """
+        async_client = copy.copy(self)
+        async_client.client = self.client.with_options(
+            retry_policy=retry_policy, timeout=timeout
+        )
+        async_client._sync = async_client.client
+        async_client.raw_client = AsyncRawClient(
+            raw_client=async_client.client.raw_client, executor=self._executor
+        )
+        return async_client
+
+    def close(self) -> None:
+        """Stop the worker threads and close all pooled connections."""
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        # Waiting for the worker threads must not block the event loop.
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    # v1/objects #######################################################################
+
+    get_api_user = _awaitable(Client.get_api_user)
+    get_api_users = _awaitable(Client.get_api_users)
+    get_check_commands = _awaitable(Client.get_check_commands)
+    get_dependencys = _awaitable(Client.get_dependencys)
+    get_endpoints = _awaitable(Client.get_endpoints)
+    create_host = _awaitable(Client.create_host)
+    get_host = _awaitable(Client.get_host)
+    get_hosts = _awaitable(Client.get_hosts)
+    iter_hosts = _async_iterator(Client.iter_hosts)
+    delete_host = _awaitable(Client.delete_host)
+    create_service = _awaitable(Client.create_service)
+    get_service = _awaitable(Client.get_service)
+    get_services = _awaitable(Client.get_services)
+    iter_services = _async_iterator(Client.iter_services)
+    delete_service = _awaitable(Client.delete_service)
+    send_service_check_result = _awaitable(Client.send_service_check_result)
+    send_service_check_results = _awaitable(Client.send_service_check_results)
+    load_known_objects = _awaitable(Client.load_known_objects)
+    drain_spool = _awaitable(Client.drain_spool)
+    get_time_periods = _awaitable(Client.get_time_periods)
+    get_users = _awaitable(Client.get_users)
+    get_user_groups = _awaitable(Client.get_user_groups)
+    get_zones = _awaitable(Client.get_zones)
+
+    # v1/events ########################################################################
+
+    async def subscribe_events(
+        self,
+        types: Sequence[EventStreamType],
+        queue: str,
+        filter: Optional[str] = None,
+        filter_vars: FilterVars = None,
+    ) -> AsyncGenerator[EventStream, None]:
+        """See :meth:`pretiac.client.Client.subscribe_events`."""
+        adapter = _get_adapter(EventStream)
+        async for event in self.raw_client.events.subscribe(
+            types, queue, filter, filter_vars
+        ):
+            yield adapter.validate_python(event)
+
+    # v1/status ########################################################################
+
+    get_status = _awaitable(Client.get_status)
+
+    # v1/config ########################################################################
+
+    list_config_packages = _awaitable(Client.list_config_packages)
+    list_config_stage_files = _awaitable(Client.list_config_stage_files)
+    list_all_config_stage_files = _awaitable(Client.list_all_config_stage_files)
+    delete_config = _awaitable(Client.delete_config)
+
+    # v1/types #########################################################################
+
+    get_types = _awaitable(Client.get_types)
+
+    # v1/variables #####################################################################
+
+    get_variables = _awaitable(Client.get_variables)
@@ -2,22 +2,76 @@
 Execute checks using subprocess and send it via the API to the monitoring server.
 """
 
+import os
 import shlex
+import signal
 import subprocess
+import threading
 import time
 from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import IO, Any, Optional, Union
 
+import requests
 import yaml
 from pydantic import TypeAdapter
 
-from pretiac import set_default_client
-from pretiac.client import CheckError, CheckResponse
+from pretiac import get_default_client
+from pretiac.client import CheckError, CheckResponse, Client, _get_host
+from pretiac.exceptions import (
+    PretiacCircuitOpenException,
+    PretiacDeadlineExceededException,
+)
 from pretiac.log import logger
 from pretiac.object_types import ServiceState, get_service_state
 
+DEFAULT_TIMEOUT: float = 60
+"""The default timeout of a check plugin in seconds, the same as Icinga’s ``check_timeout``."""
+
+DEFAULT_MAX_OUTPUT_SIZE: int = 65536
+"""The default maximum number of bytes captured per output stream of a check plugin."""
+
+
+class _CappedReader(threading.Thread):
+    """
+    Read an output stream of a process in a thread and keep only the first
+    ``limit`` bytes. The rest is read and discarded, so the process never
+    blocks on a full pipe.
+    """
+
+    def __init__(self, stream: IO[bytes], limit: int) -> None:
+        super().__init__(name="pretiac-check-output", daemon=True)
+        self.stream = stream
+        self.limit = limit
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.truncated = False
+
+    def run(self) -> None:
+        with self.stream:
+            fileno = self.stream.fileno()
+            for chunk in iter(lambda: os.read(fileno, 8192), b""):
+                kept = chunk[: max(self.limit - self.size, 0)]
+                if kept:
+                    self.chunks.append(kept)
+                    self.size += len(kept)
+                if len(kept) < len(chunk):
+                    self.truncated = True
+
+    @property
+    def output(self) -> str:
+        return b"".join(self.chunks).decode("utf-8", errors="replace")
+
+
+def _kill_process_group(process: "subprocess.Popen[bytes]") -> None:
+    """Kill the plugin and all processes it has started."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
 
 class CheckExecution:
     check_command: Sequence[str]
@@ -32,23 +86,93 @@ class CheckExecution:
 
     performance_data: Optional[str] = None
 
-    def __init__(self, check_command: Union[Sequence[str], str]) -> None:
+    timed_out: bool = False
+    """Whether the plugin was killed because it exceeded its timeout."""
+
+    truncated: bool = False
+    """Whether the output of the plugin exceeded ``max_output_size``."""
+
+    def __init__(
+        self,
+        check_command: Union[Sequence[str], str],
+        timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        timeout_exit_status: ServiceState = ServiceState.UNKNOWN,
+    ) -> None:
+        """
+        :param check_command: The check plugin and its arguments.
+        :param timeout: The maximum number of seconds the plugin may run
+            (defaults to ``60``). The plugin and all of its child processes are
+            killed afterwards.
+        :param max_output_size: The maximum number of bytes captured of
+            ``stdout`` and of ``stderr`` each (defaults to ``65536``).
+        :param timeout_exit_status: The exit status reported if the plugin
+            timed out.
+        """
         if isinstance(check_command, str):
             check_command = shlex.split(check_command)
         self.check_command = check_command
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        if max_output_size is None:
+            max_output_size = DEFAULT_MAX_OUTPUT_SIZE
+        self.execution_start = time.time()
+        self.execution_end = self.execution_start
+        if timeout <= 0:
+            # The time budget of the check collection is already used up.
+            self.timed_out = True
+            self.exit_status = timeout_exit_status
+            self.plugin_output = (
+                f"Plugin not started, no time left: {self.check_command[0]}"
+            )
+            return
         try:
-            self.execution_start = time.time()
-            self.execution_end = self.execution_start
-            process = subprocess.run(
-                self.check_command, capture_output=True, encoding="utf-8"
+            process = subprocess.Popen(
+                self.check_command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                # A new process group that can be killed as a whole.
+                start_new_session=True,
             )
+            assert process.stdout is not None and process.stderr is not None
+            stdout = _CappedReader(process.stdout, max_output_size)
+            stderr = _CappedReader(process.stderr, max_output_size)
+            stdout.start()
+            stderr.start()
+            try:
+                returncode = process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _kill_process_group(process)
+                returncode = process.wait()
+                self.timed_out = True
+            stdout.join(timeout=5)
+            stderr.join(timeout=5)
             self.execution_end = time.time()
-            self.exit_status = get_service_state(process.returncode)
-            output = process.stdout.strip()
-            segments = output.split("|")
-            self.plugin_output = segments[0].strip()
-            if len(segments) > 1:
-                self.performance_data = segments[1].strip()
+            self.truncated = stdout.truncated or stderr.truncated
+
+            if self.timed_out:
+                self.exit_status = timeout_exit_status
+                self.plugin_output = (
+                    f"Plugin timed out after {self.execution_end - self.execution_start:.1f}s"
+                    f" (timeout {timeout:g}s): {self.check_command[0]}"
+                )
+            else:
+                self.exit_status = get_service_state(returncode)
+                output = stdout.output.strip()
+                segments = output.split("|")
+                self.plugin_output = segments[0].strip()
+                if len(segments) > 1:
+                    self.performance_data = segments[1].strip()
+                # Icinga shows the error output of a plugin along with its
+                # output.
+                errors = stderr.output.strip()
+                if errors:
+                    self.plugin_output = (
+                        f"{self.plugin_output}\n{errors}"
+                        if self.plugin_output
+                        else errors
+                    )
 
             logger.debug(
                 "CheckExecution: check_command: %s", " ".join(self.check_command)
@@ -83,25 +207,87 @@ class ServiceCheck:
     display_name: Optional[str] = None
     """A short description of the service, if it needs to be created."""
 
+    timeout: Optional[float] = None
+    """
+    The maximum number of seconds the check plugin may run. Overrides the
+    timeout of the collection.
+    """
+
+    max_output_size: Optional[int] = None
+    """
+    The maximum number of bytes captured of the output of the check plugin.
+    Overrides the limit of the collection.
+    """
+
+    interval: Optional[float] = None
+    """
+    The number of seconds between two executions when run by the agent
+    (``pretiac agent``). Overrides the interval of the collection.
+    """
+
     def set_host(self, host: Optional[str]) -> None:
         if self.host is None:
             self.host = host
 
-    def check(self) -> CheckResponse | CheckError:
-        """Check and send the check result to the monitoring endpoint using the API."""
-        check = CheckExecution(self.check_command)
-        return set_default_client().send_service_check_result(
+    def execute(
+        self,
+        timeout: Optional[float] = None,
+        max_output_size: Optional[int] = None,
+        timeout_exit_status: ServiceState = ServiceState.UNKNOWN,
+    ) -> CheckExecution:
+        """
+        Execute the check plugin.
+
+        :param timeout: The maximum number of seconds the plugin may run
+            (defaults to the timeout of this check).
+        :param max_output_size: The maximum number of bytes captured of the
+            output (defaults to the limit of this check).
+        :param timeout_exit_status: The exit status reported if the plugin
+            timed out.
+        """
+        return CheckExecution(
+            self.check_command,
+            timeout=timeout if timeout is not None else self.timeout,
+            max_output_size=max_output_size
+            if max_output_size is not None
+            else self.max_output_size,
+            timeout_exit_status=timeout_exit_status,
+        )
+
+    def send(
+        self, execution: CheckExecution, client: Optional[Client] = None
+    ) -> CheckResponse | CheckError:
+        """
+        Send the result of a check execution to the monitoring endpoint using
+        the API.
+
+        :param execution: The finished execution of the check plugin.
+        :param client: The client to send the result with. If not specified,
+            the default client is used.
+        """
+        if client is None:
+            client = get_default_client()
+        return client.send_service_check_result(
             service=self.service,
             host=self.host,
-            exit_status=check.exit_status,
-            execution_start=check.execution_start,
-            execution_end=check.execution_end,
-            check_command=check.check_command,
-            plugin_output=check.plugin_output,
-            performance_data=check.performance_data,
+            exit_status=execution.exit_status,
+            execution_start=execution.execution_start,
+            execution_end=execution.execution_end,
+            check_command=execution.check_command,
+            plugin_output=execution.plugin_output,
+            performance_data=execution.performance_data,
             display_name=self.display_name,
         )
 
+    def check(self, client: Optional[Client] = None) -> CheckResponse | CheckError:
+        """
+        Check and send the check result to the monitoring endpoint using the API.
+
+        :param client: The client to send the result with. If not specified,
+            the default client is used.
+        """
+        return self.send(self.execute(), client)
+
 
 @dataclass
 class CheckCollection:
@@ -110,6 +296,9 @@ class CheckCollection:
 
         ---
         host: wrasp-passive
+        concurrency: 8
+        timeout: 30
+        total_timeout: 120
 
         checks:
 
@@ -125,10 +314,168 @@ class CheckCollection:
     checks: Sequence[ServiceCheck]
     host: Optional[str] = None
 
-    def run_checks(self) -> None:
+    concurrency: Optional[int] = None
+    """
+    The maximum number of check plugins executed in parallel (defaults to
+    ``4``). Set to ``1`` to execute the checks one after another.
+    """
+
+    send_concurrency: Optional[int] = None
+    """
+    The maximum number of check results sent to the API in parallel
+    (defaults to ``2``).
+    """
+
+    timeout: Optional[float] = None
+    """
+    The maximum number of seconds a single check plugin may run (defaults to
+    ``60``). A plugin running longer is killed together with its child
+    processes.
+    """
+
+    total_timeout: Optional[float] = None
+    """
+    The maximum number of seconds for executing all checks. Plugins still
+    running are killed and plugins not started yet are skipped when the time
+    is up.
+    """
+
+    max_output_size: Optional[int] = None
+    """
+    The maximum number of bytes captured of ``stdout`` and ``stderr`` of each
+    plugin (defaults to ``65536``).
+    """
+
+    timeout_exit_status: Optional[ServiceState] = None
+    """
+    The exit status reported for a plugin that timed out (defaults to
+    ``UNKNOWN``).
+    """
+
+    interval: Optional[float] = None
+    """
+    The number of seconds between two executions of a check when run by the
+    agent (``pretiac agent``, defaults to ``60``).
+    """
+
+    def prepare(self, client: Client) -> None:
+        """
+        Assign the host of the collection to the checks, send the check
+        results spooled by earlier runs and find out in one query which
+        services need to be created.
+
+        An unreachable API endpoint is only logged, so that the checks still
+        run and their results are spooled.
+
+        :param client: The client to send the results with.
+        """
         for check in self.checks:
             check.set_host(self.host)
-            check.check()
+        client.drain_spool()
+        try:
+            client.load_known_objects(
+                f"{_get_host(check.host)}!{check.service}" for check in self.checks
+            )
+        except (
+            requests.RequestException,
+            PretiacCircuitOpenException,
+            PretiacDeadlineExceededException,
+        ) as e:
+            # Only an optimisation: the results are sent one by one instead.
+            logger.info("Could not check which services exist: %s", e)
+
+    def execute_check(
+        self, check: ServiceCheck, deadline: Optional[float] = None
+    ) -> CheckExecution:
+        """
+        Execute a single check with the limits of the collection.
+
+        :param check: One of the checks of this collection.
+        :param deadline: A :func:`time.monotonic` timestamp the plugin has to
+            finish by.
+        """
+        timeout = check.timeout if check.timeout is not None else self.timeout
+        if deadline is not None:
+            if timeout is None:
+                timeout = DEFAULT_TIMEOUT
+            timeout = min(timeout, deadline - time.monotonic())
+        return check.execute(
+            timeout=timeout,
+            max_output_size=check.max_output_size
+            if check.max_output_size is not None
+            else self.max_output_size,
+            timeout_exit_status=self.timeout_exit_status
+            if self.timeout_exit_status is not None
+            else ServiceState.UNKNOWN,
+        )
+
+    def run_checks(
+        self, client: Optional[Client] = None
+    ) -> list[CheckResponse | CheckError]:
+        """
+        Execute all checks and send their results.
+
+        The check plugins run in a bounded thread pool and every result is
+        handed over to a second pool for the API requests as soon as its plugin
+        has finished, so execution and submission overlap. The total wall time
+        is therefore close to the slowest check instead of the sum of all
+        checks.
+
+        All results are sent with one client and therefore share its
+        connection pool.
+
+        :param client: The client to send the results with, for example the
+            long-lived client of an agent. If not specified, the default client
+            is used.
+
+        :returns: The responses in the order of the checks. A result that
+            could not be sent is reported as a :class:`CheckError`.
+        """
+        if client is None:
+            client = get_default_client()
+        self.prepare(client)
+
+        deadline: Optional[float] = None
+        if self.total_timeout is not None:
+            deadline = time.monotonic() + self.total_timeout
+
+        with (
+            ThreadPoolExecutor(
+                max_workers=self.concurrency or 4, thread_name_prefix="pretiac-check"
+            ) as executor,
+            ThreadPoolExecutor(
+                max_workers=self.send_concurrency or 2,
+                thread_name_prefix="pretiac-send",
+            ) as sender,
+        ):
+
+            def _execute(check: ServiceCheck) -> Future[CheckResponse | CheckError]:
+                execution = self.execute_check(check, deadline)
+                return sender.submit(_send, check, execution, client)
+
+            executions = [executor.submit(_execute, check) for check in self.checks]
+            return [execution.result().result() for execution in executions]
+
+
+def _send(
+    check: ServiceCheck, execution: CheckExecution, client: Client
+) -> CheckResponse | CheckError:
+    """
+    Send the result of a check, so that a failed submission does not discard
+    the results of the other checks.
+    """
+    try:
+        return check.send(execution, client)
+    except (
+        requests.RequestException,
+        PretiacCircuitOpenException,
+        PretiacDeadlineExceededException,
+    ) as e:
+        logger.info("Could not send the result of %s: %s", check.service, e)
+        return CheckError(error=503, status=str(e))
+    except Exception as e:
+        logger.info("Could not send the result of %s: %s", check.service, e)
+        return CheckError(error=500, status=f"{e.__class__.__name__}: {e}")
 
 
 def _read_yaml(file_path: str | Path) -> Any:
@@ -146,9 +493,17 @@ def _read_check_collection(file_path: str | Path) -> CheckCollection:
     return adapter.validate_python(_read_yaml(file_path))
 
 
-def check(file_path: str | Path | None) -> None:
+def check(file_path: str | Path | None, client: Optional[Client] = None) -> None:
+    """
+    Execute the checks of a check collection file and send their results.
+
+    :param file_path: The path of the check collection file (defaults to
+        ``/etc/pretiac/checks.yml``).
+    :param client: The client to send the results with. If not specified,
+        the default client is used.
+    """
     logger.info("Read check collection file: %s", file_path)
     if file_path is None:
         file_path = "/etc/pretiac/checks.yml"
     collection: CheckCollection = _read_check_collection(file_path)
-    collection.run_checks()
+    collection.run_checks(client)
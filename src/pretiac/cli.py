@@ -1,16 +1,22 @@
+import sys
 from typing import Any, Optional, get_args
 
 import click
 from rich import print
 
 from pretiac import get_default_client
+from pretiac.agent import Agent
 from pretiac.check_executor import check as execute_check
 from pretiac.config import load_config_file
+from pretiac.daemon import DEFAULT_SOCKET_PATH, SubmissionDaemon
+from pretiac.event_recording import Compression, EventRecorder, EventReplay
 from pretiac.log import logger
 from pretiac.object_types import (
+    EventStreamType,
     MonitoringObjectName,
     normalize_to_plural_snake_object_type_name,
 )
+from pretiac.submit import submit
 
 
 @click.group()
@@ -89,26 +95,47 @@ def actions() -> None:
 @click.option("--performance-data", help="The performance data.")
 @click.option(
     "--exit-status",
+    type=click.IntRange(0, 3),
     help="For services: ``0=OK``, ``1=WARNING``, ``2=CRITICAL``, ``3=UNKNOWN``, "
     "for hosts: ``0=UP``, ``1=DOWN``.",
 )
 @click.option("--host", help="The name of the host.")
+@click.option(
+    "--socket",
+    "socket_path",
+    help="Hand the check result over to the daemon (pretiac serve) listening "
+    "on this Unix socket instead of sending it via the API. pretiac-submit "
+    "does the same and starts faster.",
+)
 @click.argument("service")
 def send_service_check_result(
     service: str,
     host: Optional[str] = None,
-    exit_status: Optional[Any] = None,
+    exit_status: Optional[int] = None,
     performance_data: Optional[str] = None,
     plugin_output: Optional[str] = None,
+    socket_path: Optional[str] = None,
 ) -> None:
     """Send a check result for a service and create the host or the service if necessary."""
+    if socket_path is not None:
+        record: dict[str, Any] = {"service": service}
+        if host is not None:
+            record["host"] = host
+        if exit_status is not None:
+            record["exit_status"] = exit_status
+        if plugin_output is not None:
+            record["plugin_output"] = plugin_output
+        if performance_data is not None:
+            record["performance_data"] = performance_data
+        print(submit([record], socket_path))
+        return
     print(
         get_default_client().send_service_check_result(
             service=service,
             host=host,
             exit_status=exit_status,
-            plugin_output=performance_data,
-            performance_data=plugin_output,
+            plugin_output=plugin_output,
+            performance_data=performance_data,
         )
     )
 
@@ -119,11 +146,95 @@ actions.add_command(send_service_check_result)
 # v1/events ############################################################################
 
 
-@click.command()
-def events() -> None:
+@click.group(invoke_without_command=True)
+@click.pass_context
+def events(ctx: click.Context) -> None:
     """Subscribe to an event stream."""
-    for event in get_default_client().subscribe_events(["CheckResult"], "cli"):
-        print(event)
+    if ctx.invoked_subcommand is None:
+        for event in get_default_client().subscribe_events(["CheckResult"], "cli"):
+            print(event)
+
+
+@click.command()
+@click.argument("directory")
+@click.option(
+    "--type",
+    "types",
+    type=click.Choice(get_args(EventStreamType)),
+    multiple=True,
+    default=["CheckResult"],
+    show_default=True,
+    help="The event type to record, can be given multiple times.",
+)
+@click.option("--queue", default="pretiac-record", show_default=True)
+@click.option("--filter", help="A filter expression for the events.")
+@click.option(
+    "--compression",
+    type=click.Choice(get_args(Compression)),
+    default="gzip",
+    show_default=True,
+)
+@click.option(
+    "--max-events",
+    type=int,
+    default=100000,
+    show_default=True,
+    help="The number of events per file.",
+)
+@click.option(
+    "--max-seconds",
+    type=float,
+    default=3600,
+    show_default=True,
+    help="The number of seconds per file.",
+)
+@click.option("--limit", type=int, help="Stop after this number of events.")
+def events_record(
+    directory: str,
+    types: tuple[EventStreamType, ...],
+    queue: str,
+    filter: Optional[str],
+    compression: Compression,
+    max_events: int,
+    max_seconds: float,
+    limit: Optional[int],
+) -> None:
+    """Record an event stream to rotating, compressed NDJSON files in DIRECTORY."""
+    with EventRecorder(
+        directory,
+        compression=compression,
+        max_events=max_events,
+        max_seconds=max_seconds,
+    ) as recorder:
+        try:
+            recorder.record(
+                types, queue, filter=filter, client=get_default_client(), limit=limit
+            )
+        except KeyboardInterrupt:
+            pass
+    click.echo(f"Recorded {recorder.events} events to {len(recorder.files)} files")
+
+
+@click.command()
+@click.argument("files", nargs=-1, required=True)
+@click.option(
+    "--speed",
+    type=float,
+    default=1,
+    show_default=True,
+    help="The speed relative to the recording, 0 replays as fast as possible.",
+)
+def events_replay(files: tuple[str, ...], speed: float) -> None:
+    """Write the events of recorded FILES as NDJSON to the standard output."""
+    replay = EventReplay(files, speed=speed or None)
+    output = sys.stdout.buffer
+    for event in replay:
+        output.write(replay.codec.dumps(event) + b"\n")
+    output.flush()
+
+
+events.add_command(events_record, "record")
+events.add_command(events_replay, "replay")
 
 
 # v1/status ############################################################################
@@ -196,6 +307,68 @@ def check(file: str) -> None:
     execute_check(file)
 
 
+@click.command()
+@click.argument("file", required=False)
+@click.option(
+    "--report-service",
+    help="Also send the scheduling statistics as a check result of this service.",
+)
+@click.option(
+    "--report-interval",
+    type=float,
+    default=300,
+    show_default=True,
+    help="The number of seconds between two reports of the scheduling statistics.",
+)
+def agent(
+    file: Optional[str], report_service: Optional[str], report_interval: float
+) -> None:
+    """Execute the checks of FILE periodically (defaults to /etc/pretiac/checks.yml).
+
+    Each check runs on its own interval. Send SIGHUP to reload FILE."""
+    Agent(
+        file,
+        client=get_default_client(),
+        report_service=report_service,
+        report_interval=report_interval,
+    ).run()
+
+
+@click.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    default=DEFAULT_SOCKET_PATH,
+    show_default=True,
+    help="The path of the Unix socket.",
+)
+@click.option(
+    "--concurrency",
+    type=int,
+    default=4,
+    show_default=True,
+    help="The number of concurrent requests to the API.",
+)
+@click.option(
+    "--max-queued",
+    type=int,
+    default=10000,
+    show_default=True,
+    help="The maximum number of check results waiting to be sent.",
+)
+def serve(socket_path: str, concurrency: int, max_queued: int) -> None:
+    """Accept check results as NDJSON on a Unix socket and send them via the API.
+
+    Each line is a JSON object with the keys service, host, exit_status,
+    plugin_output, performance_data, ... ."""
+    SubmissionDaemon(
+        socket_path,
+        client=get_default_client(),
+        concurrency=concurrency,
+        max_queued=max_queued,
+    ).run()
+
+
 @click.command()
 def dump_config() -> None:
     """Dump the configuration of the pretiac client."""
@@ -210,4 +383,6 @@ main.add_command(config)
 main.add_command(types)
 main.add_command(variables)
 main.add_command(check)
+main.add_command(agent)
+main.add_command(serve)
 main.add_command(dump_config)
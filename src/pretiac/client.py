@@ -2,15 +2,26 @@
 A high level client with typed return values.
 """
 
+import copy
 import socket
-from collections.abc import Sequence
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Literal, Optional, Union
+from types import TracebackType
+from typing import Any, Generator, Generic, Literal, Optional, TypeVar, Union
 
+import requests
 from pydantic import BaseModel, TypeAdapter
 
 from pretiac.config import Config, ObjectConfig, load_config
-from pretiac.exceptions import PretiacException
+from pretiac.deadline import Timeout, bind, deadline
+from pretiac.exceptions import (
+    PretiacCircuitOpenException,
+    PretiacDeadlineExceededException,
+    PretiacException,
+)
+from pretiac.known_objects import KnownObjects, get_known_objects
 from pretiac.log import logger
 from pretiac.object_types import (
     ApiUser,
@@ -24,6 +35,7 @@ from pretiac.object_types import (
     EventStreamType,
     FilterVars,
     Host,
+    Joins,
     Service,
     ServiceState,
     StatusMessage,
@@ -35,7 +47,9 @@ from pretiac.object_types import (
     Zone,
 )
 from pretiac.raw_client import RawClient
-from pretiac.request_handler import Payload, State
+from pretiac.request_handler import Payload, State, normalize_state
+from pretiac.retry import RetryPolicy
+from pretiac.spool import Spool, get_spool, is_unreachable
 
 
 def _normalize_object_config(
@@ -66,20 +80,85 @@ def _normalize_object_config(
     return ObjectConfig(attrs=attrs, templates=templates)
 
 
+T = TypeVar("T")
+
+_adapters: dict[Any, TypeAdapter[Any]] = {}
+
+
+def _get_adapter(type: Any) -> TypeAdapter[Any]:
+    """
+    Get the cached :class:`pydantic.TypeAdapter` of a type.
+
+    Building an adapter constructs the whole validation schema, which is much
+    more expensive than validating an object. The adapters are therefore built
+    only once per type, for example ``Host`` or ``list[Host]``.
+    """
+    adapter = _adapters.get(type)
+    if adapter is None:
+        adapter = TypeAdapter(type)
+        _adapters[type] = adapter
+    return adapter
+
+
+def _merge_result(result: Any) -> Payload:
+    """
+    Prepare the attributes of a ``v1/objects`` result for validation.
+
+    If the attributes were projected with ``attrs``, the API omits ``__name``;
+    it is then taken from the result itself. Joined objects are attached as
+    ``joins``.
+    """
+    attrs = result["attrs"]
+    if "__name" not in attrs and "name" in result:
+        attrs["__name"] = result["name"]
+    if result.get("joins"):
+        attrs["joins"] = result["joins"]
+    return attrs
+
+
 def _convert_object(result: Any, type: Any) -> Any:
     if result is None:
         return None
-    adapter = TypeAdapter(type)
-    attrs = result["attrs"]
-    if "__name" in attrs:
-        attrs["name"] = attrs["__name"]
-        del attrs["__name"]
-    # global is a reserved Python keyword
-    # Zone has a global attribute.
-    if "global" in attrs:
-        attrs["is_global"] = attrs["global"]
-        del attrs["global"]
-    return adapter.validate_python(attrs)
+    return _get_adapter(type).validate_python(_merge_result(result))
+
+
+def _convert_objects(results: Sequence[Any], type: Any) -> list[Any]:
+    """Validate all results of a query in one pass against ``list[type]``."""
+    return _get_adapter(list[type]).validate_python(
+        [_merge_result(result) for result in results]
+    )
+
+
+class _ObjectResult(BaseModel, Generic[T]):
+    """A single entry of the ``results`` list of ``v1/objects``."""
+
+    attrs: T
+
+    name: Optional[str] = None
+
+    joins: Optional[dict[str, Any]] = None
+
+
+class _ObjectResults(BaseModel, Generic[T]):
+    """The response body of ``v1/objects``: ``{"results": [{"attrs": …}, …]}``."""
+
+    results: list[_ObjectResult[T]]
+
+
+def _convert_objects_json(body: Union[bytes, str], type: Any) -> list[Any]:
+    """
+    Validate the raw JSON response body of ``v1/objects`` directly with
+    pydantic-core, without building intermediate Python dictionaries.
+    """
+    envelope = _get_adapter(_ObjectResults[type]).validate_json(body)
+    objects: list[Any] = []
+    for result in envelope.results:
+        if result.attrs.name is None:
+            result.attrs.name = result.name
+        if result.joins:
+            result.attrs.joins = result.joins
+        objects.append(result.attrs)
+    return objects
 
 
 class CheckResponse(BaseModel):
@@ -176,6 +255,69 @@ class Client:
         )
         self.raw_client = RawClient(self.__config)
 
+    def close(self) -> None:
+        """Close all pooled connections of the underlying :class:`RawClient`."""
+        self.raw_client.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def with_options(
+        self,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> "Client":
+        """
+        Get a copy of this client with different options. The copy shares the
+        connection pool and the circuit breaker with this client.
+
+        .. code-block:: python
+
+            client.with_options(retry_policy=RetryPolicy(attempts=10)).get_hosts()
+            client.with_options(timeout=120).get_services()
+
+        :param retry_policy: Which requests are retried how often.
+        :param timeout: The connect and read timeouts of each request in
+            seconds, a single value for both or a tuple ``(connect, read)``.
+        """
+        client = copy.copy(self)
+        client.raw_client = self.raw_client.with_options(
+            retry_policy=retry_policy, timeout=timeout
+        )
+        client.__config = client.raw_client.get_client_config()
+        return client
+
+    @property
+    def known_objects(self) -> KnownObjects:
+        """The process-wide cache of the hosts and services known to exist."""
+        return get_known_objects(
+            self.raw_client.url,
+            file=self.__config.known_objects_file,
+            missing_ttl=self.__config.known_objects_missing_ttl,
+        )
+
+    @property
+    def spool(self) -> Optional[Spool]:
+        """
+        The on-disk spool for unsent check results, if a spool directory is
+        configured.
+        """
+        if self.__config.spool_directory is None:
+            return None
+        return get_spool(
+            self.__config.spool_directory,
+            max_size=self.__config.spool_max_size,
+            max_age=self.__config.spool_max_age,
+        )
+
     @property
     def api_endpoint_host(self) -> Optional[str]:
         return self.__config.api_endpoint_host
@@ -210,43 +352,205 @@ class Client:
 
     # CRUD: create_object get_object get_objects delete_object
 
-    def _get_objects(self, type: Any) -> Sequence[Any]:
-        results = self.raw_client.objects.list(type.__name__)
-        objects: list[type] = []
-        for result in results:
-            objects.append(_convert_object(result, type))
-        return objects
+    def _get_objects(
+        self,
+        type: Any,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[Any]:
+        if self.__config.validate_json:
+            return _convert_objects_json(
+                self.raw_client.objects.list(
+                    type.__name__,
+                    attrs=attrs,
+                    filters=filters,
+                    filter_vars=filter_vars,
+                    joins=joins,
+                    raw=True,
+                ),
+                type,
+            )
+        return _convert_objects(
+            self.raw_client.objects.list(
+                type.__name__,
+                attrs=attrs,
+                filters=filters,
+                filter_vars=filter_vars,
+                joins=joins,
+            ),
+            type,
+        )
 
-    def _get_object(self, type: Any, name: str) -> Any:
+    def _iter_objects(
+        self,
+        type: Any,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Generator[Any, Any, None]:
+        adapter = _get_adapter(type)
+        for result in self.raw_client.objects.iter(
+            type.__name__,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        ):
+            yield adapter.validate_python(_merge_result(result))
+
+    def _get_object(
+        self,
+        type: Any,
+        name: str,
+        attrs: Optional[Sequence[str]] = None,
+        joins: Joins = None,
+    ) -> Any:
         return _convert_object(
             self.raw_client.objects.get(
-                object_type=type.__name__, name=name, suppress_exception=True
+                object_type=type.__name__,
+                name=name,
+                attrs=attrs,
+                joins=joins,
+                suppress_exception=True,
             ),
             type,
         )
 
     # api_user #########################################################################
 
-    def get_api_user(self, name: str) -> ApiUser:
-        return self._get_object(ApiUser, name)
+    def get_api_user(
+        self,
+        name: str,
+        attrs: Optional[Sequence[str]] = None,
+    ) -> ApiUser:
+        """
+        Get a single API user.
 
-    def get_api_users(self) -> Sequence[ApiUser]:
-        return self._get_objects(ApiUser)
+        :param name: The name of the API user.
+        :param attrs: Only return these attributes.
+        """
+        return self._get_object(ApiUser, name, attrs=attrs)
+
+    def get_api_users(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[ApiUser]:
+        """
+        Get all API users.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            ApiUser,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     # check_command ####################################################################
 
-    def get_check_commands(self) -> Sequence[CheckCommand]:
-        return self._get_objects(CheckCommand)
+    def get_check_commands(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[CheckCommand]:
+        """
+        Get all check commands.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            CheckCommand,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     # dependency #######################################################################
 
-    def get_dependencys(self) -> Sequence[Dependency]:
-        return self._get_objects(Dependency)
+    def get_dependencys(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[Dependency]:
+        """
+        Get all dependencies.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            Dependency,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     # endpoint #########################################################################
 
-    def get_endpoints(self) -> Sequence[Endpoint]:
-        return self._get_objects(Endpoint)
+    def get_endpoints(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[Endpoint]:
+        """
+        Get all endpoints.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            Endpoint,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     # host #############################################################################
 
@@ -258,6 +562,7 @@ class Client:
         attrs: Optional[Payload] = None,
         object_config: Optional[ObjectConfig] = None,
         suppress_exception: Optional[bool] = None,
+        fetch: bool = True,
     ) -> Optional[Host]:
         """
         Create a new host. If no host configuration is specified, the template
@@ -271,6 +576,8 @@ class Client:
         :param attrs: Set specific object attributes for this object type.
         :param object_config: Bundle of all configurations required to create a host.
         :param suppress_exception: If this parameter is set to ``True``, no exceptions are thrown.
+        :param fetch: If set to ``False``, the created host is not queried
+            and ``None`` is returned.
 
         The method call
 
@@ -312,34 +619,97 @@ class Client:
             attrs=config.attrs,
             suppress_exception=suppress_exception,
         )
+        if not fetch:
+            return None
         return self.get_host(name=name)
 
-    def get_host(self, name: str) -> Optional[Host]:
+    def get_host(
+        self,
+        name: str,
+        attrs: Optional[Sequence[str]] = None,
+    ) -> Optional[Host]:
         """
         Get a single host.
 
         :param name: The name of the host.
+        :param attrs: Only return these attributes.
+        """
+        return self._get_object(Host, name, attrs=attrs)
+
+    def get_hosts(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[Host]:
+        """
+        Get all hosts.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
         """
-        return self._get_object(Host, name)
+        return self._get_objects(
+            Host,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
-    def get_hosts(self) -> Sequence[Host]:
-        """Get all hosts."""
-        return self._get_objects(Host)
+    def iter_hosts(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Generator[Host, Any, None]:
+        """
+        Stream all hosts one at a time while the response is being received.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._iter_objects(
+            Host,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     def delete_host(self, name: str) -> None:
         """Delete a single host.
 
         :param name: The name of the host."""
 
-        for service in self.get_services():
-            if service.host_name == name:
-                self.delete_service(service.name)
+        for service in self.get_services(
+            attrs=["host_name"],
+            filters="service.host_name == hostname",
+            filter_vars={"hostname": name},
+        ):
+            self.delete_service(service.name)
 
         self.raw_client.objects.delete(
             "Host",
             name,
             suppress_exception=True,
         )
+        self.known_objects.discard("Host", name)
 
     # service ##########################################################################
 
@@ -352,6 +722,7 @@ class Client:
         attrs: Optional[Payload] = None,
         object_config: Optional[ObjectConfig] = None,
         suppress_exception: Optional[bool] = None,
+        fetch: bool = True,
     ) -> Optional[Service]:
         """
         Create a new service. If no service configuration is specified, the dummy check
@@ -366,6 +737,8 @@ class Client:
         :param attrs: Set specific object attributes for this object type.
         :param object_config: Bundle of all configurations required to create a service.
         :param suppress_exception: If this parameter is set to ``True``, no exceptions are thrown.
+        :param fetch: If set to ``False``, the created service is not queried
+            and ``None`` is returned.
 
         .. code-block::
 
@@ -406,6 +779,8 @@ class Client:
             attrs=config.attrs,
             suppress_exception=suppress_exception,
         )
+        if not fetch:
+            return None
         return self.get_service(host=host, service=name)
 
     def get_service(
@@ -413,18 +788,79 @@ class Client:
         name: Optional[str] = None,
         host: Optional[str] = None,
         service: Optional[str] = None,
+        attrs: Optional[Sequence[str]] = None,
+        joins: Joins = None,
     ) -> Service:
         """
         :param name: The full name of the service, for example ``host!service``.
         :param host: The name of the host.
         :param service: The name of the service.
+        :param attrs: Only return these attributes.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins.
         """
         return self._get_object(
-            Service, _get_service_name(name=name, service=service, host=host)
+            Service,
+            _get_service_name(name=name, service=service, host=host),
+            attrs=attrs,
+            joins=joins,
         )
 
-    def get_services(self) -> Sequence[Service]:
-        return self._get_objects(Service)
+    def get_services(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[Service]:
+        """
+        Get all services.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            Service,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
+
+    def iter_services(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Generator[Service, Any, None]:
+        """
+        Stream all services one at a time while the response is being received.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._iter_objects(
+            Service,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     def delete_service(
         self,
@@ -437,11 +873,13 @@ class Client:
         :param host: The name of the host.
         :param service: The name of the service.
         """
+        name = _get_service_name(name=name, service=service, host=host)
         self.raw_client.objects.delete(
             "Service",
-            _get_service_name(name=name, service=service, host=host),
+            name,
             suppress_exception=True,
         )
+        self.known_objects.discard("Service", name)
 
     def send_service_check_result(
         self,
@@ -459,6 +897,8 @@ class Client:
         display_name: Optional[str] = None,
         new_host_defaults: Optional[ObjectConfig] = None,
         new_service_defaults: Optional[ObjectConfig] = None,
+        spool: bool = True,
+        timeout: Optional[float] = None,
     ) -> Union[CheckResponse, CheckError]:
         """
         Send a check result for a service and create the host or the service if necessary.
@@ -486,6 +926,14 @@ class Client:
             defaults.
         :param new_service_defaults: If a new service needs to be created, use
             this defaults.
+        :param spool: Whether the check result is stored in the spool if the
+            API endpoint is unreachable (see :attr:`Config.spool_directory`).
+            Spooled check results are sent first, so that the results of a
+            service arrive in order.
+        :param timeout: The maximum number of seconds for all requests needed
+            to send the check result, including the creation of a missing
+            host and service and the retries. Spooled check results are sent
+            before and are not counted.
         """
         host = _get_host(host)
 
@@ -495,6 +943,51 @@ class Client:
         if plugin_output is None:
             plugin_output = f"{service}: {exit_status}"
 
+        spool_ = self.spool if spool else None
+        if spool_ is not None:
+            record: Payload = {
+                key: value
+                for key, value in {
+                    "service": service,
+                    "host": host,
+                    "exit_status": normalize_state(exit_status),
+                    "plugin_output": plugin_output,
+                    "performance_data": performance_data,
+                    "check_command": check_command,
+                    "check_source": check_source,
+                    "execution_start": execution_start,
+                    "execution_end": execution_end,
+                    "ttl": ttl,
+                    "display_name": display_name,
+                }.items()
+                if value is not None
+            }
+            if spool_.pending():
+                self.drain_spool()
+            try:
+                sent: Union[CheckResponse, CheckError, Exception] = (
+                    self.send_service_check_result(
+                        **record,
+                        create=create,
+                        new_host_defaults=new_host_defaults,
+                        new_service_defaults=new_service_defaults,
+                        spool=False,
+                        timeout=timeout,
+                    )
+                )
+            except Exception as e:
+                sent = e
+            if not is_unreachable(sent):
+                if isinstance(sent, Exception):
+                    raise sent
+                return sent
+            spool_.append(record)
+            logger.info("Spooled the check result of %s!%s: %s", host, service, sent)
+            return CheckError(
+                error=getattr(sent, "error", 503),
+                status=f"The check result was spooled: {sent}",
+            )
+
         def _send_service_check_result() -> Union[CheckResponse, CheckError]:
             name = f"{host}!{service}"
             logger.info(
@@ -520,53 +1013,319 @@ class Client:
                 return CheckResponse(**result["results"][0])
             return CheckError(**result)
 
-        result: Union[CheckResponse, CheckError] = _send_service_check_result()
+        def _create() -> None:
+            if not known.is_known("Host", host):
+                self.create_host(
+                    name=host,
+                    object_config=new_host_defaults
+                    if new_host_defaults is not None
+                    else self.__config.new_host_defaults,
+                    suppress_exception=True,
+                    fetch=False,
+                )
 
-        if isinstance(result, CheckResponse):
-            return result
+            self.create_service(
+                name=service,
+                host=host,
+                object_config=new_service_defaults
+                if new_service_defaults is not None
+                else self.__config.new_service_defaults,
+                suppress_exception=True,
+                display_name=display_name,
+                fetch=False,
+            )
 
-        if not create:
+        name = f"{host}!{service}"
+        known = self.known_objects
+
+        with deadline(timeout):
+            if create and (
+                known.is_missing("Service", name) or known.is_missing("Host", host)
+            ):
+                # Known to be missing: create first instead of failing first.
+                _create()
+            else:
+                result = _send_service_check_result()
+                if isinstance(result, CheckResponse):
+                    known.add("Host", host)
+                    known.add("Service", name)
+                    return result
+                known.discard("Service", name)
+                if not create:
+                    return result
+                _create()
+
+            result = _send_service_check_result()
+            if isinstance(result, CheckResponse):
+                known.add("Host", host)
+                known.add("Service", name)
+            else:
+                known.discard("Host", host)
+                known.discard("Service", name)
             return result
 
-        self.create_host(
-            name=host,
-            object_config=new_host_defaults
-            if new_host_defaults is not None
-            else self.__config.new_host_defaults,
-            suppress_exception=True,
+    def send_service_check_results(
+        self,
+        results: Iterable[Payload],
+        concurrency: Optional[int] = None,
+    ) -> list[Union[CheckResponse, CheckError]]:
+        """
+        Send many check results concurrently over the connection pool and
+        create missing hosts and services.
+
+        The services are checked for existence with one query first (see
+        :meth:`load_known_objects`). The results of one service are sent one
+        after the other in their order, different services concurrently.
+
+        .. code-block:: python
+
+            client.send_service_check_results(
+                {"service": "ping4", "host": host, "exit_status": 0} for host in hosts
+            )
+
+        :param results: The check results, each one a dictionary with the
+            parameters of :meth:`send_service_check_result`.
+        :param concurrency: The maximum number of concurrent requests
+            (defaults to the size of the connection pool, see
+            :attr:`Config.pool_maxsize`).
+
+        :returns: One :class:`CheckResponse` or :class:`CheckError` per check
+            result, in the order of ``results``. The throughput is counted in
+            :attr:`pretiac.raw_client.RawClient.throughput`.
+        """
+        if concurrency is None:
+            concurrency = self.raw_client.actions.pool_maxsize
+        items = [dict(result) for result in results]
+        start = time.perf_counter()
+        groups: dict[str, list[int]] = {}
+        for index, item in enumerate(items):
+            item["host"] = _get_host(item.get("host"))
+            groups.setdefault(f"{item['host']}!{item['service']}", []).append(index)
+        try:
+            self.load_known_objects(groups.keys())
+        except (requests.RequestException, PretiacException) as e:
+            logger.info("Could not check which services exist: %s", e)
+
+        responses: list[Union[CheckResponse, CheckError]] = [
+            CheckError(error=500, status="Not sent")
+        ] * len(items)
+
+        def send(indexes: list[int]) -> None:
+            for index in indexes:
+                try:
+                    responses[index] = self.send_service_check_result(**items[index])
+                except (
+                    requests.RequestException,
+                    PretiacCircuitOpenException,
+                    PretiacDeadlineExceededException,
+                ) as e:
+                    responses[index] = CheckError(error=503, status=str(e))
+                except PretiacException as e:
+                    responses[index] = CheckError(error=400, status=str(e))
+
+        with ThreadPoolExecutor(
+            max_workers=max(concurrency, 1), thread_name_prefix="pretiac-send"
+        ) as executor:
+            list(executor.map(bind(send), groups.values()))
+        self.raw_client.throughput.add(len(items), time.perf_counter() - start)
+        return responses
+
+    def drain_spool(self, batch_size: int = 100, concurrency: int = 4) -> int:
+        """
+        Send the check results of the spool (see :attr:`Config.spool_directory`)
+        until the spool is empty or the API endpoint is unreachable again.
+
+        :param batch_size: The number of check results sent per batch.
+        :param concurrency: The number of concurrent requests.
+
+        :returns: The number of check results sent.
+        """
+        spool = self.spool
+        if spool is None:
+            return 0
+        return spool.drain(
+            lambda record: self.send_service_check_result(**record, spool=False),
+            batch_size=batch_size,
+            concurrency=concurrency,
         )
 
-        self.create_service(
-            name=service,
-            host=host,
-            object_config=new_service_defaults
-            if new_service_defaults is not None
-            else self.__config.new_service_defaults,
-            suppress_exception=True,
-            display_name=display_name,
+    def load_known_objects(
+        self, services: Iterable[str], hosts: Iterable[str] = ()
+    ) -> list[str]:
+        """
+        Check in bulk which of the given services (and their hosts) exist and
+        remember the outcome in :attr:`known_objects`.
+
+        Only names whose existence is not known yet are queried, using one
+        filtered query for the services and, if necessary, one for the hosts.
+        Subsequent calls of :meth:`send_service_check_result` then need exactly
+        one request for existing services and create missing objects without
+        a failed attempt first.
+
+        :param services: The full service names, for example ``host!service``.
+        :param hosts: Additional host names to check. The hosts of the
+            services are always checked.
+
+        :returns: The names of the services that do not exist.
+        """
+        known = self.known_objects
+        services = list(services)
+        unknown_services = known.unknown("Service", services)
+        if unknown_services:
+            results = self.raw_client.objects.list(
+                "Service",
+                attrs=["host_name"],
+                filters="service.__name in names",
+                filter_vars={"names": unknown_services},
+                suppress_exception=True,
+            )
+            if isinstance(results, list):
+                found = {result["name"] for result in results}
+                known.add("Service", *found)
+                known.add("Host", *{result["attrs"]["host_name"] for result in results})
+                known.add_missing(
+                    "Service", *[name for name in unknown_services if name not in found]
+                )
+
+        unknown_hosts = known.unknown(
+            "Host", [*hosts, *[name.split("!")[0] for name in services]]
         )
+        if unknown_hosts:
+            results = self.raw_client.objects.list(
+                "Host",
+                attrs=["name"],
+                filters="host.name in names",
+                filter_vars={"names": unknown_hosts},
+                suppress_exception=True,
+            )
+            if isinstance(results, list):
+                found = {result["name"] for result in results}
+                known.add("Host", *found)
+                known.add_missing(
+                    "Host", *[name for name in unknown_hosts if name not in found]
+                )
 
-        return _send_service_check_result()
+        return [name for name in services if known.is_missing("Service", name)]
 
     # time_period ######################################################################
 
-    def get_time_periods(self) -> Sequence[TimePeriod]:
-        return self._get_objects(TimePeriod)
+    def get_time_periods(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[TimePeriod]:
+        """
+        Get all time periods.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            TimePeriod,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     # user #############################################################################
 
-    def get_users(self) -> Sequence[User]:
-        return self._get_objects(User)
+    def get_users(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[User]:
+        """
+        Get all users.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            User,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     # user_group #######################################################################
 
-    def get_user_groups(self) -> Sequence[UserGroup]:
-        return self._get_objects(UserGroup)
+    def get_user_groups(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[UserGroup]:
+        """
+        Get all user groups.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            UserGroup,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     # zone #############################################################################
 
-    def get_zones(self) -> Sequence[Zone]:
-        return self._get_objects(Zone)
+    def get_zones(
+        self,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Joins = None,
+    ) -> Sequence[Zone]:
+        """
+        Get all zones.
+
+        :param attrs: Only return these attributes, for example
+            ``["state", "last_check"]``. All other attributes of the returned
+            objects are ``None``.
+        :param filters: Only return the objects matching this filter
+            expression, for example ``'match("web*", host.name)'``.
+        :param filter_vars: The variables used in the filter expression.
+        :param joins: Also return these attributes of the joined objects, for
+            example ``["host.state"]``, or ``True`` for all joins. They are
+            available in the attribute ``joins``.
+        """
+        return self._get_objects(
+            Zone,
+            attrs=attrs,
+            filters=filters,
+            filter_vars=filter_vars,
+            joins=joins,
+        )
 
     # v1/events ########################################################################
 
@@ -576,8 +1335,8 @@ class Client:
         queue: str,
         filter: Optional[str] = None,
         filter_vars: FilterVars = None,
-    ):
-        adapter: Any = TypeAdapter(EventStream)
+    ) -> Generator[EventStream, Any, None]:
+        adapter = _get_adapter(EventStream)
         for event in self.raw_client.events.subscribe(
             types=types, queue=queue, filter=filter, filter_vars=filter_vars
         ):
@@ -587,18 +1346,12 @@ class Client:
 
     def get_status(self) -> Sequence[StatusMessage]:
         result = self.raw_client.status.list()
-        adapter = TypeAdapter(
-            list[StatusMessage], config={"arbitrary_types_allowed": True}
-        )
-        return adapter.validate_python(result["results"])
+        return _get_adapter(list[StatusMessage]).validate_python(result["results"])
 
     # v1/config ########################################################################
 
     def list_config_packages(self) -> Sequence[ConfigPackage]:
-        adapter: TypeAdapter[Sequence[ConfigPackage]] = TypeAdapter(
-            Sequence[ConfigPackage]
-        )
-        return adapter.validate_python(
+        return _get_adapter(Sequence[ConfigPackage]).validate_python(
             self.raw_client.config.list_packages()["results"]
         )
 
@@ -615,29 +1368,35 @@ class Client:
         :param stage_name: The stage name, for example
             ``7e7861c8-8008-4e8d-9910-2a0bb26921bd``.
         """
-        config_files: TypeAdapter[Sequence[ConfigFile]] = TypeAdapter(
-            Sequence[ConfigFile]
-        )
         return ConfigPackageStageFiles(
             package=package_name,
             stage=stage_name,
-            files=config_files.validate_python(
+            files=_get_adapter(Sequence[ConfigFile]).validate_python(
                 self.raw_client.config.list_stage_files(package_name, stage_name)[
                     "results"
                 ]
             ),
         )
 
-    def list_all_config_stage_files(self) -> list[ConfigPackageStageFiles]:
+    def list_all_config_stage_files(
+        self, timeout: Optional[float] = None
+    ) -> list[ConfigPackageStageFiles]:
+        """
+        List the files of all stages of all configuration packages.
+
+        :param timeout: The maximum number of seconds for all requests
+            together (one per stage).
+        """
         output: list[ConfigPackageStageFiles] = []
-        for package in self.list_config_packages():
-            for stage in package.stages:
-                output.append(
-                    self.list_config_stage_files(
-                        package.name,
-                        stage,
+        with deadline(timeout):
+            for package in self.list_config_packages():
+                for stage in package.stages:
+                    output.append(
+                        self.list_config_stage_files(
+                            package.name,
+                            stage,
+                        )
                     )
-                )
         return output
 
     def delete_config(self, package_name: str, stage_name: Optional[str]):
@@ -666,12 +1425,11 @@ class Client:
 
     def get_types(self) -> list[TypeInfo]:
         result = self.raw_client.types.list()
-        adapter = TypeAdapter(list[TypeInfo], config={"arbitrary_types_allowed": True})
-        return adapter.validate_python(result["results"])
+        return _get_adapter(list[TypeInfo]).validate_python(result["results"])
 
     # v1/variables #####################################################################
 
     def get_variables(self) -> list[Variable]:
-        return TypeAdapter(list[Variable]).validate_python(
+        return _get_adapter(list[Variable]).validate_python(
             self.raw_client.variables.list()["results"]
         )
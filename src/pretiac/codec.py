@@ -0,0 +1,83 @@
+"""
+The JSON codec used to encode the request bodies and to decode the response
+bodies and the event streams.
+
+Codecs work with bytes in both directions, so the bodies are neither decoded
+to nor encoded from an intermediate string. If `orjson
+<https://github.com/ijl/orjson>`__ is installed (``pip install pretiac[fast]``),
+it is used by default, otherwise the :mod:`json` module of the standard library.
+
+.. code-block:: yaml
+
+    ---
+    api_endpoint_host: localhost
+    json_codec: json
+"""
+
+import json
+from typing import Any, Literal, Optional, Protocol, Union
+
+from pretiac.exceptions import PretiacException
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+CodecName = Literal["auto", "json", "orjson"]
+
+
+class Codec(Protocol):
+    """Encodes and decodes JSON."""
+
+    name: str
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object as compact UTF-8 encoded JSON."""
+        ...
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """Decode JSON."""
+        ...
+
+
+class StdlibCodec:
+    """The codec using the :mod:`json` module of the standard library."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """The codec using `orjson <https://github.com/ijl/orjson>`__."""
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+
+
+def get_codec(name: Optional[CodecName] = None) -> Codec:
+    """
+    :param name: The name of the codec. ``auto`` (the default) uses orjson if
+        it is installed.
+    """
+    if name is None or name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name == "orjson":
+        if orjson is None:
+            raise PretiacException(
+                "The JSON codec orjson is not installed (pip install pretiac[fast])"
+            )
+        return OrjsonCodec()
+    return StdlibCodec()
@@ -6,8 +6,10 @@ import yaml
 from pydantic import TypeAdapter
 from pydantic.dataclasses import dataclass
 
+from pretiac.codec import CodecName
 from pretiac.exceptions import PretiacException
 from pretiac.object_types import Payload
+from pretiac.retry import RetryPolicy
 
 
 @dataclass(config={"extra": "forbid"})
@@ -48,6 +50,20 @@ class Config:
     :see: `Icinca Object Types (apilistener) <https://icinga.com/docs/icinga-2/latest/doc/09-object-types/#apilistener>`__
     """
 
+    api_endpoints: Optional[Sequence[str]] = None
+    """
+    Further API endpoints of the same zone as ``host`` or ``host:port``, for
+    example the second endpoint of a master zone. Read requests are spread
+    across all healthy endpoints, the other requests fail over to the next
+    endpoint (see :mod:`pretiac.endpoints`).
+    """
+
+    endpoint_probe_interval: Optional[float] = None
+    """
+    The number of seconds between two health probes of an API endpoint that
+    is down (defaults to ``10``).
+    """
+
     http_basic_username: Optional[str] = None
     """
     The name of the API user used in the HTTP basic authentification, e. g. ``apiuser``.
@@ -125,9 +141,124 @@ class Config:
     new_service_defaults: Optional[ObjectConfig] = None
     """If a new service needs to be created, use this defaults."""
 
+    pool_connections: Optional[int] = None
+    """
+    The number of connection pools to cache, one per API endpoint host
+    (defaults to ``10``).
+
+    The connections are kept alive and shared by all URL endpoints of a
+    :class:`pretiac.raw_client.RawClient`, so only the first request pays
+    for the TCP connect and the TLS handshake.
+    """
+
+    pool_maxsize: Optional[int] = None
+    """
+    The maximum number of connections to keep open per API endpoint host
+    (defaults to ``10``). Set this at least to the number of threads that
+    use the same client concurrently.
+    """
+
+    async_max_workers: Optional[int] = None
+    """
+    The number of worker threads of :class:`pretiac.async_client.AsyncClient`
+    and :class:`pretiac.async_client.AsyncRawClient`, i. e. the maximum number
+    of requests in flight per async client (defaults to ``pool_maxsize``). It
+    may exceed ``pool_maxsize``; raise both together so the additional
+    connections are kept alive instead of being opened per request.
+    """
+
+    validate_json: Optional[bool] = None
+    """
+    If set to ``True``, the typed getters of :class:`pretiac.client.Client`
+    (for example ``get_services()``) validate the raw JSON response body
+    directly with pydantic-core instead of decoding it into Python dictionaries
+    first. This roughly halves the memory and time needed for large listings.
+    """
+
+    compression: Optional[bool] = None
+    """
+    Whether compressed response bodies (``Accept-Encoding: gzip, deflate``)
+    are accepted from the API endpoint or a proxy in between (defaults to
+    ``True``). Compressed bodies are decompressed transparently, also while
+    streaming. See :attr:`pretiac.raw_client.RawClient.transfer` for the
+    bytes saved on the wire.
+    """
+
+    json_codec: Optional[CodecName] = None
+    """
+    The JSON codec used for the request and response bodies: ``json`` (the
+    standard library), ``orjson`` or ``auto`` (the default), which uses
+    orjson if it is installed (see :mod:`pretiac.codec`).
+    """
+
+    known_objects_file: Optional[str] = None
+    """
+    The file path of a JSON file that persists the names of the hosts and
+    services known to exist, for example
+    ``/var/cache/pretiac/known-objects.json``. With this file, check results
+    can be sent with exactly one request after a restart.
+    """
+
+    known_objects_missing_ttl: Optional[float] = None
+    """
+    How long (in seconds) a host or service is remembered as missing
+    (defaults to ``300``). Missing objects are created before a check result
+    is sent instead of after a failed attempt.
+    """
+
+    spool_directory: Optional[str] = None
+    """
+    The directory of an on-disk spool, for example ``/var/spool/pretiac``.
+    If set, check results that could not be sent because the API endpoint
+    was unreachable are stored there and sent later.
+    """
+
+    spool_max_size: Optional[int] = None
+    """
+    The maximum size of the spool in bytes (defaults to 64 MiB). The oldest
+    check results are evicted first.
+    """
+
+    spool_max_age: Optional[float] = None
+    """
+    The number of seconds a check result is kept in the spool (defaults to
+    one day).
+    """
+
+    connect_timeout: Optional[float] = None
+    """
+    The number of seconds to wait for a connection to the API endpoint
+    (defaults to ``10``, ``0`` waits forever).
+    """
+
+    read_timeout: Optional[float] = None
+    """
+    The number of seconds to wait for data from the API endpoint (defaults to
+    ``60``, ``0`` waits forever). Event streams wait forever unless a read
+    timeout is specified when subscribing.
+    """
+
+    retry_policy: Optional[RetryPolicy] = None
+    """
+    Which requests are retried how often (defaults to three attempts with
+    an exponential backoff starting at half a second).
+    """
+
+    circuit_breaker_threshold: Optional[int] = None
+    """
+    The number of consecutive failed requests after which all requests
+    fail fast (defaults to ``5``, ``0`` disables the circuit breaker).
+    """
+
+    circuit_breaker_reset_timeout: Optional[float] = None
+    """
+    The number of seconds requests fail fast before a probe request is let
+    through (defaults to ``30``).
+    """
+
     def check(self) -> None:
         """Check if all required values are set."""
-        if self.api_endpoint_host is None:
+        if self.api_endpoint_host is None and not self.api_endpoints:
             raise PretiacException("Specify an API endpoint host (api_endpoint_host)!")
 
         if (self.http_basic_username or self.http_basic_password) and (
@@ -0,0 +1,309 @@
+"""
+A local submission daemon (``pretiac serve``) for short-lived scripts.
+
+Instead of paying for the interpreter start, the configuration loading and a
+TLS handshake per check result, scripts write their check results as NDJSON
+(one JSON object per line) to a Unix socket. The daemon keeps one pooled
+connection to the API endpoint, collects the check results into batches and
+sends them concurrently.
+
+The keys of a check result are the parameters of
+:meth:`pretiac.client.Client.send_service_check_result`. After the client
+has shut down its side of the connection, the daemon answers with one line
+like ``{"queued": 2, "errors": []}``.
+
+.. code-block:: shell
+
+    pretiac serve --socket /run/pretiac/pretiac.sock &
+
+    echo '{"service": "backup", "host": "web1", "exit_status": 0}' \\
+        | socat - UNIX-CONNECT:/run/pretiac/pretiac.sock
+
+    pretiac-submit --socket /run/pretiac/pretiac.sock \\
+        --host web1 --exit-status 0 backup
+
+``pretiac-submit`` (see :mod:`pretiac.submit`) only uses the standard library
+and starts much faster than ``pretiac actions send-service-check-result
+--socket``.
+"""
+
+import os
+import queue
+import signal
+import socketserver
+import threading
+import time
+from pathlib import Path
+from types import FrameType
+from typing import Any, Optional, Union
+
+from pretiac import get_default_client
+from pretiac.client import CheckResponse, Client
+from pretiac.codec import get_codec
+from pretiac.exceptions import PretiacException
+from pretiac.log import logger
+from pretiac.object_types import Payload
+from pretiac.submit import DEFAULT_SOCKET_PATH
+
+RESULT_KEYS: frozenset[str] = frozenset(
+    (
+        "service",
+        "host",
+        "exit_status",
+        "plugin_output",
+        "performance_data",
+        "check_command",
+        "check_source",
+        "execution_start",
+        "execution_end",
+        "ttl",
+        "display_name",
+    )
+)
+"""The keys a check result submitted to the daemon may contain."""
+
+
+def validate_result(record: Any) -> Payload:
+    """
+    Check a check result received by the daemon.
+
+    :param record: The decoded JSON object.
+
+    :returns: The check result with ``execution_end`` set to the time of the
+        receipt if it was missing, so that the time spent in the queue does
+        not shift the timestamp of the result.
+    """
+    if not isinstance(record, dict):
+        raise PretiacException("A check result has to be a JSON object")
+    if not isinstance(record.get("service"), str):
+        raise PretiacException("A check result needs a service name (service)")
+    unknown = record.keys() - RESULT_KEYS
+    if unknown:
+        raise PretiacException(f"Unknown keys: {', '.join(sorted(unknown))}")
+    exit_status = record.get("exit_status", 0)
+    # bool is a subclass of int, but True is not an exit status.
+    if (
+        not isinstance(exit_status, int)
+        or isinstance(exit_status, bool)
+        or not 0 <= exit_status <= 3
+    ):
+        raise PretiacException(f"Invalid exit status: {exit_status!r}")
+    record.setdefault("execution_end", time.time())
+    record.setdefault("execution_start", record["execution_end"])
+    return record
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def handle(self) -> None:
+        codec = get_codec()
+        queued = 0
+        errors: list[str] = []
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                self.server.submission_daemon.put(validate_result(codec.loads(line)))
+                queued += 1
+            except (ValueError, PretiacException) as e:
+                errors.append(str(e))
+        try:
+            self.wfile.write(codec.dumps({"queued": queued, "errors": errors}) + b"\n")
+        except OSError:
+            # The client did not wait for the answer.
+            pass
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    submission_daemon: "SubmissionDaemon"
+
+
+class SubmissionDaemon:
+    """
+    Accept check results on a Unix socket and send them via the API.
+
+    :param socket_path: The path of the Unix socket.
+    :param client: The client to send the results with. If not specified,
+        the default client is used.
+    :param concurrency: The number of concurrent requests to the API.
+    :param batch_size: The maximum number of check results sent together.
+    :param flush_interval: The number of seconds to wait for more check
+        results before a batch is sent.
+    :param socket_mode: The file permissions of the socket.
+    :param max_queued: The maximum number of check results waiting to be
+        sent. Further check results are rejected with an error in the answer
+        of the daemon, so that its memory stays bounded while the API
+        endpoint is unreachable.
+    """
+
+    socket_path: Path
+
+    client: Client
+
+    concurrency: int
+
+    batch_size: int
+
+    flush_interval: float
+
+    socket_mode: int
+
+    max_queued: int
+
+    received: int = 0
+    """The number of check results received."""
+
+    sent: int = 0
+    """The number of check results sent."""
+
+    rejected: int = 0
+    """The number of check results rejected because the queue was full."""
+
+    __queue: "queue.Queue[Optional[Payload]]"
+
+    __stopped: threading.Event
+
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        socket_path: Optional[Union[str, Path]] = None,
+        client: Optional[Client] = None,
+        concurrency: int = 4,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        socket_mode: int = 0o660,
+        max_queued: int = 10000,
+    ) -> None:
+        self.socket_path = Path(
+            socket_path if socket_path is not None else DEFAULT_SOCKET_PATH
+        )
+        self.client = client if client is not None else get_default_client()
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.socket_mode = socket_mode
+        self.max_queued = max_queued
+        self.__queue = queue.Queue(max_queued)
+        self.__stopped = threading.Event()
+        self.__lock = threading.Lock()
+
+    def put(self, record: Payload) -> None:
+        """
+        Queue a validated check result.
+
+        :raises PretiacException: The queue is full.
+        """
+        with self.__lock:
+            self.received += 1
+            try:
+                self.__queue.put_nowait(record)
+            except queue.Full:
+                self.rejected += 1
+                raise PretiacException(
+                    f"The queue is full ({self.max_queued} check results), "
+                    f"the check result of {record['service']} was rejected"
+                )
+
+    def __next_batch(self) -> tuple[list[Payload], bool]:
+        """Wait for a check result and collect the ones arriving shortly after."""
+        batch: list[Payload] = []
+        first = self.__queue.get()
+        if first is None:
+            return batch, True
+        batch.append(first)
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                record = self.__queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if record is None:
+                return batch, True
+            batch.append(record)
+        return batch, False
+
+    def __send(self, batch: list[Payload]) -> None:
+        responses = self.client.send_service_check_results(
+            batch, concurrency=self.concurrency
+        )
+        for record, response in zip(batch, responses):
+            if isinstance(response, CheckResponse):
+                self.sent += 1
+            else:
+                logger.info(
+                    "Sending the check result of %s failed: %s",
+                    record["service"],
+                    response,
+                )
+
+    def __dispatch(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = self.__next_batch()
+            if batch:
+                try:
+                    self.__send(batch)
+                except Exception as e:
+                    logger.info("Sending %s check results failed: %s", len(batch), e)
+
+    def __bind(self) -> _Server:
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.is_socket():
+            # A stale socket of a previous daemon.
+            self.socket_path.unlink()
+        server = _Server(str(self.socket_path), _Handler)
+        server.submission_daemon = self
+        os.chmod(self.socket_path, self.socket_mode)
+        return server
+
+    def stop(self) -> None:
+        """Stop accepting check results and send the queued ones."""
+        self.__stopped.set()
+
+    def __handle_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        self.stop()
+
+    def run(self, ready: Optional[threading.Event] = None) -> None:
+        """
+        Accept check results until :meth:`stop` is called or ``SIGTERM`` or
+        ``SIGINT`` is received. The queued check results are sent before
+        this method returns.
+
+        :param ready: An event that is set as soon as the socket accepts
+            connections.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.__handle_signal)
+            signal.signal(signal.SIGINT, self.__handle_signal)
+
+        self.__stopped.clear()
+        server = self.__bind()
+        dispatcher = threading.Thread(
+            target=self.__dispatch, name="pretiac-dispatch", daemon=True
+        )
+        dispatcher.start()
+        listener = threading.Thread(
+            target=server.serve_forever, name="pretiac-serve", daemon=True
+        )
+        listener.start()
+        logger.info("Accepting check results on %s", self.socket_path)
+        if ready is not None:
+            ready.set()
+        try:
+            self.__stopped.wait()
+        finally:
+            server.shutdown()
+            server.server_close()
+            self.socket_path.unlink(missing_ok=True)
+            self.__queue.put(None)
+            dispatcher.join()
+            logger.info(
+                "Received %s check results, sent %s, rejected %s",
+                self.received,
+                self.sent,
+                self.rejected,
+            )
@@ -0,0 +1,136 @@
+"""
+Timeouts for single requests and deadlines for operations that send several
+requests.
+
+Every request to the API endpoint is sent with a connect and a read timeout
+(:attr:`pretiac.config.Config.connect_timeout`,
+:attr:`pretiac.config.Config.read_timeout`), so a stuck API endpoint cannot
+block a thread forever.
+
+Operations that send several requests, for example
+:meth:`pretiac.client.Client.send_service_check_result` (which creates a
+missing host and service first), are additionally bounded by a deadline for
+all of their requests and retries together:
+
+.. code-block:: python
+
+    with deadline(5):
+        client.send_service_check_result("backup", "web1", exit_status=0)
+        client.get_services()
+
+A request that would start after the deadline raises
+:class:`pretiac.exceptions.PretiacDeadlineExceededException`, the timeouts of
+the requests before are shortened to the remaining time.
+"""
+
+import functools
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional, ParamSpec, TypeVar, Union
+
+from pretiac.exceptions import PretiacDeadlineExceededException
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+Timeout = Union[float, tuple[Optional[float], Optional[float]]]
+"""
+The number of seconds to wait for the API endpoint, a single value for both
+or a tuple ``(connect, read)``. ``None`` waits forever.
+"""
+
+_deadline: ContextVar[Optional[float]] = ContextVar("pretiac_deadline", default=None)
+"""The point in time (:func:`time.monotonic`) of the current deadline."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound all requests sent in the ``with`` block to a total duration.
+
+    Nested deadlines can only shorten the outer deadline.
+
+    :param seconds: The number of seconds from now. ``None`` keeps the
+        current deadline, if there is one.
+    """
+    if seconds is None:
+        yield
+        return
+    end = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        end = min(end, current)
+    token = _deadline.set(end)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def get_remaining() -> Optional[float]:
+    """
+    The number of seconds until the current deadline or ``None`` if there is
+    no deadline.
+    """
+    end = _deadline.get()
+    if end is None:
+        return None
+    return end - time.monotonic()
+
+
+def split_timeout(
+    timeout: Optional[Timeout],
+) -> tuple[Optional[float], Optional[float]]:
+    """
+    :param timeout: A single timeout or a tuple ``(connect, read)``.
+
+    :returns: The tuple ``(connect, read)``.
+    """
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
+
+
+def limit_timeout(
+    connect: Optional[float], read: Optional[float]
+) -> tuple[Optional[float], Optional[float]]:
+    """
+    Shorten the timeouts of a request to the time remaining until the
+    current deadline.
+
+    :param connect: The connect timeout in seconds.
+    :param read: The read timeout in seconds.
+
+    :returns: The tuple ``(connect, read)``.
+    """
+    remaining = get_remaining()
+    if remaining is None:
+        return connect, read
+    if remaining <= 0:
+        raise PretiacDeadlineExceededException(
+            f"The deadline was exceeded by {-remaining:.2f}s"
+        )
+    return (
+        remaining if connect is None else min(connect, remaining),
+        remaining if read is None else min(read, remaining),
+    )
+
+
+def bind(func: Callable[P, R]) -> Callable[P, R]:
+    """
+    Keep the current deadline when ``func`` is called in another thread, for
+    example by a :class:`concurrent.futures.ThreadPoolExecutor`.
+    """
+    end = _deadline.get()
+
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        token = _deadline.set(end)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _deadline.reset(token)
+
+    return wrapper
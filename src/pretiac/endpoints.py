@@ -0,0 +1,189 @@
+"""
+Several API endpoints of the same zone, for example the two endpoints of a
+master zone.
+
+Read requests (``GET``) are spread across the healthy endpoints in turn.
+Requests that change something are sent to the first healthy endpoint in the
+order of the configuration, so that for example the check results of a
+service arrive in order.
+
+An endpoint that refuses connections, times out or answers with
+``503 Service Unavailable`` is marked as down and the request is sent to the
+next endpoint right away. Requests that change something and are not
+idempotent are only sent to the next endpoint if they surely did not reach
+Icinga (see :func:`pretiac.retry.is_not_sent`). A down endpoint is probed in
+the background every :attr:`pretiac.config.Config.endpoint_probe_interval`
+seconds and used again as soon as it answers.
+
+.. code-block:: yaml
+
+    ---
+    api_endpoint_host: master1.example.org
+    api_endpoints:
+      - master2.example.org
+      - 192.168.1.3:5666
+"""
+
+import itertools
+import threading
+import time
+from collections.abc import Sequence
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+from pretiac.log import logger
+
+
+def normalize_endpoint(endpoint: str, default_port: int = 5665) -> str:
+    """
+    Build the base URL of an API endpoint.
+
+    :param endpoint: ``host``, ``host:port``, ``[::1]:port`` or an URL like
+        ``https://host:port``.
+    :param default_port: The port used if the endpoint does not specify one.
+
+    :returns: The URL, for example ``https://master2.example.org:5665``.
+    """
+    if "://" not in endpoint:
+        endpoint = f"https://{endpoint}"
+    parts = urlsplit(endpoint)
+    host = parts.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+    port = parts.port if parts.port is not None else default_port
+    return f"{parts.scheme}://{host}:{port}"
+
+
+class Endpoint:
+    """An API endpoint and its health."""
+
+    url: str
+    """The base URL, for example ``https://master1.example.org:5665``."""
+
+    down_since: Optional[float] = None
+    """The point in time (:func:`time.monotonic`) the endpoint failed."""
+
+    next_probe: float = 0
+    """The point in time (:func:`time.monotonic`) of the next health probe."""
+
+    probing: bool = False
+    """Whether a health probe is running."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_since is None
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r}, healthy={self.healthy})"
+
+
+class EndpointPool:
+    """
+    The API endpoints of one zone with their health.
+
+    :param urls: The base URLs of the endpoints in the order of preference.
+    :param probe_interval: The number of seconds between two health probes
+        of an endpoint that is down.
+    :param probe: A function that checks if the endpoint with the given
+        base URL answers. If not specified, down endpoints are used again
+        after the probe interval without a probe.
+    """
+
+    endpoints: list[Endpoint]
+
+    probe_interval: float
+
+    __probe: Optional[Callable[[str], bool]]
+
+    __lock: threading.Lock
+
+    __turn: "itertools.count[int]"
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        probe_interval: float = 10,
+        probe: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(urls)]
+        self.probe_interval = probe_interval
+        self.__probe = probe
+        self.__lock = threading.Lock()
+        self.__turn = itertools.count()
+
+    @property
+    def healthy(self) -> list[Endpoint]:
+        """The endpoints that are not marked as down."""
+        return [endpoint for endpoint in self.endpoints if endpoint.healthy]
+
+    def get_candidates(self, read: bool) -> list[Endpoint]:
+        """
+        The endpoints to send a request to, one after the other until one
+        answers: the healthy endpoints first, then the down ones as a last
+        resort.
+
+        :param read: Whether the request only reads, it is then sent to the
+            healthy endpoints in turn.
+        """
+        self.__schedule_probes()
+        healthy = self.healthy
+        if read and len(healthy) > 1:
+            turn = next(self.__turn) % len(healthy)
+            healthy = healthy[turn:] + healthy[:turn]
+        down = sorted(
+            (endpoint for endpoint in self.endpoints if not endpoint.healthy),
+            key=lambda endpoint: endpoint.down_since or 0,
+        )
+        return healthy + down
+
+    def mark_down(self, endpoint: Endpoint, reason: object = None) -> None:
+        with self.__lock:
+            if endpoint.down_since is None:
+                endpoint.down_since = time.monotonic()
+                logger.info("The API endpoint %s is down: %s", endpoint.url, reason)
+            endpoint.next_probe = time.monotonic() + self.probe_interval
+
+    def mark_up(self, endpoint: Endpoint) -> None:
+        if endpoint.down_since is None:
+            return
+        with self.__lock:
+            if endpoint.down_since is not None:
+                logger.info("The API endpoint %s is up again", endpoint.url)
+            endpoint.down_since = None
+
+    def probe(self, endpoint: Endpoint) -> bool:
+        """
+        Check if an endpoint answers and mark it as up or down.
+
+        :returns: Whether the endpoint is up.
+        """
+        try:
+            if self.__probe is None or self.__probe(endpoint.url):
+                self.mark_up(endpoint)
+                return True
+            self.mark_down(endpoint, "The health probe failed")
+            return False
+        finally:
+            endpoint.probing = False
+
+    def __schedule_probes(self) -> None:
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if endpoint.healthy or endpoint.probing or now < endpoint.next_probe:
+                continue
+            with self.__lock:
+                if endpoint.probing:
+                    continue
+                endpoint.probing = True
+            if self.__probe is None:
+                self.probe(endpoint)
+            else:
+                threading.Thread(
+                    target=self.probe,
+                    args=(endpoint,),
+                    name="pretiac-probe",
+                    daemon=True,
+                ).start()
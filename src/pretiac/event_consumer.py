@@ -0,0 +1,400 @@
+"""
+A long-running consumer of the event stream (``v1/events``).
+
+:meth:`pretiac.raw_client.EventsUrlEndpoint.subscribe` simply ends if the
+connection breaks off, for example while Icinga reloads its configuration.
+The :class:`EventConsumer` instead
+
+- reconnects with exponential backoff,
+- detects a stalled stream with a read timeout (``stall_timeout``),
+- reports the gaps in which events may have been lost
+  (:class:`EventGap`) and
+- hands the events to a bounded queue. If the queue is full, the consumer
+  waits (``block``, TCP applies backpressure to Icinga), drops the oldest
+  event (``drop_oldest``) or spills the events to disk (``spill``).
+
+.. code-block:: python
+
+    from pretiac.event_consumer import EventConsumer
+
+    consumer = EventConsumer(["CheckResult", "StateChange"], overflow="spill")
+    consumer.start()
+
+    for event in consumer:
+        print(event["type"], event.get("host"))
+"""
+
+import gzip
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from pathlib import Path
+from queue import Empty, Full, Queue
+from typing import Literal, Optional, Union
+
+import requests
+import urllib3
+
+from pretiac.client import Client
+from pretiac.codec import get_codec
+from pretiac.log import logger
+from pretiac.object_types import EventStreamType, FilterVars, Payload
+from pretiac.retry import RetryPolicy
+
+OverflowPolicy = Literal["block", "drop_oldest", "spill"]
+"""What happens with a new event if the queue is full."""
+
+
+class EventGap:
+    """
+    An interruption of the event stream. Events that happened between
+    :attr:`last_event_timestamp` and :attr:`next_event_timestamp` may be
+    missing.
+    """
+
+    reason: str
+    """Why the stream was interrupted, for example ``stalled``."""
+
+    started: float
+    """The Unix timestamp when the interruption was detected."""
+
+    last_event_timestamp: Optional[float]
+    """The ``timestamp`` of the last event before the gap."""
+
+    ended: Optional[float] = None
+    """The Unix timestamp when the first event after the gap arrived."""
+
+    next_event_timestamp: Optional[float] = None
+    """The ``timestamp`` of the first event after the gap."""
+
+    reconnects: int = 0
+    """The number of connection attempts needed."""
+
+    def __init__(
+        self, reason: str, started: float, last_event_timestamp: Optional[float]
+    ) -> None:
+        self.reason = reason
+        self.started = started
+        self.last_event_timestamp = last_event_timestamp
+
+    @property
+    def duration(self) -> Optional[float]:
+        """The duration of the interruption in seconds."""
+        return None if self.ended is None else self.ended - self.started
+
+    def __repr__(self) -> str:
+        return (
+            f"EventGap({self.reason!r}, last_event_timestamp="
+            f"{self.last_event_timestamp}, next_event_timestamp="
+            f"{self.next_event_timestamp})"
+        )
+
+
+def _is_stall(error: Exception) -> bool:
+    if isinstance(error, requests.Timeout):
+        return True
+    return any(
+        isinstance(arg, urllib3.exceptions.ReadTimeoutError)
+        for arg in getattr(error, "args", ())
+    )
+
+
+class _Spill:
+    """
+    Gzip compressed NDJSON files holding the events that did not fit into the
+    queue, oldest first.
+    """
+
+    directory: Path
+
+    batch_size: int
+
+    def __init__(self, directory: Optional[Union[str, Path]], batch_size: int) -> None:
+        if directory is None:
+            self.__temporary = tempfile.TemporaryDirectory(prefix="pretiac-events-")
+            directory = self.__temporary.name
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.__files: deque[Path] = deque()
+        self.__buffer: list[Payload] = []
+        self.__refill: deque[Payload] = deque()
+        self.__counter = 0
+
+    def __len__(self) -> int:
+        return (
+            len(self.__files) * self.batch_size
+            + len(self.__buffer)
+            + len(self.__refill)
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.__files or self.__buffer or self.__refill)
+
+    def append(self, event: Payload) -> None:
+        self.__buffer.append(event)
+        if len(self.__buffer) >= self.batch_size:
+            dumps = get_codec().dumps
+            self.__counter += 1
+            path = self.directory / f"{self.__counter:012d}.ndjson.gz"
+            path.write_bytes(
+                gzip.compress(
+                    b"".join(dumps(event) + b"\n" for event in self.__buffer),
+                    compresslevel=1,
+                )
+            )
+            self.__files.append(path)
+            self.__buffer = []
+
+    def pop(self) -> Optional[Payload]:
+        """The oldest spilled event."""
+        if not self.__refill:
+            if self.__files:
+                path = self.__files.popleft()
+                with gzip.open(path, "rb") as file:
+                    self.__refill.extend(get_codec().loads(line) for line in file)
+                path.unlink()
+            elif self.__buffer:
+                self.__refill.extend(self.__buffer)
+                self.__buffer = []
+            else:
+                return None
+        return self.__refill.popleft()
+
+
+class EventConsumer:
+    """
+    Consume an event stream in a background thread and hand the events to a
+    bounded queue.
+
+    :param types: The event types, for example ``["CheckResult"]``.
+    :param queue: The name of the event stream queue. If not specified, a
+        unique name is generated.
+    :param filter: Filter for specific event attributes using filter
+        expressions.
+    :param filter_vars: Variables used in the filter expression.
+    :param client: The client used for the event stream. If not specified, a
+        client configured by the configuration files is created.
+    :param stall_timeout: The number of seconds without any event after which
+        the stream is considered stalled and reopened. ``None`` waits
+        forever, which is advisable for rare event types.
+    :param backoff: The base of the exponential backoff in seconds between
+        the reconnection attempts.
+    :param backoff_max: The maximum number of seconds between two
+        reconnection attempts.
+    :param maxsize: The maximum number of events in the queue.
+    :param overflow: What happens with a new event if the queue is full.
+    :param spill_directory: The directory for ``spill``. If not specified, a
+        temporary directory is used.
+    :param spill_batch_size: The number of events per spilled file.
+    :param on_gap: Called with the :class:`EventGap` once the first event
+        after an interruption arrived.
+    """
+
+    client: Client
+
+    types: Sequence[EventStreamType]
+
+    queue: str
+
+    filter: Optional[str]
+
+    filter_vars: FilterVars
+
+    stall_timeout: Optional[float]
+
+    overflow: OverflowPolicy
+
+    on_gap: Optional[Callable[[EventGap], None]]
+
+    gaps: deque[EventGap]
+    """The last 100 interruptions of the event stream."""
+
+    received: int = 0
+    """The number of received events."""
+
+    dropped: int = 0
+    """The number of events dropped because the queue was full."""
+
+    spilled: int = 0
+    """The number of events spilled to disk."""
+
+    reconnects: int = 0
+    """The number of reconnections."""
+
+    last_event_timestamp: Optional[float] = None
+    """The ``timestamp`` of the last received event."""
+
+    __thread: Optional[threading.Thread] = None
+
+    def __init__(
+        self,
+        types: Sequence[EventStreamType],
+        queue: Optional[str] = None,
+        filter: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        client: Optional[Client] = None,
+        stall_timeout: Optional[float] = 300,
+        backoff: float = 1,
+        backoff_max: float = 60,
+        maxsize: int = 10000,
+        overflow: OverflowPolicy = "block",
+        spill_directory: Optional[Union[str, Path]] = None,
+        spill_batch_size: int = 1000,
+        on_gap: Optional[Callable[[EventGap], None]] = None,
+    ) -> None:
+        self.types = types
+        self.queue = queue if queue is not None else f"pretiac-{uuid.uuid4()}"
+        self.filter = filter
+        self.filter_vars = filter_vars
+        self.client = client if client is not None else Client()
+        self.stall_timeout = stall_timeout
+        self.overflow = overflow
+        self.on_gap = on_gap
+        self.gaps = deque(maxlen=100)
+        self.__backoff = RetryPolicy(backoff=backoff, backoff_max=backoff_max)
+        self.__queue: Queue[Payload] = Queue(maxsize)
+        self.__spill = (
+            _Spill(spill_directory, spill_batch_size) if overflow == "spill" else None
+        )
+        self.__lock = threading.Lock()
+        self.__stopped = threading.Event()
+        self.__gap: Optional[EventGap] = None
+
+    @property
+    def pending(self) -> int:
+        """The number of events waiting in the queue and on disk."""
+        with self.__lock:
+            return self.__queue.qsize() + (len(self.__spill) if self.__spill else 0)
+
+    # Producer #########################################################################
+
+    def __put(self, event: Payload) -> None:
+        if self.overflow == "block":
+            while True:
+                try:
+                    self.__queue.put(event, timeout=0.5)
+                    return
+                except Full:
+                    if self.__stopped.is_set():
+                        self.dropped += 1
+                        return
+        with self.__lock:
+            if self.__spill is not None:
+                # Once spilling, all events go to disk to keep their order.
+                if self.__spill or self.__queue.full():
+                    self.__spill.append(event)
+                    self.spilled += 1
+                    return
+            elif self.__queue.full():
+                try:
+                    self.__queue.get_nowait()
+                    self.dropped += 1
+                except Empty:
+                    pass
+            self.__queue.put_nowait(event)
+
+    def __receive(self, event: Payload) -> None:
+        self.received += 1
+        timestamp = event.get("timestamp")
+        if self.__gap is not None:
+            gap = self.__gap
+            self.__gap = None
+            gap.ended = time.time()
+            gap.next_event_timestamp = timestamp
+            self.gaps.append(gap)
+            logger.info("The event stream was interrupted: %s", gap)
+            if self.on_gap is not None:
+                try:
+                    self.on_gap(gap)
+                except Exception as e:
+                    logger.info("The gap callback failed: %s", e)
+        if isinstance(timestamp, (int, float)):
+            self.last_event_timestamp = timestamp
+        self.__put(event)
+
+    def __interrupted(self, reason: str) -> None:
+        if self.__gap is None:
+            self.__gap = EventGap(reason, time.time(), self.last_event_timestamp)
+        logger.info("The event stream %s was interrupted: %s", self.queue, reason)
+
+    def run(self) -> None:
+        """
+        Receive events and reconnect until :meth:`stop` is called.
+        """
+        self.__stopped.clear()
+        attempt = 0
+        events = self.client.raw_client.events
+        while not self.__stopped.is_set():
+            if self.__gap is not None:
+                self.__gap.reconnects += 1
+                self.reconnects += 1
+            try:
+                for event in events.subscribe(
+                    self.types,
+                    self.queue,
+                    filter=self.filter,
+                    filter_vars=self.filter_vars,
+                    timeout=(events.timeout[0], self.stall_timeout),
+                ):
+                    if isinstance(event, dict):
+                        attempt = 0
+                        self.__receive(event)
+                    if self.__stopped.is_set():
+                        return
+                reason = "closed by the API endpoint"
+            except Exception as e:
+                reason = "stalled" if _is_stall(e) else str(e)
+            if self.__stopped.is_set():
+                return
+            self.__interrupted(reason)
+            attempt += 1
+            self.__stopped.wait(self.__backoff.get_delay(attempt))
+
+    def start(self) -> threading.Thread:
+        """Run the consumer in a daemon thread."""
+        self.__thread = threading.Thread(
+            target=self.run, name="pretiac-event-consumer", daemon=True
+        )
+        self.__thread.start()
+        return self.__thread
+
+    def stop(self) -> None:
+        """
+        Stop receiving events. The thread ends when the next event arrives or
+        the stream stalls. The queued events can still be read.
+        """
+        self.__stopped.set()
+
+    # Consumer #########################################################################
+
+    def get(self, timeout: Optional[float] = None) -> Payload:
+        """
+        Remove the oldest event from the queue.
+
+        :param timeout: The number of seconds to wait for an event. ``None``
+            waits forever.
+
+        :raises queue.Empty: No event arrived in time.
+        """
+        with self.__lock:
+            try:
+                return self.__queue.get_nowait()
+            except Empty:
+                if self.__spill is not None:
+                    event = self.__spill.pop()
+                    if event is not None:
+                        return event
+        return self.__queue.get(timeout=timeout)
+
+    def __iter__(self) -> Iterator[Payload]:
+        """Yield the events until the consumer is stopped and drained."""
+        while True:
+            try:
+                yield self.get(timeout=0.5)
+            except Empty:
+                if self.__stopped.is_set() and not self.pending:
+                    return
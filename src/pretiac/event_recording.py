@@ -0,0 +1,367 @@
+"""
+Record event streams (``v1/events``) to compressed NDJSON files and replay
+them, for example to load-test event processing code without an Icinga
+server.
+
+Each recorded line wraps the raw event line of the API with the Unix
+timestamp of its arrival:
+
+.. code-block:: json
+
+    {"received":1700000000.123,"event":{"type":"CheckResult",...}}
+
+The files are compressed with gzip, or with zstd if `zstandard
+<https://github.com/indygreg/python-zstandard>`__ is installed, and rotated
+after a number of events or seconds. A file is written under a ``.part``
+name and renamed once it is complete.
+
+.. code-block:: shell
+
+    pretiac events record --type CheckResult --type StateChange recordings/
+    pretiac events replay --speed 10 recordings/*.ndjson.gz
+
+.. code-block:: python
+
+    replay = EventReplay(sorted(Path("recordings").glob("*.ndjson.gz")), speed=10)
+    for event in replay.subscribe_events(["CheckResult"], "load-test"):
+        process(event)
+"""
+
+import gzip
+import io
+import os
+import time
+from collections.abc import Generator, Iterable, Iterator, Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal, Optional, Union
+
+from pretiac.client import Client, _get_adapter
+from pretiac.codec import Codec, get_codec
+from pretiac.exceptions import PretiacException
+from pretiac.object_types import EventStream, EventStreamType, FilterVars, Payload
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+Compression = Literal["gzip", "zstd"]
+
+_SUFFIXES: dict[Compression, str] = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise PretiacException(
+            "The zstd compression needs zstandard (pip install zstandard)"
+        )
+
+
+def open_recording(path: Union[str, Path]) -> io.BufferedIOBase:
+    """
+    Open a recorded file for reading, decompressed according to its suffix
+    (``.gz``, ``.zst`` or uncompressed).
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".zst":
+        _require_zstandard()
+        # The zstd stream reader cannot be iterated line by line.
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        )
+    return open(path, "rb")
+
+
+def read_recording(
+    paths: Iterable[Union[str, Path]], codec: Optional[Codec] = None
+) -> Iterator[tuple[float, Payload]]:
+    """
+    Read recorded events.
+
+    :param paths: The recorded files, in the order of their recording.
+    :param codec: The JSON codec to decode the lines with.
+
+    :returns: The arrival timestamps and the events.
+    """
+    loads = (codec or get_codec()).loads
+    for path in paths:
+        with open_recording(path) as file:
+            for line in file:
+                if line.strip():
+                    record = loads(line)
+                    yield record["received"], record["event"]
+
+
+class EventRecorder:
+    """
+    Write raw event lines to rotating, compressed NDJSON files.
+
+    :param directory: The directory of the recorded files. It is created if
+        it does not exist.
+    :param prefix: The start of the file names, which continue with the
+        start time and a counter, for example
+        ``events-20231114T221320-0001.ndjson.gz``.
+    :param compression: ``zstd`` needs the package ``zstandard``.
+    :param max_events: The number of events after which a new file is
+        started.
+    :param max_seconds: The number of seconds after which a new file is
+        started.
+    :param level: The compression level, by default 6 for gzip and 3 for
+        zstd.
+    """
+
+    directory: Path
+
+    prefix: str
+
+    compression: Compression
+
+    max_events: Optional[int]
+
+    max_seconds: Optional[float]
+
+    level: Optional[int]
+
+    files: list[Path]
+    """The completed files."""
+
+    events: int = 0
+    """The number of recorded events."""
+
+    __file: Optional[io.BufferedIOBase] = None
+
+    __path: Optional[Path] = None
+
+    __file_events: int = 0
+
+    __file_started: float = 0
+
+    __counter: int = 0
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        prefix: str = "events",
+        compression: Compression = "gzip",
+        max_events: Optional[int] = 100000,
+        max_seconds: Optional[float] = 3600,
+        level: Optional[int] = None,
+    ) -> None:
+        if compression == "zstd":
+            _require_zstandard()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.compression = compression
+        self.max_events = max_events
+        self.max_seconds = max_seconds
+        self.level = level
+        self.files = []
+
+    def __open(self, now: float) -> io.BufferedIOBase:
+        self.__counter += 1
+        name = (
+            f"{self.prefix}-{datetime.fromtimestamp(now):%Y%m%dT%H%M%S}-"
+            f"{self.__counter:04d}.ndjson{_SUFFIXES[self.compression]}"
+        )
+        self.__path = self.directory / name
+        part = self.__path.with_name(name + ".part")
+        file: io.BufferedIOBase
+        if self.compression == "zstd":
+            compressor = zstandard.ZstdCompressor(
+                level=self.level if self.level is not None else 3
+            )
+            file = compressor.stream_writer(open(part, "wb"))
+        else:
+            file = gzip.open(
+                part, "wb", compresslevel=self.level if self.level is not None else 6
+            )
+        self.__file = file
+        self.__file_events = 0
+        self.__file_started = now
+        return file
+
+    def __rotate_due(self, now: float) -> bool:
+        return (
+            self.max_events is not None and self.__file_events >= self.max_events
+        ) or (
+            self.max_seconds is not None
+            and now - self.__file_started >= self.max_seconds
+        )
+
+    def write(self, line: bytes, received: Optional[float] = None) -> None:
+        """
+        Record a raw event line.
+
+        :param line: An event as JSON, without the line break.
+        :param received: The Unix timestamp of its arrival, by default now.
+        """
+        now = time.time()
+        if received is None:
+            received = now
+        file = self.__file
+        if file is not None and self.__rotate_due(now):
+            self.rotate()
+            file = None
+        if file is None:
+            file = self.__open(now)
+        file.write(b'{"received":%r,"event":%s}\n' % (received, line))
+        self.__file_events += 1
+        self.events += 1
+
+    def rotate(self) -> None:
+        """Complete the current file, the next event starts a new one."""
+        if self.__file is None or self.__path is None:
+            return
+        self.__file.close()
+        self.__file = None
+        os.replace(self.__path.with_name(self.__path.name + ".part"), self.__path)
+        self.files.append(self.__path)
+
+    def close(self) -> None:
+        """Complete the current file."""
+        self.rotate()
+
+    def __enter__(self) -> "EventRecorder":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def record(
+        self,
+        types: Sequence[EventStreamType],
+        queue: str,
+        filter: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        client: Optional[Client] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        """
+        Subscribe to an event stream and record it until the stream ends or
+        ``limit`` events were recorded.
+
+        :param types: The event types, for example ``["CheckResult"]``.
+        :param queue: The name of the event stream queue.
+        :param filter: Filter for specific event attributes using filter
+            expressions.
+        :param filter_vars: Variables used in the filter expression.
+        :param client: The client used for the event stream. If not
+            specified, a client configured by the configuration files is
+            created.
+        :param limit: The maximum number of events to record.
+
+        :returns: The number of recorded events.
+        """
+        if client is None:
+            client = Client()
+        count = 0
+        if limit is not None and limit <= 0:
+            return count
+        for line in client.raw_client.events.subscribe(
+            types, queue, filter=filter, filter_vars=filter_vars, decode=False
+        ):
+            self.write(line if isinstance(line, bytes) else line.encode())
+            count += 1
+            if limit is not None and count >= limit:
+                break
+        return count
+
+
+class EventReplay:
+    """
+    Replay recorded event streams in place of
+    :meth:`pretiac.raw_client.EventsUrlEndpoint.subscribe` and
+    :meth:`pretiac.client.Client.subscribe_events`.
+
+    :param paths: The recorded files, in the order of their recording.
+    :param speed: The replay speed relative to the recording: ``1`` keeps
+        the original pace, ``10`` is ten times as fast and ``None`` replays
+        as fast as possible.
+    :param codec: The JSON codec to decode the lines with.
+    """
+
+    paths: Sequence[Path]
+
+    speed: Optional[float]
+
+    codec: Codec
+
+    events: int = 0
+    """The number of replayed events."""
+
+    lag: float = 0
+    """
+    The maximum number of seconds the replay fell behind the requested pace,
+    because the consumer was too slow.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Union[str, Path]],
+        speed: Optional[float] = 1,
+        codec: Optional[Codec] = None,
+    ) -> None:
+        if speed is not None and speed <= 0:
+            raise PretiacException(f"The replay speed must be positive: {speed}")
+        self.paths = [Path(path) for path in paths]
+        self.speed = speed
+        self.codec = codec if codec is not None else get_codec()
+
+    def __iter__(self) -> Iterator[Payload]:
+        """Yield the recorded events at the configured speed."""
+        first: Optional[float] = None
+        start = time.monotonic()
+        for received, event in read_recording(self.paths, self.codec):
+            if self.speed is not None:
+                if first is None:
+                    first = received
+                delay = start + (received - first) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    self.lag = max(self.lag, -delay)
+            self.events += 1
+            yield event
+
+    def subscribe(
+        self,
+        types: Sequence[EventStreamType],
+        queue: str,
+        filter: Optional[str] = None,
+        filter_vars: FilterVars = None,
+    ) -> Generator[Payload, Any, None]:
+        """
+        Replay the recorded events of the given types, like
+        :meth:`pretiac.raw_client.EventsUrlEndpoint.subscribe`.
+
+        :param types: The event types, for example ``["CheckResult"]``.
+        :param queue: Ignored, accepted for compatibility.
+        :param filter: Not supported, the recording has to be filtered.
+        :param filter_vars: Not supported.
+        """
+        if filter is not None or filter_vars is not None:
+            raise PretiacException(
+                "Filter expressions can only be applied while recording"
+            )
+        for event in self:
+            if event.get("type") in types:
+                yield event
+
+    def subscribe_events(
+        self,
+        types: Sequence[EventStreamType],
+        queue: str,
+        filter: Optional[str] = None,
+        filter_vars: FilterVars = None,
+    ) -> Generator[EventStream, Any, None]:
+        """
+        Replay the recorded events of the given types as models, like
+        :meth:`pretiac.client.Client.subscribe_events`.
+        """
+        adapter = _get_adapter(EventStream)
+        for event in self.subscribe(types, queue, filter, filter_vars):
+            yield adapter.validate_python(event)
@@ -53,6 +53,20 @@ class PretiacRequestException(PretiacException):
         self.response = response
 
 
+class PretiacCircuitOpenException(PretiacException):
+    """
+    The API endpoint failed repeatedly, requests fail fast until the circuit
+    breaker lets a probe request through again.
+    """
+
+
+class PretiacDeadlineExceededException(PretiacException):
+    """
+    The deadline of an operation (see :func:`pretiac.deadline.deadline`)
+    passed before all of its requests were sent.
+    """
+
+
 class PretiacConfigFileException(Exception):
     """
     Icinga 2 API config file exception class
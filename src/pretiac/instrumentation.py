@@ -0,0 +1,236 @@
+"""
+Hooks to observe every request to the API endpoint.
+
+An observer is notified before each API call, after its response has been
+read and if it failed without a response. It receives a
+:class:`RequestInfo` with the method, the URL endpoint, the URL template,
+the status, the transferred bytes and the timings of the call.
+
+.. code-block:: python
+
+    class SlowRequests(RequestObserver):
+        def after_response(self, info: RequestInfo) -> None:
+            if info.total_seconds > 1:
+                print(info.method, info.url_template, info.total_seconds)
+
+
+    raw_client.add_observer(SlowRequests())
+
+See :class:`pretiac.metrics.MetricsCollector` for an observer that collects
+Prometheus metrics.
+"""
+
+import socket
+import time
+from typing import Any, Optional
+
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPSConnectionPool
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    NameResolutionError,
+    NewConnectionError,
+)
+from urllib3.util.connection import allowed_gai_family
+
+from pretiac.object_types import RequestMethod
+
+
+def get_url_template(url_path: str) -> str:
+    """
+    Replace the object names in an URL path with a placeholder, so that the
+    number of distinct URL templates stays small.
+
+    :param url_path: For example ``v1/objects/hosts/example.org``.
+
+    :returns: For example ``v1/objects/hosts/{name}``.
+    """
+    segments = url_path.split("/")
+    return "/".join(
+        segments[:3] + ["{name}" if segment else "" for segment in segments[3:]]
+    )
+
+
+class RequestInfo:
+    """A request to the API endpoint and, once known, its outcome."""
+
+    method: RequestMethod
+    """The HTTP method, for example ``GET``."""
+
+    url_endpoint: str
+    """The URL endpoint, for example ``objects``."""
+
+    url_template: str
+    """The URL path with placeholders, for example ``v1/objects/hosts/{name}``."""
+
+    api_endpoint: Optional[str] = None
+    """The base URL of the API endpoint that answered."""
+
+    status: Optional[int] = None
+    """The HTTP status code of the response."""
+
+    suppressed: bool = False
+    """
+    Whether the response was an error that was not raised, because of
+    ``suppress_exception``.
+    """
+
+    attempts: int = 0
+    """The number of attempts, including the retries."""
+
+    request_bytes: int = 0
+    """The size of the request body."""
+
+    response_bytes: int = 0
+    """
+    The size of the response body on the wire. ``0`` for streamed responses,
+    see :attr:`pretiac.raw_client.RawClient.transfer` for those.
+    """
+
+    dns_seconds: Optional[float] = None
+    """
+    The time needed to resolve the host name of the API endpoint, ``None`` if
+    a pooled connection was reused.
+    """
+
+    connect_seconds: Optional[float] = None
+    """
+    The time needed for the TCP connect, ``None`` if a pooled connection was
+    reused.
+    """
+
+    tls_seconds: Optional[float] = None
+    """The time needed for the TLS handshake of a new connection."""
+
+    server_seconds: Optional[float] = None
+    """
+    The time from sending the request until the response headers arrived,
+    without the connect and the TLS handshake.
+    """
+
+    parse_seconds: Optional[float] = None
+    """The time needed to read and decode the response body."""
+
+    total_seconds: float = 0
+    """The duration of the whole call, including the retries."""
+
+    def __init__(
+        self,
+        method: RequestMethod,
+        url_endpoint: str,
+        url_template: str,
+        request_bytes: int = 0,
+    ) -> None:
+        self.method = method
+        self.url_endpoint = url_endpoint
+        self.url_template = url_template
+        self.request_bytes = request_bytes
+
+    def __repr__(self) -> str:
+        return (
+            f"RequestInfo({self.method} {self.url_template}, status={self.status}, "
+            f"total_seconds={self.total_seconds:.3f})"
+        )
+
+
+class RequestObserver:
+    """
+    The base class of the observers of the requests. Override the methods
+    you are interested in. Exceptions raised by an observer are logged and
+    do not affect the request.
+    """
+
+    def before_request(self, info: RequestInfo) -> None:
+        """Called before the request is sent."""
+
+    def after_response(self, info: RequestInfo) -> None:
+        """
+        Called after the response has been read, also for error responses.
+        """
+
+    def on_error(self, info: RequestInfo, error: Exception) -> None:
+        """
+        Called if the request failed without a response, for example because
+        the connection was refused.
+        """
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """
+    Measures the DNS lookup, the TCP connect and the TLS handshake of new
+    connections to the API endpoint.
+    """
+
+    dns_seconds: Optional[float] = None
+
+    connect_seconds: Optional[float] = None
+
+    tls_seconds: Optional[float] = None
+
+    def _new_conn(self) -> Any:
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(
+                self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        finally:
+            self.dns_seconds = time.perf_counter() - start
+        # Connect to the resolved addresses in turn, so the host name is not
+        # resolved a second time.
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            error: Optional[Exception] = None
+            for *_, address in addresses:
+                self._dns_host = str(address[0])
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+            assert error is not None
+            raise error
+        finally:
+            self._dns_host = host
+            self.connect_seconds = time.perf_counter() - start
+
+    def connect(self) -> None:
+        start = time.perf_counter()
+        super().connect()
+        self.tls_seconds = max(
+            time.perf_counter()
+            - start
+            - (self.dns_seconds or 0)
+            - (self.connect_seconds or 0),
+            0,
+        )
+
+    def getresponse(self, *args: Any, **kwargs: Any) -> Any:
+        response = super().getresponse(*args, **kwargs)
+        # The connection is released to the pool once the body is read, so
+        # the timings are attached to the response.
+        setattr(
+            response,
+            "timings",
+            (self.dns_seconds, self.connect_seconds, self.tls_seconds),
+        )
+        self.dns_seconds = self.connect_seconds = self.tls_seconds = None
+        return response
+
+
+def get_connection_timings(
+    response: Any,
+) -> tuple[Optional[float], Optional[float], Optional[float]]:
+    """
+    The DNS, connect and TLS timings of the connection, if it was established
+    for this response, ``(None, None, None)`` if a pooled connection was
+    reused.
+
+    :param response: A response of :mod:`urllib3` (``requests.Response.raw``).
+    """
+    return getattr(response, "timings", (None, None, None))
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
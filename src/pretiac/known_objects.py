@@ -0,0 +1,175 @@
+"""
+A process-wide cache of the hosts and services known to exist on an API
+endpoint.
+
+:meth:`pretiac.client.Client.send_service_check_result` uses this cache to
+skip the round trips that find out whether a host or a service has to be
+created first. Names that are known to be missing are remembered for a limited
+time (negative cache), so that the objects are created before the check result
+is sent instead of after a failed attempt.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Optional, Union
+
+from pretiac.codec import get_codec
+from pretiac.log import logger
+from pretiac.object_types import HostOrService
+
+DEFAULT_MISSING_TTL: float = 300
+"""How long (in seconds) a name is remembered as missing by default."""
+
+
+class KnownObjects:
+    """
+    The names of the hosts and services known to exist on one API endpoint.
+
+    :param file: The path of a JSON file to persist the known names across
+        process restarts.
+    :param missing_ttl: How long (in seconds) a name is remembered as missing.
+    """
+
+    file: Optional[Path]
+
+    missing_ttl: float
+
+    __known: set[tuple[HostOrService, str]]
+
+    __missing: dict[tuple[HostOrService, str], float]
+
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        file: Optional[Union[str, Path]] = None,
+        missing_ttl: Optional[float] = None,
+    ) -> None:
+        self.file = Path(file) if file is not None else None
+        self.missing_ttl = (
+            missing_ttl if missing_ttl is not None else DEFAULT_MISSING_TTL
+        )
+        self.__known = set()
+        self.__missing = {}
+        self.__lock = threading.Lock()
+        self.__load()
+
+    def __load(self) -> None:
+        if self.file is None or not self.file.exists():
+            return
+        try:
+            with open(self.file, "rb") as file:
+                data = get_codec().loads(file.read())
+            for name in data.get("Host", []):
+                self.__known.add(("Host", name))
+            for name in data.get("Service", []):
+                self.__known.add(("Service", name))
+        except (OSError, ValueError) as e:
+            logger.info("Ignore the known objects file %s: %s", self.file, e)
+
+    def __save(self) -> None:
+        if self.file is None:
+            return
+        data: dict[str, list[str]] = {"Host": [], "Service": []}
+        for object_type, name in sorted(self.__known):
+            data[object_type].append(name)
+        tmp = self.file.with_name(self.file.name + ".tmp")
+        try:
+            with open(tmp, "wb") as file:
+                file.write(get_codec().dumps(data))
+            os.replace(tmp, self.file)
+        except OSError as e:
+            logger.info("Could not write the known objects file %s: %s", self.file, e)
+
+    def is_known(self, object_type: HostOrService, name: str) -> bool:
+        """Whether the object is known to exist."""
+        return (object_type, name) in self.__known
+
+    def is_missing(self, object_type: HostOrService, name: str) -> bool:
+        """Whether the object is known to be missing."""
+        expiry = self.__missing.get((object_type, name))
+        if expiry is None:
+            return False
+        if expiry < time.monotonic():
+            with self.__lock:
+                self.__missing.pop((object_type, name), None)
+            return False
+        return True
+
+    def add(self, object_type: HostOrService, *names: str) -> None:
+        """Remember that the objects exist."""
+        with self.__lock:
+            new = False
+            for name in names:
+                key = (object_type, name)
+                self.__missing.pop(key, None)
+                if key not in self.__known:
+                    self.__known.add(key)
+                    new = True
+            if new:
+                self.__save()
+
+    def add_missing(self, object_type: HostOrService, *names: str) -> None:
+        """Remember for :attr:`missing_ttl` seconds that the objects are missing."""
+        expiry = time.monotonic() + self.missing_ttl
+        with self.__lock:
+            for name in names:
+                key = (object_type, name)
+                if key in self.__known:
+                    self.__known.discard(key)
+                self.__missing[key] = expiry
+
+    def discard(self, object_type: HostOrService, name: str) -> None:
+        """Forget everything about the object, for example after it was deleted."""
+        with self.__lock:
+            self.__missing.pop((object_type, name), None)
+            if (object_type, name) in self.__known:
+                self.__known.discard((object_type, name))
+                self.__save()
+
+    def unknown(self, object_type: HostOrService, names: Iterable[str]) -> list[str]:
+        """
+        Get the names for which neither the existence nor the absence is
+        known.
+        """
+        return [
+            name
+            for name in dict.fromkeys(names)
+            if not self.is_known(object_type, name)
+            and not self.is_missing(object_type, name)
+        ]
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__known.clear()
+            self.__missing.clear()
+            self.__save()
+
+
+__caches: dict[str, KnownObjects] = {}
+
+__caches_lock = threading.Lock()
+
+
+def get_known_objects(
+    url: str,
+    file: Optional[Union[str, Path]] = None,
+    missing_ttl: Optional[float] = None,
+) -> KnownObjects:
+    """
+    Get the process-wide cache of known objects of an API endpoint.
+
+    :param url: The URL of the API endpoint, for example
+        ``https://localhost:5665``.
+    :param file: The path of a JSON file to persist the known names.
+    :param missing_ttl: How long (in seconds) a name is remembered as missing.
+    """
+    with __caches_lock:
+        cache = __caches.get(url)
+        if cache is None:
+            cache = KnownObjects(file=file, missing_ttl=missing_ttl)
+            __caches[url] = cache
+        return cache
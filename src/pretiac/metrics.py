@@ -0,0 +1,320 @@
+"""
+An in-memory collector of request metrics in the `Prometheus text format
+<https://prometheus.io/docs/instrumenting/exposition_formats/>`__.
+
+.. code-block:: python
+
+    metrics = MetricsCollector()
+    client.raw_client.add_observer(metrics)
+
+    # Scraped by Prometheus on http://127.0.0.1:9641/metrics
+    metrics.serve(9641)
+
+    # Or read by the textfile collector of the node exporter
+    metrics.write("/var/lib/prometheus/node-exporter/pretiac.prom")
+
+The following metrics are collected, labelled by the HTTP method, the URL
+endpoint and the URL template (for example ``v1/objects/hosts/{name}``):
+
+``pretiac_requests_total``
+    The number of responses by status code.
+``pretiac_request_errors_total``
+    The number of requests that failed without a response, by exception.
+``pretiac_suppressed_errors_total``
+    The number of error responses not raised because of
+    ``suppress_exception``.
+``pretiac_request_retries_total``
+    The number of retries.
+``pretiac_request_duration_seconds``
+    A histogram of the duration of the requests, including the retries.
+``pretiac_request_phase_seconds``
+    A histogram of the phases ``dns`` (DNS lookup), ``connect`` (TCP
+    connect), ``tls``, ``server`` and ``parse`` (labelled by the URL endpoint
+    only).
+``pretiac_request_bytes_total``, ``pretiac_response_bytes_total``
+    The bytes sent and received (on the wire).
+"""
+
+import bisect
+import os
+import tempfile
+import threading
+from collections.abc import Sequence
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Union
+
+from pretiac.instrumentation import RequestInfo, RequestObserver
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+"""The upper bounds of the histogram buckets in seconds."""
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+"""The content type of the Prometheus text format."""
+
+_LABELS = ("method", "url_endpoint", "url_template")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Counter:
+    name: str
+
+    help: str
+
+    label_names: tuple[str, ...]
+
+    values: dict[tuple[str, ...], float]
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.values = {}
+
+    def inc(self, labels: tuple[str, ...], value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.label_names, labels)} "
+                + _format_value(value)
+            )
+        return lines
+
+
+class _Histogram:
+    name: str
+
+    help: str
+
+    label_names: tuple[str, ...]
+
+    buckets: tuple[float, ...]
+
+    values: dict[tuple[str, ...], list[float]]
+    """Per label set: the count per bucket (and above), the sum and the count."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float],
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        values = self.values.get(labels)
+        if values is None:
+            values = self.values[labels] = [0] * (len(self.buckets) + 3)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        for labels, values in sorted(self.values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, labels + (le,))} "
+                    + _format_value(cumulative)
+                )
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {values[-2]!r}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(values[-1])}")
+        return lines
+
+
+class MetricsCollector(RequestObserver):
+    """
+    Collect request metrics and render them in the Prometheus text format.
+
+    :param buckets: The upper bounds of the histogram buckets in seconds.
+    """
+
+    __lock: threading.Lock
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.__lock = threading.Lock()
+        self.__requests = _Counter(
+            "pretiac_requests_total",
+            "The number of responses of the API endpoint.",
+            _LABELS + ("status",),
+        )
+        self.__errors = _Counter(
+            "pretiac_request_errors_total",
+            "The number of requests that failed without a response.",
+            _LABELS + ("error",),
+        )
+        self.__suppressed = _Counter(
+            "pretiac_suppressed_errors_total",
+            "The number of error responses not raised (suppress_exception).",
+            _LABELS,
+        )
+        self.__retries = _Counter(
+            "pretiac_request_retries_total",
+            "The number of retried requests.",
+            _LABELS,
+        )
+        self.__duration = _Histogram(
+            "pretiac_request_duration_seconds",
+            "The duration of the requests including the retries.",
+            _LABELS,
+            buckets,
+        )
+        self.__phases = _Histogram(
+            "pretiac_request_phase_seconds",
+            "The duration of the phases connect, tls, server and parse.",
+            ("url_endpoint", "phase"),
+            buckets,
+        )
+        self.__request_bytes = _Counter(
+            "pretiac_request_bytes_total",
+            "The number of bytes sent in request bodies.",
+            ("url_endpoint",),
+        )
+        self.__response_bytes = _Counter(
+            "pretiac_response_bytes_total",
+            "The number of bytes of the response bodies on the wire.",
+            ("url_endpoint",),
+        )
+
+    def __record(self, info: RequestInfo) -> tuple[str, ...]:
+        labels = (info.method, info.url_endpoint, info.url_template)
+        self.__duration.observe(labels, info.total_seconds)
+        if info.attempts > 1:
+            self.__retries.inc(labels, info.attempts - 1)
+        self.__request_bytes.inc((info.url_endpoint,), info.request_bytes)
+        for phase, seconds in (
+            ("dns", info.dns_seconds),
+            ("connect", info.connect_seconds),
+            ("tls", info.tls_seconds),
+            ("server", info.server_seconds),
+            ("parse", info.parse_seconds),
+        ):
+            if seconds is not None:
+                self.__phases.observe((info.url_endpoint, phase), seconds)
+        return labels
+
+    def after_response(self, info: RequestInfo) -> None:
+        with self.__lock:
+            labels = self.__record(info)
+            self.__requests.inc(labels + (str(info.status),))
+            self.__response_bytes.inc((info.url_endpoint,), info.response_bytes)
+            if info.suppressed:
+                self.__suppressed.inc(labels)
+
+    def on_error(self, info: RequestInfo, error: Exception) -> None:
+        with self.__lock:
+            labels = self.__record(info)
+            self.__errors.inc(labels + (type(error).__name__,))
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text format."""
+        lines: list[str] = []
+        with self.__lock:
+            for metric in (
+                self.__requests,
+                self.__errors,
+                self.__suppressed,
+                self.__retries,
+                self.__duration,
+                self.__phases,
+                self.__request_bytes,
+                self.__response_bytes,
+            ):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Union[str, Path]) -> None:
+        """
+        Write the metrics to a file atomically, for example for the textfile
+        collector of the Prometheus node exporter.
+
+        :param path: The path of the file, for example
+            ``/var/lib/prometheus/node-exporter/pretiac.prom``.
+        """
+        path = Path(path)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(self.render())
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve the metrics on ``http://host:port/metrics`` in a background
+        thread.
+
+        :param port: The TCP port, ``0`` picks a free port.
+        :param host: The address to listen on.
+
+        :returns: The server, call ``shutdown()`` to stop it.
+        """
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = collector.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(
+            target=server.serve_forever, name="pretiac-metrics", daemon=True
+        ).start()
+        return server
@@ -17,7 +17,7 @@ from typing import (
     get_args,
 )
 
-from pydantic import BeforeValidator, Field
+from pydantic import AliasChoices, BeforeValidator, Field
 from pydantic.dataclasses import dataclass
 
 
@@ -148,6 +148,12 @@ Payload = dict[str, Any]
 
 FilterVars = Optional[Payload]
 
+Joins = Optional[Union[bool, Sequence[str]]]
+"""
+The joined objects to query, for example ``["host.name", "host.state"]`` for
+services, or ``True`` for all supported joins.
+"""
+
 RequestMethod = Literal["GET", "OPTIONS", "HEAD", "POST", "PUT", "PATCH", "DELETE"]
 """
 https://github.com/psf/requests/blob/a3ce6f007597f14029e6b6f54676c34196aa050e/src/requests/api.py#L17
@@ -394,11 +400,31 @@ class ConfigObject:
     :see: `lib/base/configobject.ti L57-L92 <https://github.com/Icinga/icinga2/blob/2c9117b4f71e00b2072e7dbe6c4ea4e48c882a87/lib/base/configobject.ti#L57-L92>`__
     """
 
-    name: Optional[str] = None
-    """:see: `lib/base/configobject.ti L59-L68 <https://github.com/Icinga/icinga2/blob/2c9117b4f71e00b2072e7dbe6c4ea4e48c882a87/lib/base/configobject.ti#L59-L68>`__"""
+    name: Optional[str] = Field(
+        default=None, validation_alias=AliasChoices("__name", "name")
+    )
+    """
+    The full object name, for example ``example.localdomain!ping4``.
+
+    The API returns the full name in the attribute ``__name``.
+
+    :see: `lib/base/configobject.ti L59-L68 <https://github.com/Icinga/icinga2/blob/2c9117b4f71e00b2072e7dbe6c4ea4e48c882a87/lib/base/configobject.ti#L59-L68>`__"""
+
+    short_name: Optional[str] = Field(default=None, validation_alias="name", repr=False)
+    """
+    The short object name, for example ``ping4`` for the service
+    ``example.localdomain!ping4``. The API returns it in the attribute ``name``.
+    """
 
     type: Optional[str] = None
 
+    joins: Optional[dict[str, Any]] = Field(default=None, repr=False)
+    """
+    The joined objects if they were requested with the parameter ``joins``, for
+    example ``{"host": {"name": "Host1", "state": 0.0}}`` for a service. This is
+    not an Icinga attribute.
+    """
+
     zone: OptionalStr = None
     """:see: `lib/base/configobject.ti L69 <https://github.com/Icinga/icinga2/blob/2c9117b4f71e00b2072e7dbe6c4ea4e48c882a87/lib/base/configobject.ti#L69>`__"""
 
@@ -1655,7 +1681,9 @@ class Zone(ConfigObject):
 
     all_parents: Optional[Sequence[str]] = None
 
-    is_global: Optional[bool] = None
+    is_global: Optional[bool] = Field(
+        default=None, validation_alias=AliasChoices("global", "is_global")
+    )
     """Optional. Whether configuration files for this zone should be synced to all endpoints. Defaults to false."""
 
 
@@ -1665,14 +1693,51 @@ class Zone(ConfigObject):
 
 
 @dataclass(config={"extra": "forbid"})
-class Comment:
+class Comment(ConfigObject):
     """
+    Comments created at runtime are represented as objects. You can create
+    comments with the add-comment API action.
+
     .. tags:: Object type, Runtime object type
+
+    :see: `doc/09-object-types/#comment <https://icinga.com/docs/icinga-2/latest/doc/09-object-types/#comment>`__
+    :see: `lib/icinga/comment.ti <https://github.com/Icinga/icinga2/blob/master/lib/icinga/comment.ti>`__
     """
 
+    host_name: Optional[str] = None
+    """Required. The name of the host this comment belongs to."""
+
+    service_name: Optional[str] = None
+    """Optional. The short name of the service this comment belongs to. If
+    omitted, this comment object is treated as host comment."""
+
+    author: Optional[str] = None
+    """Required. The author’s name."""
+
+    text: Optional[str] = None
+    """Required. The comment text."""
+
+    entry_type: Optional[int] = None
+    """``1`` = user, ``2`` = downtime, ``3`` = flapping, ``4`` =
+    acknowledgement."""
+
+    entry_time: Optional[Timestamp] = None
+    """The UNIX timestamp when this comment was added."""
+
+    expire_time: Optional[Timestamp] = None
+    """The comment’s expire time as UNIX timestamp."""
+
+    persistent: Optional[bool] = None
+    """Only evaluated for ``entry_type`` acknowledgement."""
+
+    legacy_id: Optional[int] = None
+
+    removed_by: OptionalStr = None
+    """The API user who removed the comment."""
+
 
 @dataclass(config={"extra": "forbid"})
-class Downtime:
+class Downtime(ConfigObject):
     """
     Downtimes created at runtime are represented as objects. You can create
     downtimes with the schedule-downtime API action.
@@ -1728,6 +1793,34 @@ class Downtime:
     triggers: Optional[Sequence[str]] = None
     """Array of object names"""
 
+    trigger_time: Optional[Timestamp] = None
+    """The UNIX timestamp when the downtime was triggered."""
+
+    triggered_by: OptionalStr = None
+    """The name of the downtime that triggered this downtime."""
+
+    scheduled_by: OptionalStr = None
+    """The name of the ``ScheduledDowntime`` that created this downtime."""
+
+    parent: OptionalStr = None
+    """The name of the parent downtime of a child host or service."""
+
+    legacy_id: Optional[int] = None
+
+    remove_time: Optional[Timestamp] = None
+    """The UNIX timestamp when the downtime was removed."""
+
+    was_cancelled: Optional[bool] = None
+
+    config_owner: OptionalStr = None
+
+    config_owner_hash: OptionalStr = None
+
+    authoritative_zone: OptionalStr = None
+
+    removed_by: OptionalStr = None
+    """The API user who removed the downtime."""
+
 
 ########################################################################################
 # Features
@@ -1892,6 +1985,7 @@ EventStreamType = Literal[
     "Notification",  # Notification events including notified users for hosts and services.
     "AcknowledgementSet",  # Acknowledgement set on hosts and services.
     "AcknowledgementCleared",  # Acknowledgement cleared on hosts and services.
+    "Flapping",  # Flapping started or ended on hosts and services.
     "CommentAdded",  # Comment added for hosts and services.
     "CommentRemoved",  # Comment removed for hosts and services.
     "DowntimeAdded",  # Downtime added for hosts and services.
@@ -1939,6 +2033,30 @@ class EventStreamTypeStateChange:
 
     type: Literal["StateChange"]
 
+    timestamp: Timestamp
+    """Unix timestamp when the event happened."""
+
+    host: str
+    """Host name."""
+
+    state: int
+    """Host or service state."""
+
+    state_type: StateType
+    """Host or service state type."""
+
+    check_result: CheckResult
+    """Serialized CheckResult value type."""
+
+    downtime_depth: float
+    """Amount of active downtimes on the checkable."""
+
+    acknowledgement: bool
+    """Whether the object is acknowledged."""
+
+    service: Optional[str] = None
+    """Service name. Optional if this is a host state change."""
+
 
 @dataclass
 class EventStreamTypeNotification:
@@ -1946,6 +2064,33 @@ class EventStreamTypeNotification:
 
     type: Literal["Notification"]
 
+    timestamp: Timestamp
+    """Unix timestamp when the event happened."""
+
+    host: str
+    """Host name."""
+
+    command: str
+    """NotificationCommand name."""
+
+    users: Sequence[str]
+    """List of notified user names."""
+
+    notification_type: str
+    """Notification type, for example ``PROBLEM`` or ``CUSTOM``."""
+
+    author: str
+    """Notification author (for specific types, e.g. ``CUSTOM``)."""
+
+    text: str
+    """Notification text (for specific types, e.g. ``CUSTOM``)."""
+
+    check_result: Optional[CheckResult] = None
+    """Serialized CheckResult value type."""
+
+    service: Optional[str] = None
+    """Service name. Optional if this is a host notification."""
+
 
 @dataclass
 class EventStreamTypeFlapping:
@@ -1953,6 +2098,33 @@ class EventStreamTypeFlapping:
 
     type: Literal["Flapping"]
 
+    timestamp: Timestamp
+    """Unix timestamp when the event happened."""
+
+    host: str
+    """Host name."""
+
+    state: int
+    """Host or service state."""
+
+    state_type: StateType
+    """Host or service state type."""
+
+    is_flapping: bool
+    """Whether this object is flapping."""
+
+    flapping_current: float
+    """Current flapping value in percent."""
+
+    threshold_low: float
+    """Low threshold in percent."""
+
+    threshold_high: float
+    """High threshold in percent."""
+
+    service: Optional[str] = None
+    """Service name. Optional if this is a host flapping event."""
+
 
 @dataclass
 class EventStreamTypeAcknowledgementSet:
@@ -1960,6 +2132,37 @@ class EventStreamTypeAcknowledgementSet:
 
     type: Literal["AcknowledgementSet"]
 
+    timestamp: Timestamp
+    """Unix timestamp when the event happened."""
+
+    host: str
+    """Host name."""
+
+    state: int
+    """Host or service state."""
+
+    state_type: StateType
+    """Host or service state type."""
+
+    author: str
+    """Acknowledgement author set via acknowledge-problem action."""
+
+    comment: str
+    """Acknowledgement comment set via acknowledge-problem action."""
+
+    acknowledgement_type: int
+    """``0`` = None, ``1`` = Normal, ``2`` = Sticky. ``sticky`` can be passed
+    via the acknowledge-problem action."""
+
+    notify: bool
+    """Notifications were enabled via acknowledge-problem action."""
+
+    expiry: Timestamp
+    """Acknowledgement expire time set via acknowledge-problem action."""
+
+    service: Optional[str] = None
+    """Service name. Optional if this is a host acknowledgement."""
+
 
 @dataclass
 class EventStreamTypeAcknowledgementCleared:
@@ -1967,6 +2170,21 @@ class EventStreamTypeAcknowledgementCleared:
 
     type: Literal["AcknowledgementCleared"]
 
+    timestamp: Timestamp
+    """Unix timestamp when the event happened."""
+
+    host: str
+    """Host name."""
+
+    state: int
+    """Host or service state."""
+
+    state_type: StateType
+    """Host or service state type."""
+
+    service: Optional[str] = None
+    """Service name. Optional if this is a host acknowledgement."""
+
 
 @dataclass
 class _EventStreamTypeComment:
@@ -2028,13 +2246,63 @@ class EventStreamTypeDowntimeTriggered(_EventStreamTypeDowntime):
     type: Literal["DowntimeTriggered"]
 
 
-EventStream = Union[
-    EventStreamTypeCheckResult,
-    EventStreamTypeDowntimeAdded,
-    EventStreamTypeDowntimeStarted,
-    EventStreamTypeDowntimeRemoved,
-    EventStreamTypeDowntimeTriggered,
+@dataclass
+class _EventStreamTypeObject:
+    timestamp: Timestamp
+    """Unix timestamp when the event happened."""
+
+    object_type: str
+    """The type of the object, for example ``Host``."""
+
+    object_name: str
+    """The full name of the object."""
+
+
+@dataclass
+class EventStreamTypeObjectCreated(_EventStreamTypeObject):
+    """https://icinga.com/docs/icinga-2/latest/doc/12-icinga2-api/#event-stream-type-objectcreated"""
+
+    type: Literal["ObjectCreated"]
+
+
+@dataclass
+class EventStreamTypeObjectModified(_EventStreamTypeObject):
+    """https://icinga.com/docs/icinga-2/latest/doc/12-icinga2-api/#event-stream-type-objectmodified"""
+
+    type: Literal["ObjectModified"]
+
+
+@dataclass
+class EventStreamTypeObjectDeleted(_EventStreamTypeObject):
+    """https://icinga.com/docs/icinga-2/latest/doc/12-icinga2-api/#event-stream-type-objectdeleted"""
+
+    type: Literal["ObjectDeleted"]
+
+
+EventStream = Annotated[
+    Union[
+        EventStreamTypeCheckResult,
+        EventStreamTypeStateChange,
+        EventStreamTypeNotification,
+        EventStreamTypeFlapping,
+        EventStreamTypeAcknowledgementSet,
+        EventStreamTypeAcknowledgementCleared,
+        EventStreamTypeCommentAdded,
+        EventStreamTypeCommentRemoved,
+        EventStreamTypeDowntimeAdded,
+        EventStreamTypeDowntimeRemoved,
+        EventStreamTypeDowntimeStarted,
+        EventStreamTypeDowntimeTriggered,
+        EventStreamTypeObjectCreated,
+        EventStreamTypeObjectModified,
+        EventStreamTypeObjectDeleted,
+    ],
+    Field(discriminator="type"),
 ]
+"""
+An event of the event stream. The events are validated as a tagged union:
+the field ``type`` selects the one class an event is validated against.
+"""
 
 
 ########################################################################################
@@ -32,16 +32,33 @@ The Icinga 2 API allows you to manage configuration objects and resources in a s
 programmatic way using HTTP requests.
 """
 
+import copy
+import dataclasses
+import functools
+import threading
+import time
 import urllib
 import urllib.parse
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from importlib.metadata import version as get_version
+from types import TracebackType
 from typing import Any, Generator, Optional, Union
 
+import requests
 from pydantic.dataclasses import dataclass
 
+from pretiac.codec import Codec, get_codec
 from pretiac.config import Config
-from pretiac.exceptions import PretiacException
+from pretiac.deadline import Timeout, bind, split_timeout
+from pretiac.endpoints import EndpointPool, normalize_endpoint
+from pretiac.exceptions import (
+    PretiacCircuitOpenException,
+    PretiacDeadlineExceededException,
+    PretiacException,
+)
+from pretiac.instrumentation import RequestObserver
+from pretiac.log import logger
 from pretiac.object_types import (
     EventStreamType,
     FilterVars,
@@ -54,8 +71,17 @@ from pretiac.object_types import (
 from pretiac.request_handler import (
     RequestHandler,
     State,
+    TransferStats,
+    create_session,
     normalize_state,
 )
+from pretiac.retry import CircuitBreaker, RetryPolicy
+
+
+@functools.cache
+def _get_version() -> str:
+    """Look up the installed version of this library only once per process."""
+    return get_version("pretiac")
 
 
 def assemble_payload(**kwargs: Any) -> Payload:
@@ -97,6 +123,34 @@ class ObjectsUrlEndpoint(RequestHandler):
 
     path_prefix = "objects"
 
+    @staticmethod
+    def _assemble_query(
+        object_type: ObjectTypeName,
+        name: Optional[str] = None,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Optional[Union[bool, Sequence[str]]] = None,
+    ) -> tuple[str, Payload]:
+        url_path = pluralize_to_lower_object_type_name(object_type)
+        if url_path == "dependencys":
+            url_path = "dependencies"
+        if name:
+            url_path += f"/{_normalize_name(name)}"
+
+        payload: Payload = {}
+        if attrs:
+            payload["attrs"] = attrs
+        if filters:
+            payload["filter"] = filters
+        if filter_vars:
+            payload["filter_vars"] = filter_vars
+        if isinstance(joins, bool) and joins:
+            payload["all_joins"] = "1"
+        elif joins:
+            payload["joins"] = joins
+        return url_path, payload
+
     def list(
         self,
         object_type: ObjectTypeName,
@@ -106,6 +160,7 @@ class ObjectsUrlEndpoint(RequestHandler):
         filter_vars: FilterVars = None,
         joins: Optional[Union[bool, Sequence[str]]] = None,
         suppress_exception: Optional[bool] = None,
+        raw: bool = False,
     ) -> Any:
         """
         get object by type or name
@@ -119,6 +174,8 @@ class ObjectsUrlEndpoint(RequestHandler):
         :param filter_vars: variables used in the filters expression
         :param joins: show joined object
         :param suppress_exception: If this parameter is set to ``True``, no exceptions are thrown.
+        :param raw: If set to ``True``, the undecoded JSON response body
+            (``{"results": [...]}``) is returned as bytes.
 
         Get all hosts:
 
@@ -171,31 +228,74 @@ class ObjectsUrlEndpoint(RequestHandler):
         :see: `Icinga2 API documentation: doc/12-icinga2-api/#querying-objects <https://icinga.com/docs/icinga-2/latest/doc/12-icinga2-api/#querying-objects>`__
         """
 
-        url_path = pluralize_to_lower_object_type_name(object_type)
-        if url_path == "dependencys":
-            url_path = "dependencies"
-        if name:
-            url_path += f"/{_normalize_name(name)}"
-
-        payload: Payload = {}
-        if attrs:
-            payload["attrs"] = attrs
-        if filters:
-            payload["filter"] = filters
-        if filter_vars:
-            payload["filter_vars"] = filter_vars
-        if isinstance(joins, bool) and joins:
-            payload["all_joins"] = "1"
-        elif joins:
-            payload["joins"] = joins
+        url_path, payload = self._assemble_query(
+            object_type, name, attrs, filters, filter_vars, joins
+        )
 
         result = self._request(
-            "GET", url_path, payload, suppress_exception=suppress_exception
+            "GET", url_path, payload, suppress_exception=suppress_exception, raw=raw
         )
+        if raw:
+            return result
         if "results" in result:
             return result["results"]
         return result
 
+    def iter(
+        self,
+        object_type: ObjectTypeName,
+        name: Optional[str] = None,
+        attrs: Optional[Sequence[str]] = None,
+        filters: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        joins: Optional[Union[bool, Sequence[str]]] = None,
+        suppress_exception: Optional[bool] = None,
+    ) -> Generator[Any, Any, None]:
+        """
+        Stream the objects of a type one at a time.
+
+        This method accepts the same parameters as :meth:`list`, but the
+        response body is parsed incrementally while it is being received.
+        The peak memory is therefore bounded by a single object instead of
+        the whole inventory.
+
+        .. code-block:: python
+
+            for service in raw_client.objects.iter("Service", joins=True):
+                print(service["name"])
+
+        :param object_type: The type of the object, for example ``Service``,
+            ``Host`` or ``User``.
+        :param name: The full object name, for example ``example.localdomain``
+            or ``example.localdomain!http``.
+        :param attrs: only return these attributes
+        :param filters: filters matched object(s)
+        :param filter_vars: variables used in the filters expression
+        :param joins: show joined object
+        :param suppress_exception: If this parameter is set to ``True``, no exceptions are thrown.
+
+        :returns: The results, for example
+            ``{"attrs": {...}, "joins": {}, "meta": {}, "name": "...", "type": "Host"}``
+        """
+        url_path, payload = self._assemble_query(
+            object_type, name, attrs, filters, filter_vars, joins
+        )
+        stream = self._request(
+            "GET",
+            url_path,
+            payload,
+            stream=True,
+            suppress_exception=suppress_exception,
+        )
+        try:
+            for result in self._get_results_from_stream(
+                stream, transfer=self.raw_client.transfer, codec=self.codec
+            ):
+                yield result
+        finally:
+            # Release the connection back to the pool.
+            stream.close()
+
     def get(
         self,
         object_type: ObjectTypeName,
@@ -401,6 +501,68 @@ class ObjectsUrlEndpoint(RequestHandler):
         )
 
 
+def _get_rate(count: int, seconds: float) -> float:
+    return count / seconds if seconds > 0 else 0.0
+
+
+class ThroughputStats:
+    """
+    Counts the check results sent in bulk, see
+    :meth:`ActionsUrlEndpoint.process_check_results` and
+    :meth:`pretiac.client.Client.send_service_check_results`.
+    """
+
+    batches: int = 0
+    """The number of bulk calls."""
+
+    results: int = 0
+    """The number of check results of all bulk calls."""
+
+    seconds: float = 0.0
+    """The duration of all bulk calls."""
+
+    last_results: int = 0
+    """The number of check results of the last bulk call."""
+
+    last_seconds: float = 0.0
+    """The duration of the last bulk call."""
+
+    __lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+
+    @property
+    def results_per_second(self) -> float:
+        """The check results per second of all bulk calls."""
+        return _get_rate(self.results, self.seconds)
+
+    @property
+    def last_results_per_second(self) -> float:
+        """The check results per second of the last bulk call."""
+        return _get_rate(self.last_results, self.last_seconds)
+
+    def add(self, count: int, seconds: float) -> None:
+        """
+        Count a bulk call.
+
+        :param count: The number of check results.
+        :param seconds: The duration of the call.
+        """
+        with self.__lock:
+            self.batches += 1
+            self.results += count
+            self.seconds += seconds
+            self.last_results = count
+            self.last_seconds = seconds
+        logger.info(
+            "Sent %s check results in %.3fs (%.0f/s)",
+            count,
+            seconds,
+            _get_rate(count, seconds),
+        )
+
+
 class ActionsUrlEndpoint(RequestHandler):
     """
     Connects to the URL endpoint ``actions`` of the Icinga2 API.
@@ -520,6 +682,54 @@ class ActionsUrlEndpoint(RequestHandler):
             suppress_exception=suppress_exception,
         )
 
+    def process_check_results(
+        self,
+        results: Iterable[Payload],
+        concurrency: Optional[int] = None,
+        suppress_exception: Optional[bool] = None,
+    ) -> list[Any]:
+        """Process many check results concurrently over the connection pool.
+
+        :param results: The check results, each one a dictionary with the
+            parameters of :meth:`process_check_result`, for example
+            ``{"type": "Service", "name": "host!ping4", "exit_status": 0,
+            "plugin_output": "PING OK"}``.
+        :param concurrency: The maximum number of concurrent requests
+            (defaults to the size of the connection pool, see
+            :attr:`pretiac.config.Config.pool_maxsize`).
+        :param suppress_exception: If this parameter is set to ``True``, no
+            exceptions are thrown. A request that failed without a response,
+            for example because the connection was refused, is reported as
+            ``{"error": 503, "status": "..."}``.
+
+        :returns: The responses as json, in the order of ``results``. The
+            throughput is counted in :attr:`RawClient.throughput`.
+        """
+        if concurrency is None:
+            concurrency = self.pool_maxsize
+
+        def process(result: Payload) -> Any:
+            try:
+                return self.process_check_result(
+                    **result, suppress_exception=suppress_exception
+                )
+            except (
+                requests.RequestException,
+                PretiacCircuitOpenException,
+                PretiacDeadlineExceededException,
+            ) as e:
+                if suppress_exception:
+                    return {"error": 503, "status": str(e)}
+                raise
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=max(concurrency, 1), thread_name_prefix="pretiac-actions"
+        ) as executor:
+            responses = list(executor.map(bind(process), results))
+        self.raw_client.throughput.add(len(responses), time.perf_counter() - start)
+        return responses
+
     def reschedule_check(
         self,
         object_type: HostOrService,
@@ -1001,6 +1211,8 @@ class EventsUrlEndpoint(RequestHandler):
         queue: str,
         filter: Optional[str] = None,
         filter_vars: FilterVars = None,
+        timeout: Optional[Timeout] = None,
+        decode: bool = True,
     ) -> Generator[str | Any, Any, None]:
         """
         Subscribe to an event stream.
@@ -1036,21 +1248,65 @@ class EventsUrlEndpoint(RequestHandler):
         :param filter: Filter for specific event attributes using
             filter expressions.
         :param filter_vars: variables used in the filters expression
+        :param timeout: The connect and read timeouts in seconds. By default
+            the configured connect timeout is used and the stream waits
+            forever for the next event.
+        :param decode: Whether to decode the events. If ``False``, the raw
+            JSON lines are yielded as bytes, for example to record them
+            (:class:`pretiac.event_recording.EventRecorder`).
 
         :returns: the events
 
         :see: `Icinga2 API documentation: doc/12-icinga2-api/#event-streams <https://icinga.com/docs/icinga-2/latest/doc/12-icinga2-api/#event-streams>`__
         """
-        stream = self._request(
+        yield from self.read(
+            self.open(types, queue, filter, filter_vars, timeout), decode
+        )
+
+    def open(
+        self,
+        types: Sequence[EventStreamType],
+        queue: str,
+        filter: Optional[str] = None,
+        filter_vars: FilterVars = None,
+        timeout: Optional[Timeout] = None,
+    ) -> requests.Response:
+        """
+        Subscribe to an event stream and return the streamed response as soon
+        as Icinga accepted the subscription, without waiting for an event.
+        Read the events with :meth:`read`.
+
+        This allows to take a snapshot after subscribing, so that no event is
+        lost in between. See :meth:`subscribe` for the parameters.
+        """
+        return self._request(
             "POST",
             None,
             assemble_payload(
                 types=types, queue=queue, filter=filter, filter_vars=filter_vars
             ),
             stream=True,
+            timeout=timeout if timeout is not None else (self.timeout[0], None),
         )
-        for event in self._get_message_from_stream(stream):
-            yield event
+
+    def read(
+        self, stream: requests.Response, decode: bool = True
+    ) -> Generator[Any, Any, None]:
+        """
+        Read the events of a stream opened by :meth:`open` and close it
+        afterwards.
+
+        :param stream: The streamed response.
+        :param decode: Whether to decode the events.
+        """
+        try:
+            for event in self._get_message_from_stream(
+                stream, self.codec, self.raw_client.transfer, decode
+            ):
+                yield event
+        finally:
+            # Release the connection back to the pool.
+            stream.close()
 
 
 class StatusUrlEndpoint(RequestHandler):
@@ -1438,14 +1694,62 @@ class RawClient:
             ca_file="/etc/ssl/certs/my_ca.crt",
         )
 
+    All URL endpoints share one keep-alive connection pool. Close the pool
+    explicitly or use the client as a context manager:
+
+    .. code-block:: python
+
+        with RawClient(config) as raw_client:
+            raw_client.objects.list("Host")
+
     """
 
     __config: Config
 
     url: str
+    """The base URL of the first API endpoint."""
 
     version: str
 
+    session: requests.Session
+    """
+    The HTTP session with a keep-alive connection pool that is shared by all URL
+    endpoints.
+    """
+
+    codec: Codec
+    """The JSON codec for the request and response bodies."""
+
+    observers: list[RequestObserver]
+    """
+    The observers notified about every request (see
+    :mod:`pretiac.instrumentation`).
+    """
+
+    transfer: TransferStats
+    """
+    The number of response bytes on the wire and after decompression,
+    counted for all URL endpoints.
+    """
+
+    throughput: ThroughputStats
+    """
+    The number of check results sent in bulk and the time needed, see
+    :meth:`pretiac.client.Client.send_service_check_results`.
+    """
+
+    endpoints: EndpointPool
+    """
+    The API endpoints with their health, shared by all URL endpoints (see
+    :mod:`pretiac.endpoints`).
+    """
+
+    circuit_breaker: CircuitBreaker
+    """
+    Fails fast after repeated failures of the API endpoint, shared by all URL
+    endpoints.
+    """
+
     # Order as in https://icinga.com/docs/icinga-2/latest/doc/12-icinga2-api/
 
     objects: ObjectsUrlEndpoint
@@ -1483,10 +1787,50 @@ class RawClient:
         """
         self.__config = config
 
-        self.url = f"https://{self.__config.api_endpoint_host}:{self.__config.api_endpoint_port}"
+        self.version = _get_version()
+
+        self.session = create_session(self.__config, self.version)
+
+        self.codec = get_codec(self.__config.json_codec)
+
+        self.transfer = TransferStats()
 
-        self.version = get_version("pretiac")
+        self.throughput = ThroughputStats()
 
+        self.observers = []
+
+        port = self.__config.api_endpoint_port or 5665
+        urls = [
+            normalize_endpoint(endpoint, port)
+            for endpoint in [self.__config.api_endpoint_host]
+            + list(self.__config.api_endpoints or [])
+            if endpoint is not None
+        ]
+        self.endpoints = EndpointPool(
+            urls,
+            probe_interval=self.__config.endpoint_probe_interval
+            if self.__config.endpoint_probe_interval is not None
+            else 10,
+            probe=self.__probe if len(urls) > 1 else None,
+        )
+        self.url = (
+            urls[0]
+            if urls
+            else f"https://{self.__config.api_endpoint_host}:{self.__config.api_endpoint_port}"
+        )
+
+        self.circuit_breaker = CircuitBreaker(
+            threshold=self.__config.circuit_breaker_threshold
+            if self.__config.circuit_breaker_threshold is not None
+            else 5,
+            reset_timeout=self.__config.circuit_breaker_reset_timeout
+            if self.__config.circuit_breaker_reset_timeout is not None
+            else 30,
+        )
+
+        self.__create_url_endpoints()
+
+    def __create_url_endpoints(self) -> None:
         self.objects = ObjectsUrlEndpoint(self)
         self.actions = ActionsUrlEndpoint(self)
         self.events = EventsUrlEndpoint(self)
@@ -1499,3 +1843,75 @@ class RawClient:
 
     def get_client_config(self) -> Config:
         return self.__config
+
+    def add_observer(self, observer: RequestObserver) -> None:
+        """
+        Notify an observer about every request, for example a
+        :class:`pretiac.metrics.MetricsCollector`.
+        """
+        self.observers.append(observer)
+
+    def remove_observer(self, observer: RequestObserver) -> None:
+        self.observers.remove(observer)
+
+    def __probe(self, url: str) -> bool:
+        """Check if the API endpoint with the given base URL answers."""
+        try:
+            # Verified like the other requests (see RequestHandler._request).
+            response = self.session.get(
+                f"{url}/v1/status/IcingaApplication",
+                timeout=self.status.timeout,
+                verify=self.__config.ca_certificate or False,
+            )
+        except requests.RequestException:
+            return False
+        response.close()
+        return response.status_code < 500
+
+    def with_options(
+        self,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> "RawClient":
+        """
+        Get a copy of this client with different options. The copy shares the
+        connection pool and the circuit breaker with this client.
+
+        .. code-block:: python
+
+            raw_client.with_options(retry_policy=RetryPolicy(attempts=1)).objects.list(
+                "Host"
+            )
+            raw_client.with_options(timeout=(3, 120)).objects.list("Service")
+
+        :param retry_policy: Which requests are retried how often.
+        :param timeout: The connect and read timeouts in seconds, a single
+            value for both or a tuple ``(connect, read)``. ``None`` in the
+            tuple waits forever.
+        """
+        raw_client = copy.copy(self)
+        config = dataclasses.replace(self.__config)
+        if retry_policy is not None:
+            config.retry_policy = retry_policy
+        if timeout is not None:
+            connect, read = split_timeout(timeout)
+            config.connect_timeout = connect or 0
+            config.read_timeout = read or 0
+        raw_client.__config = config
+        raw_client.__create_url_endpoints()
+        return raw_client
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+    def __enter__(self) -> "RawClient":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -31,20 +31,35 @@ endpoint classes, for example the class ``Events`` handles the ``v1/events`` end
 the class ``Objects`` handles the ``v1/objects`` entpoint and so on...
 """
 
-import json
+import codecs
+import re
+import threading
+import time
 from typing import (
     TYPE_CHECKING,
     Any,
     Generator,
+    Iterator,
     Optional,
 )
 from urllib.parse import urljoin
 
 import requests
 import urllib3
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
 
+from pretiac.codec import Codec, get_codec
 from pretiac.config import Config
+from pretiac.deadline import Timeout, get_remaining, limit_timeout, split_timeout
 from pretiac.exceptions import PretiacException, PretiacRequestException
+from pretiac.instrumentation import (
+    RequestInfo,
+    TimedHTTPSConnectionPool,
+    get_connection_timings,
+    get_url_template,
+)
+from pretiac.log import logger
 from pretiac.object_types import (
     HostState,
     Payload,
@@ -52,6 +67,7 @@ from pretiac.object_types import (
     ServiceState,
     State,
 )
+from pretiac.retry import RetryPolicy, is_not_sent, should_retry
 
 if TYPE_CHECKING:
     from pretiac.raw_client import RawClient
@@ -59,6 +75,241 @@ if TYPE_CHECKING:
 # https://stackoverflow.com/a/28002687
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+_WHITESPACE = " \t\n\r"
+
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+_SCALAR_END = re.compile(r"[,\]\s]")
+
+_RESULTS = re.compile(r'"results"\s*:\s*\[')
+
+
+class _ValueScanner:
+    """
+    Find the end of a JSON value in a growing buffer. The scan continues
+    where the previous call stopped, so every character is examined once,
+    however many chunks a large value spans. The value starts at the
+    given index.
+    """
+
+    index: int = 0
+
+    depth: int = 0
+
+    in_string: bool = False
+
+    def __init__(self, index: int = 0) -> None:
+        self.index = index
+
+    def find_end(self, buffer: str) -> Optional[int]:
+        """
+        :returns: The index after the value, ``None`` if the value is not
+            complete yet.
+        """
+        if self.depth == 0 and not self.in_string:
+            first = buffer[self.index]
+            if first not in '{["':
+                match = _SCALAR_END.search(buffer, self.index)
+                return match.start() if match else None
+        while True:
+            if self.in_string:
+                match = _STRING_SPECIAL.search(buffer, self.index)
+                if match is None:
+                    self.index = len(buffer)
+                    return None
+                if match.group() == "\\":
+                    if match.end() >= len(buffer):
+                        # The escaped character has not arrived yet.
+                        self.index = match.start()
+                        return None
+                    self.index = match.end() + 1
+                    continue
+                self.index = match.end()
+                self.in_string = False
+                if self.depth == 0:
+                    return self.index
+                continue
+            match = _STRUCTURAL.search(buffer, self.index)
+            if match is None:
+                self.index = len(buffer)
+                return None
+            self.index = match.end()
+            char = match.group()
+            if char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth <= 0:
+                    return self.index
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+"""The retry policy used if none is configured."""
+
+DEFAULT_CONNECT_TIMEOUT = 10
+"""The connect timeout in seconds used if none is configured."""
+
+DEFAULT_READ_TIMEOUT = 60
+"""The read timeout in seconds used if none is configured."""
+
+
+def get_wire_bytes(response: requests.Response, decoded_bytes: int) -> int:
+    """
+    The number of bytes of a response body received over the wire.
+
+    :param response: A response whose body has been read.
+    :param decoded_bytes: The size of the decoded body, returned if the
+        number of bytes on the wire is unknown.
+    """
+    tell = getattr(getattr(response, "raw", None), "tell", None)
+    return tell() if callable(tell) else decoded_bytes
+
+
+class TransferStats:
+    """
+    Counts the bytes of the response bodies as transferred over the wire
+    (compressed if the API endpoint or a proxy compressed them) and after
+    decoding.
+    """
+
+    responses: int = 0
+    """The number of response bodies read."""
+
+    wire_bytes: int = 0
+    """The number of bytes received over the wire."""
+
+    decoded_bytes: int = 0
+    """The number of bytes after decompression."""
+
+    __lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+
+    @property
+    def compression_ratio(self) -> float:
+        """The number of decoded bytes per byte on the wire."""
+        if not self.wire_bytes:
+            return 1.0
+        return self.decoded_bytes / self.wire_bytes
+
+    def add(self, response: requests.Response, decoded_bytes: int) -> None:
+        """
+        Count a response body that has been read.
+
+        :param response: The response.
+        :param decoded_bytes: The size of the decoded body.
+        """
+        wire_bytes = get_wire_bytes(response, decoded_bytes)
+        with self.__lock:
+            self.responses += 1
+            self.wire_bytes += wire_bytes
+            self.decoded_bytes += decoded_bytes
+
+
+def _count_chunks(
+    stream: requests.Response,
+    chunks: Iterator[bytes],
+    transfer: Optional[TransferStats],
+) -> Iterator[bytes]:
+    """Count the decoded chunks of a streamed response body."""
+    decoded_bytes = 0
+    try:
+        for chunk in chunks:
+            decoded_bytes += len(chunk)
+            yield chunk
+    finally:
+        if transfer is not None:
+            transfer.add(stream, decoded_bytes)
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """Measures the connect and TLS handshake of new connections."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            **self.poolmanager.pool_classes_by_scheme,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+def create_session(config: Config, version: str) -> requests.Session:
+    """
+    Create a session object with a keep-alive connection pool.
+
+    The session is created once per :class:`pretiac.raw_client.RawClient`
+    and shared by all URL endpoints, so TCP connections and TLS sessions to
+    the API endpoint are reused across requests.
+
+    :param config: The client configuration.
+    :param version: The version of this library, used in the ``User-Agent``
+        header.
+    """
+    session = requests.Session()
+    adapter = _TimedHTTPAdapter(
+        pool_connections=config.pool_connections
+        if config.pool_connections is not None
+        else DEFAULT_POOLSIZE,
+        pool_maxsize=config.pool_maxsize
+        if config.pool_maxsize is not None
+        else DEFAULT_POOLSIZE,
+    )
+    session.mount("https://", adapter)
+    # prefer certificate authentification
+    if config.client_certificate and config.client_private_key:
+        # The certificate and RSA private key are in different files.
+        session.cert = (
+            config.client_certificate,
+            config.client_private_key,
+        )
+    elif config.client_certificate:
+        # The certificate and RSA private key are in the same file.
+        session.cert = config.client_certificate
+    elif config.http_basic_username and config.http_basic_password:
+        # use username and password
+        session.auth = (
+            config.http_basic_username,
+            config.http_basic_password,
+        )
+    if config.ca_certificate:
+        session.verify = config.ca_certificate
+    else:
+        session.verify = False
+    session.headers.update(
+        {
+            "User-Agent": f"Python-pretiac/{version}",
+            "Accept": "application/json",
+            # requests decompresses the bodies transparently, also while
+            # streaming.
+            "Accept-Encoding": DEFAULT_ACCEPT_ENCODING
+            if config.compression is not False
+            else "identity",
+        }
+    )
+    return session
+
+
+def _measure(info: RequestInfo, response: requests.Response) -> None:
+    """Record the status and the timings of the response headers."""
+    info.status = response.status_code
+    info.dns_seconds, info.connect_seconds, info.tls_seconds = get_connection_timings(
+        getattr(response, "raw", None)
+    )
+    elapsed = getattr(response, "elapsed", None)
+    if elapsed is not None:
+        info.server_seconds = max(
+            elapsed.total_seconds()
+            - (info.dns_seconds or 0)
+            - (info.connect_seconds or 0)
+            - (info.tls_seconds or 0),
+            0,
+        )
+
 
 def normalize_state(state: State | Any) -> int:
     if isinstance(state, ServiceState) or isinstance(state, HostState):
@@ -100,35 +351,33 @@ class RequestHandler:
     def config(self) -> Config:
         return self.raw_client.get_client_config()
 
-    def __create_session(self, method: RequestMethod = "POST") -> requests.Session:
+    @property
+    def codec(self) -> Codec:
+        """The JSON codec of the client (see :mod:`pretiac.codec`)."""
+        return self.raw_client.codec
+
+    @property
+    def pool_maxsize(self) -> int:
         """
-        Create a session object.
+        The number of connections kept open to the API endpoint, a sensible
+        upper bound for the number of concurrent requests.
         """
+        if self.config.pool_maxsize is not None:
+            return self.config.pool_maxsize
+        return DEFAULT_POOLSIZE
 
-        session = requests.Session()
-        # prefer certificate authentification
-        if self.config.client_certificate and self.config.client_private_key:
-            # The certificate and RSA private key are in different files.
-            session.cert = (
-                self.config.client_certificate,
-                self.config.client_private_key,
-            )
-        elif self.config.client_certificate:
-            # The certificate and RSA private key are in the same file.
-            session.cert = self.config.client_certificate
-        elif self.config.http_basic_username and self.config.http_basic_password:
-            # use username and password
-            session.auth = (
-                self.config.http_basic_username,
-                self.config.http_basic_password,
-            )
-        session.headers = {
-            "User-Agent": f"Python-pretiac/{self.raw_client.version}",
-            "X-HTTP-Method-Override": method.upper(),
-            "Accept": "application/json",
-        }
-
-        return session
+    @property
+    def timeout(self) -> tuple[Optional[float], Optional[float]]:
+        """
+        The configured connect and read timeouts in seconds, ``None`` waits
+        forever.
+        """
+        connect = self.config.connect_timeout
+        read = self.config.read_timeout
+        return (
+            (connect if connect is not None else DEFAULT_CONNECT_TIMEOUT) or None,
+            (read if read is not None else DEFAULT_READ_TIMEOUT) or None,
+        )
 
     def __throw_exception(self, suppress_exception: Optional[bool] = None) -> bool:
         if isinstance(suppress_exception, bool):
@@ -145,6 +394,9 @@ class RequestHandler:
         stream: bool = False,
         plain: bool = False,
         suppress_exception: Optional[bool] = None,
+        raw: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
     ) -> Any:
         """
         make the request and return the body
@@ -160,67 +412,338 @@ class RequestHandler:
             UTF-8 string and is not parsed as JSON.
         :param suppress_exception: If this parameter is set to ``True``, no
             exceptions are thrown.
-
-        :returns: The response decoded JSON object or a plain string or a
-            :class:`requests.Response` object
+        :param raw: If set to ``True`` the undecoded response body is returned
+            as bytes.
+        :param retry_policy: Overrides the retry policy of the configuration
+            (:attr:`pretiac.config.Config.retry_policy`) for this request.
+        :param timeout: Overrides the configured timeouts
+            (:attr:`pretiac.config.Config.connect_timeout`,
+            :attr:`pretiac.config.Config.read_timeout`) for this request.
+
+        :returns: The response decoded JSON object or a plain string, the raw
+            bytes or a :class:`requests.Response` object
         """
 
-        request_url = urljoin(
-            self.raw_client.url,
+        url_path = (
             self.versioned_path_prefix
             if url_relpath is None
-            else f"{self.versioned_path_prefix}/{url_relpath}",
+            else f"{self.versioned_path_prefix}/{url_relpath}"
         )
 
-        # create session
-        session = self.__create_session(method)
-
+        headers: dict[str, str] = {"X-HTTP-Method-Override": method.upper()}
         if plain:
-            session.headers["Accept"] = "application/octet-stream"
+            headers["Accept"] = "application/octet-stream"
 
         # create arguments for the request
-        request_args: Payload = {"url": request_url}
+        # Passed per request: requests lets the environment variables
+        # REQUESTS_CA_BUNDLE and CURL_CA_BUNDLE override the verification
+        # setting of the session, but not of the request.
+        request_args: Payload = {
+            "headers": headers,
+            "verify": self.config.ca_certificate or False,
+        }
         if payload:
-            request_args["json"] = payload
-        if self.config.ca_certificate:
-            request_args["verify"] = self.config.ca_certificate
-        else:
-            request_args["verify"] = False
+            headers["Content-Type"] = "application/json"
+            request_args["data"] = self.codec.dumps(payload)
         if stream:
             request_args["stream"] = True
 
-        # do the request
-        response: requests.Response = session.post(**request_args)
-
-        if not stream:
-            session.close()
-
-        if (
-            self.__throw_exception(suppress_exception)
-            and not 200 <= response.status_code <= 299
-        ):
-            raise PretiacRequestException(
-                f'Request "{response.url}" failed with status {response.status_code}: {response.text}',
-                response.json(),
+        info: Optional[RequestInfo] = None
+        if self.raw_client.observers:
+            info = RequestInfo(
+                method,
+                self.path_prefix or "",
+                get_url_template(url_path),
+                len(request_args.get("data", b"")),
+            )
+            self.__notify("before_request", info)
+        start = time.perf_counter()
+
+        try:
+            response = self.__send(
+                method,
+                url_path,
+                request_args,
+                retry_policy,
+                split_timeout(timeout) if timeout is not None else self.timeout,
+                info,
             )
+        except Exception as error:
+            if info is not None:
+                info.total_seconds = time.perf_counter() - start
+                self.__notify("on_error", info, error)
+            raise
+        if info is not None:
+            _measure(info, response)
+
+        if not 200 <= response.status_code <= 299:
+            if self.__throw_exception(suppress_exception):
+                exception = PretiacRequestException(
+                    f'Request "{response.url}" failed with status {response.status_code}: {response.text}',
+                    self.codec.loads(response.content),
+                )
+                if info is not None:
+                    info.response_bytes = get_wire_bytes(
+                        response, len(response.content)
+                    )
+                    info.total_seconds = time.perf_counter() - start
+                    self.__notify("after_response", info)
+                raise exception
+            if info is not None:
+                info.suppressed = True
 
         if stream:
+            if info is not None:
+                info.total_seconds = time.perf_counter() - start
+                self.__notify("after_response", info)
             return response
+        parse_start = time.perf_counter()
+        content = response.content
+        self.raw_client.transfer.add(response, len(content))
+        result: Any
+        if raw:
+            result = content
         elif plain:
-            return response.text
+            result = response.text
         else:
-            return response.json()
+            result = self.codec.loads(content)
+        if info is not None:
+            end = time.perf_counter()
+            info.parse_seconds = end - parse_start
+            info.response_bytes = get_wire_bytes(response, len(content))
+            info.total_seconds = end - start
+            self.__notify("after_response", info)
+        return result
+
+    def __notify(self, hook: str, *args: Any) -> None:
+        for observer in self.raw_client.observers:
+            try:
+                getattr(observer, hook)(*args)
+            except Exception as e:
+                logger.info("The request observer %r failed: %s", observer, e)
+
+    def __send(
+        self,
+        method: RequestMethod,
+        url_path: str,
+        request_args: Payload,
+        retry_policy: Optional[RetryPolicy],
+        timeout: tuple[Optional[float], Optional[float]],
+        info: Optional[RequestInfo] = None,
+    ) -> requests.Response:
+        """
+        Send the request using the shared connection pool, retry it according
+        to the retry policy and keep the circuit breaker up to date. The
+        timeouts and retries are bounded by the current deadline.
+        """
+        if retry_policy is None:
+            retry_policy = self.config.retry_policy or DEFAULT_RETRY_POLICY
+        breaker = self.raw_client.circuit_breaker
+        attempt = 0
+        idempotent = retry_policy.is_idempotent(method, url_path)
+        while True:
+            attempt += 1
+            if info is not None:
+                info.attempts = attempt
+            probe = breaker.before_request()
+            try:
+                response = self.__send_to_endpoints(
+                    method, url_path, request_args, timeout, idempotent, info
+                )
+            except requests.RequestException as error:
+                breaker.record_failure()
+                if not should_retry(
+                    retry_policy, method, url_path, attempt, error=error
+                ):
+                    raise
+                delay = retry_policy.get_delay(attempt)
+                reason = str(error)
+                remaining = get_remaining()
+                if remaining is not None and delay >= remaining:
+                    raise
+            except BaseException:
+                # Neither a success nor a failure of the API endpoint, for
+                # example an exceeded deadline or a KeyboardInterrupt.
+                if probe:
+                    breaker.release_probe()
+                raise
+            else:
+                if response.status_code in retry_policy.statuses:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if not should_retry(
+                    retry_policy, method, url_path, attempt, status=response.status_code
+                ):
+                    return response
+                delay = retry_policy.get_delay(
+                    attempt, response.headers.get("Retry-After")
+                )
+                reason = f"status {response.status_code}"
+                remaining = get_remaining()
+                if remaining is not None and delay >= remaining:
+                    return response
+                response.close()
+            logger.info(
+                "Retry %s %s in %.2fs (attempt %s failed: %s)",
+                method,
+                url_path,
+                delay,
+                attempt,
+                reason,
+            )
+            time.sleep(delay)
+
+    def __send_to_endpoints(
+        self,
+        method: RequestMethod,
+        url_path: str,
+        request_args: Payload,
+        timeout: tuple[Optional[float], Optional[float]],
+        idempotent: bool,
+        info: Optional[RequestInfo] = None,
+    ) -> requests.Response:
+        """
+        Send the request to the API endpoints one after the other until one
+        answers (see :mod:`pretiac.endpoints`).
+        """
+        endpoints = self.raw_client.endpoints
+        candidates = endpoints.get_candidates(read=method == "GET")
+        for index, endpoint in enumerate(candidates):
+            last = index == len(candidates) - 1
+            request_args["url"] = urljoin(endpoint.url, url_path)
+            if info is not None:
+                info.api_endpoint = endpoint.url
+            request_args["timeout"] = limit_timeout(*timeout)
+            try:
+                response: requests.Response = self.raw_client.session.post(
+                    **request_args
+                )
+            except (requests.ConnectionError, requests.Timeout) as error:
+                endpoints.mark_down(endpoint, error)
+                if last or not (idempotent or is_not_sent(error)):
+                    raise
+                continue
+            if response.status_code == 503:
+                # Icinga rejects requests with 503 before processing them,
+                # for example while reloading its configuration.
+                endpoints.mark_down(endpoint, "status 503")
+                if not last:
+                    response.close()
+                    continue
+            else:
+                endpoints.mark_up(endpoint)
+            return response
+        raise PretiacException("No API endpoint configured")
 
     @staticmethod
     def _get_message_from_stream(
         stream: requests.Response,
+        codec: Optional[Codec] = None,
+        transfer: Optional[TransferStats] = None,
+        decode: bool = True,
     ) -> Generator[Any, Any, None]:
         """
         Make the request and return the body.
 
         :param stream: The stream.
+        :param codec: The JSON codec to decode the lines with.
+        :param transfer: Counts the transferred bytes.
+        :param decode: Whether to decode the lines. If ``False``, the raw
+            lines are yielded as bytes.
 
         :returns: The message.
         """
-        for line in stream.iter_lines():
-            yield json.loads(line)
+        loads = (codec or get_codec()).loads
+        decoded_bytes = 0
+        try:
+            for line in stream.iter_lines():
+                # The line break is stripped.
+                decoded_bytes += len(line) + 1
+                if line:
+                    yield loads(line) if decode else line
+        finally:
+            if transfer is not None:
+                transfer.add(stream, decoded_bytes)
+
+    @staticmethod
+    def _get_results_from_stream(
+        stream: requests.Response,
+        chunk_size: int = 65536,
+        transfer: Optional[TransferStats] = None,
+        codec: Optional[Codec] = None,
+    ) -> Generator[Any, Any, None]:
+        """
+        Parse the ``results`` list of a response body like
+        ``{"results": [{...}, {...}]}`` incrementally and yield one result at
+        a time.
+
+        Only the current chunk and the result that is being parsed are kept
+        in memory, not the whole response body.
+
+        :param stream: The streamed response.
+        :param chunk_size: The number of bytes to read at once.
+        :param transfer: Counts the transferred bytes.
+        :param codec: The JSON codec to decode the results with.
+
+        :returns: The results one by one.
+        """
+        loads = (codec or get_codec()).loads
+        chunks = _count_chunks(
+            stream, stream.iter_content(chunk_size=chunk_size), transfer
+        )
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buffer = ""
+        # The index of the first character that has not been consumed yet.
+        start = 0
+        scanner: Optional[_ValueScanner] = None
+        exhausted = False
+
+        def read() -> bool:
+            nonlocal buffer, start, exhausted
+            if exhausted:
+                return False
+            try:
+                text = decoder.decode(next(chunks))
+            except StopIteration:
+                text = decoder.decode(b"", final=True)
+                exhausted = True
+            # Drop the consumed part once per chunk, not once per result.
+            if scanner is not None:
+                scanner.index -= start
+            buffer = buffer[start:] + text
+            start = 0
+            return True
+
+        # Skip everything up to the opening bracket of the results list.
+        match = _RESULTS.search(buffer)
+        while match is None:
+            if not read():
+                return
+            match = _RESULTS.search(buffer)
+        start = match.end()
+
+        while True:
+            while start < len(buffer) and buffer[start] in _WHITESPACE + ",":
+                start += 1
+            if start == len(buffer):
+                if not read():
+                    raise PretiacException("Unexpected end of the results list")
+                continue
+            if buffer[start] == "]":
+                return
+            scanner = _ValueScanner(start)
+            end = scanner.find_end(buffer)
+            while end is None:
+                if not read():
+                    raise PretiacException("Unexpected end of the results list")
+                end = scanner.find_end(buffer)
+            scanner = None
+            try:
+                result = loads(buffer[start:end])
+            except ValueError as error:
+                raise PretiacException(
+                    f"Invalid result in the results list: {error}"
+                ) from error
+            start = end
+            yield result
@@ -0,0 +1,259 @@
+"""
+Retries with exponential backoff and a circuit breaker for the requests to the
+API endpoint.
+
+Requests are retried if the connection could not be established, if the
+connection broke off or if the API endpoint answered with a temporary error
+like ``503 Service Unavailable``, for example while Icinga reloads its
+configuration. Requests that change something and are not idempotent, for
+example ``actions/process-check-result``, are only retried if they surely did
+not reach Icinga.
+
+The circuit breaker counts consecutive failures. After
+:attr:`pretiac.config.Config.circuit_breaker_threshold` failures all requests
+fail immediately with :class:`pretiac.exceptions.PretiacCircuitOpenException`
+instead of piling up on an API endpoint that is down or overloaded. After
+:attr:`pretiac.config.Config.circuit_breaker_reset_timeout` seconds one probe
+request is let through; if it succeeds, the circuit is closed again.
+
+.. code-block:: yaml
+
+    ---
+    api_endpoint_host: localhost
+    retry_policy:
+      attempts: 5
+      backoff: 1
+    circuit_breaker_threshold: 10
+"""
+
+import random
+import threading
+import time
+from collections.abc import Sequence
+from email.utils import parsedate_to_datetime
+from typing import Literal, Optional
+
+import requests
+import urllib3
+from pydantic.dataclasses import dataclass
+
+from pretiac.exceptions import PretiacCircuitOpenException
+from pretiac.log import logger
+from pretiac.object_types import RequestMethod
+
+
+@dataclass(config={"extra": "forbid"})
+class RetryPolicy:
+    """
+    Which requests are retried how often and how long to wait in between.
+    """
+
+    attempts: int = 3
+    """
+    The maximum number of attempts per request, including the first one.
+    ``1`` disables retries.
+    """
+
+    backoff: float = 0.5
+    """
+    The base of the exponential backoff in seconds: before the ``n``-th
+    retry a random time between ``0`` and ``backoff * 2 ** (n - 1)`` seconds
+    is waited (full jitter).
+    """
+
+    backoff_max: float = 30
+    """The maximum number of seconds to wait before a retry."""
+
+    statuses: Sequence[int] = (429, 502, 503, 504)
+    """
+    The HTTP status codes of temporary errors. The ``Retry-After`` header of
+    these responses is honored.
+    """
+
+    idempotent_methods: Sequence[RequestMethod] = ("GET", "DELETE")
+    """
+    The HTTP methods that are retried after any temporary error, even if
+    the request may have reached Icinga.
+    """
+
+    idempotent_paths: Sequence[str] = ("v1/objects/",)
+    """
+    The URL paths (prefixes) of ``POST`` requests that are idempotent, for
+    example ``v1/objects/`` (setting attributes).
+    """
+
+    def is_idempotent(self, method: RequestMethod, url_path: str) -> bool:
+        """
+        :param method: The HTTP method, for example ``GET``.
+        :param url_path: The URL path, for example ``v1/objects/hosts``.
+        """
+        if method in self.idempotent_methods:
+            return True
+        return method == "POST" and url_path.startswith(tuple(self.idempotent_paths))
+
+    def get_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        The number of seconds to wait before the next attempt.
+
+        :param attempt: The number of the failed attempt, starting with ``1``.
+        :param retry_after: The value of the ``Retry-After`` header.
+        """
+        if retry_after:
+            delay = _parse_retry_after(retry_after)
+            if delay is not None:
+                return min(delay, self.backoff_max)
+        return random.uniform(
+            0, min(self.backoff * 2 ** (attempt - 1), self.backoff_max)
+        )
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_not_sent(error: requests.RequestException) -> bool:
+    """
+    Whether the request surely did not reach the API endpoint, because the
+    connection could not be established.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    # urllib3 wraps the cause in a MaxRetryError.
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+
+def should_retry(
+    policy: RetryPolicy,
+    method: RequestMethod,
+    url_path: str,
+    attempt: int,
+    error: Optional[requests.RequestException] = None,
+    status: Optional[int] = None,
+) -> bool:
+    """
+    Whether a failed request should be sent again.
+
+    :param policy: The retry policy.
+    :param method: The HTTP method, for example ``GET``.
+    :param url_path: The URL path, for example ``v1/objects/hosts``.
+    :param attempt: The number of the failed attempt, starting with ``1``.
+    :param error: The exception raised by the request.
+    :param status: The HTTP status code of the response.
+    """
+    if attempt >= policy.attempts:
+        return False
+    if error is not None:
+        if not isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return False
+        return is_not_sent(error) or policy.is_idempotent(method, url_path)
+    if status is None or status not in policy.statuses:
+        return False
+    # Icinga rejects requests with 503 before processing them.
+    return status == 503 or policy.is_idempotent(method, url_path)
+
+
+CircuitState = Literal["closed", "open", "half-open"]
+
+
+class CircuitBreaker:
+    """
+    Fail fast after repeated failures of the API endpoint.
+
+    :param threshold: The number of consecutive failures that open the
+        circuit. ``0`` disables the circuit breaker.
+    :param reset_timeout: The number of seconds the circuit stays open before
+        a probe request is let through.
+    """
+
+    threshold: int
+
+    reset_timeout: float
+
+    __failures: int = 0
+
+    __opened_at: Optional[float] = None
+
+    __probing: bool = False
+
+    __lock: threading.Lock
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.__lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        if self.__opened_at is None:
+            return "closed"
+        if self.__probing or time.monotonic() >= self.__opened_at + self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_request(self) -> bool:
+        """
+        Raise :class:`pretiac.exceptions.PretiacCircuitOpenException` if the
+        circuit is open.
+
+        :returns: Whether the request is the probe of a half-open circuit.
+            Its outcome has to be recorded or, if it ended without telling
+            anything about the API endpoint, the probe has to be released
+            (:meth:`release_probe`).
+        """
+        if self.threshold <= 0 or self.__opened_at is None:
+            return False
+        with self.__lock:
+            if self.__opened_at is None:
+                return False
+            remaining = self.__opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self.__probing:
+                raise PretiacCircuitOpenException(
+                    f"The API endpoint is unavailable after {self.__failures} "
+                    "failed requests, the circuit breaker is open"
+                    + (f" for {remaining:.1f}s" if remaining > 0 else "")
+                )
+            # Let one probe request through.
+            self.__probing = True
+            return True
+
+    def release_probe(self) -> None:
+        """
+        Let the next request probe again, because the probe ended without
+        an outcome, for example because its deadline was exceeded.
+        """
+        with self.__lock:
+            self.__probing = False
+
+    def record_success(self) -> None:
+        if self.__failures == 0 and self.__opened_at is None:
+            return
+        with self.__lock:
+            if self.__opened_at is not None:
+                logger.info("The circuit breaker is closed again")
+            self.__failures = 0
+            self.__opened_at = None
+            self.__probing = False
+
+    def record_failure(self) -> None:
+        if self.threshold <= 0:
+            return
+        with self.__lock:
+            self.__failures += 1
+            if self.__probing or (
+                self.__opened_at is None and self.__failures >= self.threshold
+            ):
+                logger.info(
+                    "The circuit breaker is open after %s failed requests",
+                    self.__failures,
+                )
+                self.__opened_at = time.monotonic()
+                self.__probing = False
@@ -0,0 +1,412 @@
+"""
+A durable on-disk spool for check results that could not be sent because the
+API endpoint was unreachable, for example while the Icinga master restarts.
+
+The spooled check results are appended to gzip compressed NDJSON segments
+(one JSON object per line) in a directory. Once the API endpoint is
+reachable again, the segments are drained oldest first, in batches and with
+several concurrent requests. ``execution_start`` and ``execution_end`` are
+recorded when a result is spooled, so Icinga sees the time the check was
+actually executed, not the time the result was delivered.
+
+The disk usage is bounded: the oldest segments are evicted when the spool
+grows beyond :attr:`Spool.max_size` and results older than
+:attr:`Spool.max_age` are dropped.
+
+The spool is safe to use from several threads and several processes, for
+example ``pretiac check`` started by cron.
+
+.. code-block:: yaml
+
+    ---
+    api_endpoint_host: localhost
+    spool_directory: /var/spool/pretiac
+"""
+
+import gzip
+import os
+import sys
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+import requests
+
+from pretiac.codec import get_codec
+from pretiac.exceptions import (
+    PretiacCircuitOpenException,
+    PretiacDeadlineExceededException,
+)
+from pretiac.log import logger
+from pretiac.object_types import Payload
+
+if sys.platform == "win32":  # pragma: no cover
+    import msvcrt
+else:
+    import fcntl
+
+if TYPE_CHECKING:
+    from pretiac.client import CheckError, CheckResponse
+
+DEFAULT_MAX_SIZE: int = 64 * 1024 * 1024
+"""The default maximum size of the spool in bytes (64 MiB)."""
+
+DEFAULT_MAX_AGE: float = 24 * 60 * 60
+"""The default number of seconds a check result is kept in the spool (one day)."""
+
+DEFAULT_SEGMENT_SIZE: int = 1024 * 1024
+"""The default size in bytes at which a new segment is started (1 MiB)."""
+
+_SUFFIX = ".ndjson.gz"
+
+_DRAINING_SUFFIX = ".draining"
+
+
+UNREACHABLE_STATUSES: tuple[int, ...] = (502, 503, 504)
+"""
+The HTTP status codes meaning that the API endpoint is temporarily
+unavailable. Other errors, for example a ``500`` for a check result Icinga
+rejects, are not retried from the spool.
+"""
+
+
+def is_unreachable(result: Union["CheckResponse", "CheckError", Exception]) -> bool:
+    """
+    Whether the result of sending a check result means that the API endpoint
+    is (temporarily) unreachable and the check result should be kept.
+
+    :param result: The return value of
+        :meth:`pretiac.client.Client.send_service_check_result` or the
+        exception it raised.
+    """
+    if isinstance(
+        result,
+        (
+            requests.ConnectionError,
+            requests.Timeout,
+            PretiacCircuitOpenException,
+            PretiacDeadlineExceededException,
+        ),
+    ):
+        return True
+    if isinstance(result, requests.HTTPError):
+        response = result.response
+        return response is not None and response.status_code in UNREACHABLE_STATUSES
+    if isinstance(result, Exception):
+        return False
+    return getattr(result, "error", None) in UNREACHABLE_STATUSES
+
+
+def _lock_file(fd: int, blocking: bool) -> bool:
+    """
+    Lock an open file exclusively, with ``flock`` on POSIX systems and
+    ``msvcrt.locking`` on Windows.
+
+    :returns: ``False`` if ``blocking`` is not set and another process holds
+        the lock.
+    """
+    if sys.platform == "win32":  # pragma: no cover
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(0.05)
+    else:
+        try:
+            fcntl.flock(
+                fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            )
+        except BlockingIOError:
+            return False
+        return True
+
+
+def _unlock_file(fd: int) -> None:
+    if sys.platform == "win32":  # pragma: no cover
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class Spool:
+    """
+    A directory of gzip compressed NDJSON segments holding unsent check
+    results.
+
+    :param directory: The directory of the segments. It is created if
+        necessary.
+    :param max_size: The maximum size of all segments in bytes.
+    :param max_age: The number of seconds a check result is kept.
+    :param segment_size: The size in bytes at which a new segment is
+        started.
+    """
+
+    directory: Path
+
+    max_size: int
+
+    max_age: float
+
+    segment_size: int
+
+    __lock: threading.Lock
+
+    __drain_lock: threading.Lock
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_size: Optional[int] = None,
+        max_age: Optional[float] = None,
+        segment_size: Optional[int] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size if max_size is not None else DEFAULT_MAX_SIZE
+        self.max_age = max_age if max_age is not None else DEFAULT_MAX_AGE
+        self.segment_size = (
+            segment_size if segment_size is not None else DEFAULT_SEGMENT_SIZE
+        )
+        self.__lock = threading.Lock()
+        self.__drain_lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def __flock(self, name: str, blocking: bool = True) -> Iterator[bool]:
+        """Lock across processes with a lock file in the spool directory."""
+        with open(self.directory / name, "a") as file:
+            if not _lock_file(file.fileno(), blocking):
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                _unlock_file(file.fileno())
+
+    def __segments(self, suffix: str = _SUFFIX) -> list[Path]:
+        """The segments, oldest first."""
+        return sorted(self.directory.glob(f"*{suffix}"))
+
+    def __new_segment(self) -> Path:
+        return self.directory / f"{time.time_ns():020d}-{os.getpid()}{_SUFFIX}"
+
+    def __write(self, path: Path, records: Sequence[Payload], mode: str) -> None:
+        dumps = get_codec().dumps
+        data = b"".join(dumps(record) + b"\n" for record in records)
+        # Every write appends a complete gzip member, a reader only loses
+        # the last member if the process crashes while writing.
+        with open(path, mode) as file:
+            file.write(gzip.compress(data, mtime=0))
+            file.flush()
+            os.fsync(file.fileno())
+
+    @staticmethod
+    def _read(path: Path) -> list[Payload]:
+        """Read a segment and skip a truncated or corrupt end."""
+        records: list[Payload] = []
+        loads = get_codec().loads
+        try:
+            with gzip.open(path, "rb") as file:
+                for line in file:
+                    records.append(loads(line))
+        except (OSError, EOFError, zlib.error, ValueError) as e:
+            logger.info("Spool segment %s is truncated: %s", path, e)
+        return records
+
+    def __evict(self) -> None:
+        segments = self.__segments()
+        sizes = [segment.stat().st_size for segment in segments]
+        total = sum(sizes)
+        cutoff = time.time() - self.max_age
+        for segment, size in zip(segments, sizes):
+            if total <= self.max_size and segment.stat().st_mtime >= cutoff:
+                break
+            logger.info("Evict the spool segment %s (%s bytes)", segment, size)
+            segment.unlink(missing_ok=True)
+            total -= size
+
+    def append(self, *records: Payload) -> None:
+        """
+        Append check results to the newest segment.
+
+        :param records: The keyword arguments of
+            :meth:`pretiac.client.Client.send_service_check_result`.
+        """
+        now = time.time()
+        for record in records:
+            record.setdefault("execution_end", now)
+            record.setdefault("execution_start", record["execution_end"])
+        with self.__lock, self.__flock(".lock"):
+            segments = self.__segments()
+            if segments and segments[-1].stat().st_size < self.segment_size:
+                segment = segments[-1]
+            else:
+                segment = self.__new_segment()
+            self.__write(segment, records, "ab")
+            self.__evict()
+
+    def pending(self) -> bool:
+        """Whether there are spooled check results."""
+        return bool(self.__segments())
+
+    def size(self) -> int:
+        """The size of all segments in bytes."""
+        return sum(segment.stat().st_size for segment in self.__segments())
+
+    def __claim(self) -> Optional[Path]:
+        """Rename the oldest segment, so that nothing is appended to it anymore."""
+        with self.__lock, self.__flock(".lock"):
+            segments = self.__segments()
+            if not segments:
+                return None
+            claimed = segments[0].with_name(segments[0].name + _DRAINING_SUFFIX)
+            segments[0].rename(claimed)
+            return claimed
+
+    def __release(self, claimed: Path, records: Sequence[Payload]) -> None:
+        """Put the unsent records back as the oldest segment."""
+        with self.__lock, self.__flock(".lock"):
+            if records:
+                path = claimed.with_name(claimed.name[: -len(_DRAINING_SUFFIX)])
+                self.__write(claimed, records, "wb")
+                claimed.rename(path)
+            else:
+                claimed.unlink(missing_ok=True)
+
+    def drain(
+        self,
+        send: Callable[[Payload], Any],
+        batch_size: int = 100,
+        concurrency: int = 4,
+    ) -> int:
+        """
+        Send the spooled check results, oldest first, until the spool is
+        empty or the API endpoint is unreachable again.
+
+        The results of one service are sent one after the other in their
+        original order, different services concurrently. Only one thread or
+        process drains the spool at a time, other calls return immediately.
+
+        :param send: A function sending one check result, returning the
+            result of :meth:`pretiac.client.Client.send_service_check_result`.
+        :param batch_size: The number of check results sent per batch.
+        :param concurrency: The number of concurrent requests.
+
+        :returns: The number of check results sent.
+        """
+        if not self.__drain_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self.__flock(".drain.lock", blocking=False) as locked:
+                if not locked:
+                    return 0
+                # Recover segments of a drain that crashed.
+                for stale in self.__segments(_DRAINING_SUFFIX):
+                    stale.rename(stale.with_name(stale.name[: -len(_DRAINING_SUFFIX)]))
+                sent = 0
+                with ThreadPoolExecutor(
+                    max_workers=concurrency, thread_name_prefix="pretiac-spool"
+                ) as executor:
+                    while True:
+                        claimed = self.__claim()
+                        if claimed is None:
+                            return sent
+                        count, unsent = self.__drain_segment(
+                            claimed, send, batch_size, executor
+                        )
+                        sent += count
+                        self.__release(claimed, unsent)
+                        if unsent:
+                            return sent
+        finally:
+            self.__drain_lock.release()
+
+    def __drain_segment(
+        self,
+        claimed: Path,
+        send: Callable[[Payload], Any],
+        batch_size: int,
+        executor: ThreadPoolExecutor,
+    ) -> tuple[int, list[Payload]]:
+        cutoff = time.time() - self.max_age
+        records = [
+            record
+            for record in self._read(claimed)
+            if record.get("execution_end", 0) >= cutoff
+        ]
+        sent = 0
+        start = 0
+        # The first check result probes alone whether the endpoint is back.
+        size = 1
+        while start < len(records):
+            end = start + size
+            batch = records[start:end]
+            size = batch_size
+            by_service: dict[tuple[Any, Any], list[Payload]] = {}
+            for record in batch:
+                by_service.setdefault(
+                    (record.get("host"), record.get("service")), []
+                ).append(record)
+            unsent: list[Payload] = []
+            for kept in executor.map(
+                lambda group: self.__send_group(group, send), by_service.values()
+            ):
+                unsent.extend(kept)
+            sent += len(batch) - len(unsent)
+            if unsent:
+                unsent.sort(key=lambda record: record.get("execution_end", 0))
+                return sent, unsent + records[end:]
+            start = end
+        return sent, []
+
+    @staticmethod
+    def __send_group(
+        group: Sequence[Payload], send: Callable[[Payload], Any]
+    ) -> list[Payload]:
+        """Send the results of one service in order, return the unsent ones."""
+        for index, record in enumerate(group):
+            try:
+                result = send(dict(record))
+            except Exception as e:
+                result = e
+            if is_unreachable(result):
+                logger.info("The API endpoint is still unreachable: %s", result)
+                return list(group[index:])
+            if isinstance(result, Exception) or getattr(result, "error", None):
+                logger.info("Drop the spooled check result %s: %s", record, result)
+        return []
+
+
+__spools: dict[Path, Spool] = {}
+
+__spools_lock = threading.Lock()
+
+
+def get_spool(
+    directory: Union[str, Path],
+    max_size: Optional[int] = None,
+    max_age: Optional[float] = None,
+) -> Spool:
+    """
+    Get the process-wide spool of a directory.
+
+    :param directory: The directory of the segments.
+    :param max_size: The maximum size of all segments in bytes.
+    :param max_age: The number of seconds a check result is kept.
+    """
+    path = Path(directory).absolute()
+    with __spools_lock:
+        spool = __spools.get(path)
+        if spool is None:
+            spool = Spool(path, max_size=max_size, max_age=max_age)
+            __spools[path] = spool
+        return spool
@@ -0,0 +1,477 @@
+"""
+A local, in-memory mirror of the states of all hosts and services.
+
+The mirror is loaded with one snapshot of all hosts and services and then
+kept current by the event stream of the API (``v1/events``). Lookups like “all
+CRITICAL services in a hard state in the host group ``linux-servers``” are
+answered from in-memory indexes without any API call.
+
+.. code-block:: python
+
+    from pretiac.object_types import ServiceState, StateType
+    from pretiac.state_mirror import StateMirror
+
+    mirror = StateMirror()
+    mirror.start()
+
+    for service in mirror.get_services(
+        state=ServiceState.CRITICAL,
+        state_type=StateType.StateTypeHard,
+        host_group="linux-servers",
+    ):
+        print(service.name)
+"""
+
+import threading
+import time
+import uuid
+from collections.abc import Hashable, Iterable, Iterator, Sequence
+from enum import Enum
+from queue import Empty, Queue
+from typing import Any, Generic, Optional, TypeVar, Union
+
+import requests
+
+from pretiac.client import Client, _get_adapter, _merge_result
+from pretiac.exceptions import PretiacException
+from pretiac.log import logger
+from pretiac.object_types import (
+    CheckResult,
+    EventStreamType,
+    Host,
+    HostOrService,
+    HostState,
+    Payload,
+    Service,
+    ServiceState,
+    StateType,
+)
+
+C = TypeVar("C", Host, Service)
+
+MIRROR_EVENT_TYPES: Sequence[EventStreamType] = (
+    "CheckResult",
+    "StateChange",
+    "AcknowledgementSet",
+    "AcknowledgementCleared",
+    "DowntimeTriggered",
+    "DowntimeRemoved",
+    "ObjectCreated",
+    "ObjectModified",
+    "ObjectDeleted",
+)
+"""The event types the mirror subscribes to."""
+
+
+def _to_int(value: Union[Enum, float, int, None]) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        return int(value.value)
+    return int(value)
+
+
+class _Index(Generic[C]):
+    """
+    The objects of one type, for example all services, and their secondary
+    indexes.
+
+    Every index maps a key, for example the state ``2``, to the set of object
+    names having that key, so a lookup costs only the size of its result.
+    """
+
+    objects: dict[str, C]
+
+    indexes: dict[str, dict[Hashable, set[str]]]
+
+    def __init__(self) -> None:
+        self.objects = {}
+        self.indexes = {
+            "host": {},
+            "state": {},
+            "state_type": {},
+            "group": {},
+            "zone": {},
+        }
+
+    @staticmethod
+    def _keys(obj: C) -> dict[str, Iterable[Hashable]]:
+        return {
+            "host": [obj.host_name] if isinstance(obj, Service) else [obj.name],
+            "state": [_to_int(obj.state)],
+            "state_type": [_to_int(obj.state_type)],
+            "group": obj.groups or (),
+            "zone": [obj.zone],
+        }
+
+    def add(self, obj: C) -> None:
+        assert obj.name is not None
+        self.remove(obj.name)
+        self.objects[obj.name] = obj
+        for index, keys in self._keys(obj).items():
+            for key in keys:
+                self.indexes[index].setdefault(key, set()).add(obj.name)
+
+    def remove(self, name: str) -> Optional[C]:
+        obj = self.objects.pop(name, None)
+        if obj is not None:
+            for index, keys in self._keys(obj).items():
+                for key in keys:
+                    names = self.indexes[index].get(key)
+                    if names is not None:
+                        names.discard(name)
+                        if not names:
+                            del self.indexes[index][key]
+        return obj
+
+    def query(self, restrict: Optional[set[str]] = None, **keys: Hashable) -> list[C]:
+        """
+        :param restrict: Only consider objects with these names.
+        :param keys: The key per index, for example ``state=2``. ``None``
+            matches all objects.
+        """
+        candidates: list[set[str]] = [] if restrict is None else [restrict]
+        for index, key in keys.items():
+            if key is None:
+                continue
+            candidates.append(self.indexes[index].get(key, set()))
+        if not candidates:
+            return list(self.objects.values())
+        candidates.sort(key=len)
+        names = candidates[0].intersection(*candidates[1:])
+        return [self.objects[name] for name in sorted(names)]
+
+
+class StateMirror:
+    """
+    Mirror the hosts and services of an Icinga instance in memory.
+
+    :param client: The client used for the snapshot and the event stream. If
+        not specified, a client configured by the configuration files is
+        created.
+    :param queue: The name of the event stream queue. If not specified, a
+        unique name is generated.
+    :param stall_timeout: The number of seconds without any event after which
+        the event stream is considered stalled and reopened. ``None`` waits
+        forever.
+    """
+
+    client: Client
+
+    queue: str
+
+    stall_timeout: Optional[float]
+
+    _hosts: _Index[Host]
+
+    _services: _Index[Service]
+
+    _lock: threading.RLock
+
+    _thread: Optional[threading.Thread] = None
+
+    _stopped: threading.Event
+
+    _snapshot_times: dict[str, float]
+    """The Unix timestamps the snapshots of ``Host`` and ``Service`` were requested."""
+
+    def __init__(
+        self,
+        client: Optional[Client] = None,
+        queue: Optional[str] = None,
+        stall_timeout: Optional[float] = 300,
+    ) -> None:
+        self.client = client if client is not None else Client()
+        self.queue = queue if queue is not None else f"pretiac-mirror-{uuid.uuid4()}"
+        self.stall_timeout = stall_timeout
+        self._hosts = _Index()
+        self._services = _Index()
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._snapshot_times = {}
+
+    # Loading and updating #############################################################
+
+    def load(self) -> None:
+        """Replace the mirrored objects by a fresh snapshot (two API calls)."""
+        hosts_time = time.time()
+        hosts = self.client.get_hosts()
+        services_time = time.time()
+        services = self.client.get_services()
+        with self._lock:
+            self._snapshot_times = {"Host": hosts_time, "Service": services_time}
+            self._hosts = _Index()
+            self._services = _Index()
+            for host in hosts:
+                self._hosts.add(host)
+            for service in services:
+                self._services.add(service)
+        logger.info("Mirrored %s hosts and %s services", len(hosts), len(services))
+
+    def _lookup(self, event: Payload) -> Optional[Union[Host, Service]]:
+        if event.get("service"):
+            return self._services.objects.get(f"{event['host']}!{event['service']}")
+        return self._hosts.objects.get(event["host"])
+
+    def _set_state(self, obj: Union[Host, Service], event: Payload) -> None:
+        assert obj.name is not None
+        # Remove the object from the indexes before its keys change.
+        index: _Index[Any] = self._services if isinstance(obj, Service) else self._hosts
+        index.remove(obj.name)
+        if "state" in event:
+            if isinstance(obj, Service):
+                obj.state = ServiceState(int(event["state"]))
+            else:
+                obj.state = HostState(int(event["state"]))
+        if "state_type" in event:
+            obj.state_type = StateType(int(event["state_type"]))
+        index.add(obj)
+
+    def _fetch_object(
+        self, object_type: HostOrService, name: str
+    ) -> Optional[Union[Host, Service]]:
+        result = self.client.raw_client.objects.get(
+            object_type, name, suppress_exception=True
+        )
+        if not result or "attrs" not in result:
+            return None
+        if object_type == "Host":
+            return _get_adapter(Host).validate_python(_merge_result(result))
+        return _get_adapter(Service).validate_python(_merge_result(result))
+
+    def _in_snapshot(self, event: Payload) -> bool:
+        """
+        Whether the snapshot was requested after the event occurred and
+        therefore already reflects it. This is the case for the events
+        buffered while the snapshot is loaded. The clocks of Icinga and of
+        this host are assumed to be synchronized, as an Icinga cluster
+        requires anyway.
+        """
+        timestamp = event.get("timestamp")
+        if not isinstance(timestamp, (int, float)):
+            return False
+        if "object_type" in event:
+            object_type = event["object_type"]
+        else:
+            downtime = event.get("downtime")
+            service = (
+                downtime.get("service_name")
+                if isinstance(downtime, dict)
+                else event.get("service")
+            )
+            object_type = "Service" if service else "Host"
+        return timestamp < self._snapshot_times.get(object_type, 0)
+
+    def apply(self, event: Payload) -> None:
+        """
+        Update the mirror with a single event of the event stream.
+
+        :param event: The decoded event, for example
+            ``{"type": "StateChange", "host": "Host1", "service": "ssh", ...}``.
+        """
+        event_type = event.get("type")
+        if self._in_snapshot(event):
+            return
+        if event_type in ("ObjectCreated", "ObjectModified", "ObjectDeleted"):
+            object_type = event.get("object_type")
+            name = event.get("object_name")
+            if object_type not in ("Host", "Service") or not name:
+                return
+            fetched: Optional[Union[Host, Service]] = None
+            if event_type != "ObjectDeleted":
+                # The event does not contain the attributes. They are fetched
+                # without holding the lock, so lookups are not blocked.
+                fetched = self._fetch_object(object_type, name)
+            with self._lock:
+                index: _Index[Any] = (
+                    self._hosts if object_type == "Host" else self._services
+                )
+                if event_type == "ObjectDeleted":
+                    index.remove(name)
+                elif fetched is not None:
+                    index.add(fetched)
+            return
+
+        with self._lock:
+            if event_type in ("DowntimeTriggered", "DowntimeRemoved"):
+                downtime = event.get("downtime", {})
+                target: Optional[Union[Host, Service]] = self._lookup(
+                    {
+                        "host": downtime.get("host_name"),
+                        "service": downtime.get("service_name"),
+                    }
+                )
+                if target is None:
+                    return
+                depth = target.downtime_depth or 0
+                if event_type == "DowntimeTriggered":
+                    target.downtime_depth = depth + 1
+                elif downtime.get("trigger_time"):
+                    target.downtime_depth = max(depth - 1, 0)
+                return
+
+            obj = self._lookup(event)
+            if obj is None:
+                return
+
+            if event_type == "CheckResult":
+                obj.last_check_result = _get_adapter(CheckResult).validate_python(
+                    event["check_result"]
+                )
+                obj.last_check = obj.last_check_result.execution_end
+            elif event_type == "StateChange":
+                self._set_state(obj, event)
+            elif event_type == "AcknowledgementSet":
+                obj.acknowledgement = int(event.get("acknowledgement_type", 1))
+            elif event_type == "AcknowledgementCleared":
+                obj.acknowledgement = 0
+
+            if "downtime_depth" in event:
+                obj.downtime_depth = int(event["downtime_depth"])
+            if isinstance(event.get("acknowledgement"), bool):
+                if not event["acknowledgement"]:
+                    obj.acknowledgement = 0
+                elif not obj.acknowledgement:
+                    obj.acknowledgement = 1
+
+    @staticmethod
+    def _read(events: Iterator[Any], buffer: "Queue[Any]") -> None:
+        """Move the events of the stream to the buffer, then its end or error."""
+        try:
+            for event in events:
+                buffer.put(event)
+        except Exception as e:
+            buffer.put(e)
+        else:
+            buffer.put(None)
+
+    def run(self) -> None:
+        """
+        Subscribe to the event stream, load a snapshot and apply the events
+        until :meth:`stop` is called. The events arriving while the snapshot
+        is loaded are buffered and applied on top of it. The snapshot is
+        reloaded whenever the event stream has to be reopened, so no state
+        changes are lost.
+        """
+        self._stopped.clear()
+        events = self.client.raw_client.events
+        while not self._stopped.is_set():
+            stream: Optional[requests.Response] = None
+            try:
+                stream = events.open(
+                    MIRROR_EVENT_TYPES,
+                    self.queue,
+                    timeout=(events.timeout[0], self.stall_timeout),
+                )
+                buffer: Queue[Any] = Queue()
+                threading.Thread(
+                    target=self._read,
+                    args=(events.read(stream), buffer),
+                    name="pretiac-state-mirror-stream",
+                    daemon=True,
+                ).start()
+                self.load()
+                while not self._stopped.is_set():
+                    try:
+                        event = buffer.get(timeout=0.5)
+                    except Empty:
+                        continue
+                    if event is None:
+                        raise PretiacException("The event stream was closed")
+                    if isinstance(event, Exception):
+                        raise event
+                    if isinstance(event, dict):
+                        self.apply(event)
+            except Exception as e:
+                logger.info("The state mirror lost the event stream: %s", e)
+                self._stopped.wait(5)
+            finally:
+                if stream is not None:
+                    stream.close()
+
+    def start(self) -> threading.Thread:
+        """Run the mirror in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self.run, name="pretiac-state-mirror", daemon=True
+        )
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Stop updating the mirror. The thread ends within half a second."""
+        self._stopped.set()
+
+    # Lookups ##########################################################################
+
+    def get_host(self, name: str) -> Optional[Host]:
+        """
+        :param name: The name of the host.
+        """
+        with self._lock:
+            return self._hosts.objects.get(name)
+
+    def get_service(self, name: str) -> Optional[Service]:
+        """
+        :param name: The full name of the service, for example ``host!service``.
+        """
+        with self._lock:
+            return self._services.objects.get(name)
+
+    def get_hosts(
+        self,
+        state: Optional[Union[HostState, int]] = None,
+        state_type: Optional[Union[StateType, int]] = None,
+        group: Optional[str] = None,
+        zone: Optional[str] = None,
+    ) -> list[Host]:
+        """
+        Get all mirrored hosts matching all given criteria.
+
+        :param state: The host state, for example ``HostState.DOWN``.
+        :param state_type: The state type, for example ``StateType.StateTypeHard``.
+        :param group: The name of a host group.
+        :param zone: The name of a zone.
+        """
+        with self._lock:
+            return self._hosts.query(
+                state=_to_int(state),
+                state_type=_to_int(state_type),
+                group=group,
+                zone=zone,
+            )
+
+    def get_services(
+        self,
+        host: Optional[str] = None,
+        state: Optional[Union[ServiceState, int]] = None,
+        state_type: Optional[Union[StateType, int]] = None,
+        group: Optional[str] = None,
+        zone: Optional[str] = None,
+        host_group: Optional[str] = None,
+    ) -> list[Service]:
+        """
+        Get all mirrored services matching all given criteria.
+
+        :param host: The name of the host.
+        :param state: The service state, for example ``ServiceState.CRITICAL``.
+        :param state_type: The state type, for example ``StateType.StateTypeHard``.
+        :param group: The name of a service group.
+        :param zone: The name of a zone.
+        :param host_group: The name of a host group the host of the service
+            belongs to.
+        """
+        with self._lock:
+            restrict: Optional[set[str]] = None
+            if host_group is not None:
+                by_host = self._services.indexes["host"]
+                restrict = set()
+                for host_name in self._hosts.indexes["group"].get(host_group, ()):
+                    restrict.update(by_host.get(host_name, ()))
+            return self._services.query(
+                restrict,
+                host=host,
+                state=_to_int(state),
+                state_type=_to_int(state_type),
+                group=group,
+                zone=zone,
+            )
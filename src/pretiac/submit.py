@@ -0,0 +1,120 @@
+"""
+A minimal client of the submission daemon (``pretiac serve``, see
+:mod:`pretiac.daemon`).
+
+This module only uses the standard library, neither requests nor pydantic
+nor the configuration are loaded. Short-lived scripts hand over a check result
+in a few milliseconds.
+
+.. code-block:: shell
+
+    pretiac-submit --socket /run/pretiac/pretiac.sock \\
+        --host web1 --exit-status 0 backup
+
+    python -m pretiac.submit --host web1 --exit-status 0 backup
+"""
+
+import argparse
+import json
+import socket
+import sys
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any, Optional, Union
+
+DEFAULT_SOCKET_PATH = "/run/pretiac/pretiac.sock"
+"""The default path of the Unix socket."""
+
+
+def submit(
+    records: Iterable[dict[str, Any]],
+    socket_path: Optional[Union[str, Path]] = None,
+    timeout: Optional[float] = 10,
+) -> dict[str, Any]:
+    """
+    Write check results to the socket of a
+    :class:`pretiac.daemon.SubmissionDaemon`.
+
+    :param records: The check results, the keys are the parameters of
+        :meth:`pretiac.client.Client.send_service_check_result`.
+    :param socket_path: The path of the Unix socket.
+    :param timeout: The number of seconds to wait for the daemon.
+
+    :returns: The answer of the daemon, for example
+        ``{"queued": 1, "errors": []}``.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(
+            str(socket_path if socket_path is not None else DEFAULT_SOCKET_PATH)
+        )
+        sock.sendall(
+            b"".join(
+                json.dumps(record, separators=(",", ":")).encode() + b"\n"
+                for record in records
+            )
+        )
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as answer:
+            return json.loads(answer.readline())
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pretiac-submit",
+        description="Hand a check result for a service over to the daemon "
+        "(pretiac serve).",
+    )
+    parser.add_argument("service", help="The name of the service.")
+    parser.add_argument("--host", help="The name of the host.")
+    parser.add_argument(
+        "--exit-status",
+        type=int,
+        choices=range(4),
+        help="0=OK, 1=WARNING, 2=CRITICAL, 3=UNKNOWN.",
+    )
+    parser.add_argument(
+        "--plugin-output",
+        help="The plugin main output. Does not contain the performance data.",
+    )
+    parser.add_argument("--performance-data", help="The performance data.")
+    parser.add_argument(
+        "--socket",
+        dest="socket_path",
+        default=DEFAULT_SOCKET_PATH,
+        help="The path of the Unix socket (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=10,
+        help="The number of seconds to wait for the daemon (default: %(default)s).",
+    )
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    The entry point of ``pretiac-submit``.
+
+    :param argv: The command line arguments without the program name.
+
+    :returns: The exit code, ``1`` if the check result was not queued.
+    """
+    args = _get_parser().parse_args(argv)
+    record: dict[str, Any] = {"service": args.service}
+    for key in ("host", "exit_status", "plugin_output", "performance_data"):
+        value = getattr(args, key)
+        if value is not None:
+            record[key] = value
+    try:
+        answer = submit([record], args.socket_path, args.timeout)
+    except (OSError, ValueError) as e:
+        print(f"pretiac-submit: {args.socket_path}: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(answer))
+    return 0 if not answer.get("errors") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
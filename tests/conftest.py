@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import socket
 from pathlib import Path
 
 import pytest
@@ -8,6 +9,7 @@ import pytest
 from pretiac.client import Client
 from pretiac.config import Config, load_config
 from pretiac.raw_client import RawClient
+from pretiac.retry import RetryPolicy
 
 pytest_plugins = [
     "pytester",
@@ -46,6 +48,22 @@ def config() -> Config:
     )
 
 
+@pytest.fixture
+def unreachable_config(tmp_path: Path) -> Config:
+    """A configuration of an API endpoint refusing connections, with a spool."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return Config(
+        api_endpoint_host="127.0.0.1",
+        api_endpoint_port=port,
+        http_basic_username="apiuser",
+        http_basic_password="password",
+        spool_directory=str(tmp_path / "spool"),
+        retry_policy=RetryPolicy(attempts=1),
+    )
+
+
 @pytest.fixture
 def raw_client(config: Config) -> RawClient:
     return RawClient(config)
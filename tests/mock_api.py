@@ -0,0 +1,814 @@
+"""
+A local stand-in for the Icinga2 API, used by the offline tests and the
+benchmarks in ``benchmarks/``.
+
+The server listens on HTTPS with a self-signed certificate (created with the
+``openssl`` command line tool) and synthesizes ``hosts`` × ``services``
+objects with realistic attributes. It answers the URL endpoints
+
+- ``v1/objects`` (listing, single objects, creation and deletion),
+- ``v1/actions/process-check-result``,
+- ``v1/events`` (``events`` check results or events of all types, then the
+  stream ends),
+- ``v1/status`` and
+- ``v1/config`` (packages, stage files and file contents).
+
+Filters are not evaluated, a listing always contains all objects of a type.
+
+.. code-block:: python
+
+    with MockApi(hosts=100, services=20) as api:
+        client = Client(config=api.get_config())
+        client.get_services()
+
+It can also be started from the command line, for example to point the
+``pretiac`` command line interface at it:
+
+.. code-block:: shell
+
+    python -m tests.mock_api --hosts 1000 --services 20 --port 5665
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import unquote
+
+from pretiac.config import Config, load_config
+
+USERNAME = "apiuser"
+
+PASSWORD = "password"
+
+START = 1700000000.0
+"""The timestamp of the synthesized check results."""
+
+
+def create_certificate(directory: Path) -> tuple[Path, Path]:
+    """
+    Create a self-signed certificate for ``localhost`` and ``127.0.0.1``.
+
+    :returns: The paths of the certificate and of the private key.
+    """
+    certificate = directory / "localhost.crt"
+    key = directory / "localhost.key"
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "2",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout",
+            str(key),
+            "-out",
+            str(certificate),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return certificate, key
+
+
+def is_available() -> bool:
+    """Whether the ``openssl`` command needed for the certificate exists."""
+    return shutil.which("openssl") is not None
+
+
+def _check_result(index: int, exit_status: int) -> dict[str, Any]:
+    return {
+        "type": "CheckResult",
+        "active": True,
+        "check_source": f"satellite{index % 3}.example.org",
+        "command": ["/usr/lib/nagios/plugins/check_ping", "-H", "127.0.0.1"],
+        "execution_start": START + index,
+        "execution_end": START + index + 0.05,
+        "exit_status": float(exit_status),
+        "output": f"PING {('OK', 'WARNING', 'CRITICAL', 'UNKNOWN')[exit_status]}"
+        + f" - Packet loss = 0%, RTA = {index % 100 / 10:.2f} ms",
+        "performance_data": [
+            f"rta={index % 100 / 10:.6f}ms;3000.000000;5000.000000;0.000000",
+            "pl=0%;80;100;0",
+        ],
+        "previous_hard_state": 99.0,
+        "schedule_start": START + index,
+        "schedule_end": START + index + 0.05,
+        "scheduling_source": "master.example.org",
+        "state": float(exit_status),
+        "ttl": 0.0,
+        "vars_after": {
+            "attempt": 1.0,
+            "reachable": True,
+            "state": float(exit_status),
+            "state_type": 1.0,
+        },
+        "vars_before": {
+            "attempt": 1.0,
+            "reachable": True,
+            "state": 0.0,
+            "state_type": 1.0,
+        },
+    }
+
+
+def _checkable(index: int, name: str, state: int) -> dict[str, Any]:
+    return {
+        "__name": name,
+        "acknowledgement": 0.0,
+        "acknowledgement_expiry": 0.0,
+        "active": True,
+        "check_attempt": 1.0,
+        "check_command": "ping4",
+        "check_interval": 60.0,
+        "check_period": "",
+        "check_timeout": None,
+        "downtime_depth": 0.0,
+        "enable_active_checks": True,
+        "enable_event_handler": True,
+        "enable_flapping": False,
+        "enable_notifications": True,
+        "enable_passive_checks": True,
+        "enable_perfdata": True,
+        "flapping": False,
+        "flapping_current": 0.0,
+        "groups": ["linux-servers", f"datacenter{index % 4}"],
+        "ha_mode": 0.0,
+        "handled": False,
+        "last_check": START + index,
+        "last_check_result": _check_result(index, state),
+        "last_hard_state": float(state),
+        "last_hard_state_change": START - 3600,
+        "last_reachable": True,
+        "last_state_change": START - 3600,
+        "last_state_type": 1.0,
+        "max_check_attempts": 3.0,
+        "next_check": START + index + 60,
+        "original_attributes": None,
+        "package": "_etc",
+        "paused": False,
+        "problem": state != 0,
+        "retry_interval": 30.0,
+        "severity": float(state * 32),
+        "source_location": {
+            "first_column": 1.0,
+            "first_line": 10.0 + index % 100,
+            "last_column": 30.0,
+            "last_line": 10.0 + index % 100,
+            "path": "/etc/icinga2/conf.d/hosts.conf",
+        },
+        "state": float(state),
+        "state_type": 1.0,
+        "templates": [name.split("!")[-1], "generic"],
+        "type": "Host",
+        "vars": {
+            "os": "Linux",
+            "disks": {"disk /": {"disk_partitions": "/"}},
+            "notification": {"mail": {"groups": ["icingaadmins"]}},
+        },
+        "version": 0.0,
+        "zone": f"zone{index % 4}",
+    }
+
+
+def create_host(index: int) -> dict[str, Any]:
+    """A result of ``v1/objects/hosts``."""
+    name = f"host{index:05d}.example.org"
+    attrs = _checkable(index, name, 1 if index % 50 == 49 else 0)
+    attrs.update(
+        address=f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+        address6="",
+        display_name=name,
+        name=name,
+    )
+    return {"attrs": attrs, "joins": {}, "meta": {}, "name": name, "type": "Host"}
+
+
+def create_service(host_index: int, index: int) -> dict[str, Any]:
+    """A result of ``v1/objects/services``."""
+    host_name = f"host{host_index:05d}.example.org"
+    short_name = f"service{index:03d}"
+    name = f"{host_name}!{short_name}"
+    number = host_index * 1000 + index
+    attrs = _checkable(number, name, number % 7 % 4 if number % 7 < 4 else 0)
+    attrs.update(
+        display_name=f"Service {index} of {host_name}",
+        host_name=host_name,
+        name=short_name,
+        type="Service",
+    )
+    return {"attrs": attrs, "joins": {}, "meta": {}, "name": name, "type": "Service"}
+
+
+def create_event(index: int, hosts: int, services: int) -> dict[str, Any]:
+    """A ``CheckResult`` event of the event stream."""
+    host_index = index % hosts
+    return {
+        "type": "CheckResult",
+        "timestamp": START + index,
+        "host": f"host{host_index:05d}.example.org",
+        "service": f"service{index // hosts % services:03d}",
+        "check_result": _check_result(index, index % 4),
+        "downtime_depth": 0.0,
+        "acknowledgement": False,
+    }
+
+
+def _comment(host: str, service: str, index: int) -> dict[str, Any]:
+    return {
+        "__name": f"{host}!{service}!comment{index}",
+        "name": f"comment{index}",
+        "type": "Comment",
+        "host_name": host,
+        "service_name": service,
+        "author": "icingaadmin",
+        "text": "Investigating the problem.",
+        "entry_type": 1.0,
+        "entry_time": START + index,
+        "expire_time": 0.0,
+        "persistent": False,
+        "legacy_id": float(index),
+        "package": "_api",
+        "zone": "master",
+        "version": START + index,
+        "active": True,
+        "paused": False,
+        "ha_mode": 0.0,
+        "templates": [f"comment{index}"],
+        "original_attributes": None,
+        "source_location": {
+            "first_column": 0.0,
+            "first_line": 1.0,
+            "last_column": 69.0,
+            "last_line": 1.0,
+            "path": f"/var/lib/icinga2/api/packages/_api/comments/{index}.conf",
+        },
+    }
+
+
+def _downtime(host: str, service: str, index: int) -> dict[str, Any]:
+    return {
+        "__name": f"{host}!{service}!downtime{index}",
+        "name": f"downtime{index}",
+        "type": "Downtime",
+        "host_name": host,
+        "service_name": service,
+        "author": "icingaadmin",
+        "comment": "Scheduled maintenance.",
+        "start_time": START + index,
+        "end_time": START + index + 3600,
+        "duration": 0.0,
+        "entry_time": START + index,
+        "fixed": True,
+        "triggers": [],
+        "trigger_time": 0.0,
+        "triggered_by": "",
+        "scheduled_by": "",
+        "parent": "",
+        "legacy_id": float(index),
+        "remove_time": 0.0,
+        "was_cancelled": False,
+        "config_owner": "",
+        "config_owner_hash": "",
+        "authoritative_zone": "",
+        "removed_by": "",
+        "package": "_api",
+        "zone": "master",
+        "version": START + index,
+        "active": True,
+        "paused": False,
+        "ha_mode": 0.0,
+        "templates": [f"downtime{index}"],
+        "original_attributes": None,
+        "source_location": {
+            "first_column": 0.0,
+            "first_line": 1.0,
+            "last_column": 69.0,
+            "last_line": 1.0,
+            "path": f"/var/lib/icinga2/api/packages/_api/downtimes/{index}.conf",
+        },
+    }
+
+
+MIXED_EVENT_TYPES: list[str] = (
+    ["CheckResult"] * 80
+    + ["StateChange"] * 6
+    + ["Notification"] * 2
+    + [
+        "Flapping",
+        "AcknowledgementSet",
+        "AcknowledgementCleared",
+        "CommentAdded",
+        "CommentRemoved",
+        "DowntimeAdded",
+        "DowntimeStarted",
+        "DowntimeTriggered",
+        "DowntimeRemoved",
+        "ObjectCreated",
+        "ObjectModified",
+        "ObjectDeleted",
+    ]
+)
+"""The event types of a mixed event stream, in their proportions."""
+
+
+def create_mixed_event(index: int, hosts: int, services: int) -> dict[str, Any]:
+    """An event of a mixed event stream, see :data:`MIXED_EVENT_TYPES`."""
+    event = create_event(index, hosts, services)
+    type = MIXED_EVENT_TYPES[index * 7 % len(MIXED_EVENT_TYPES)]
+    if type == "CheckResult":
+        return event
+    host, service = event["host"], event["service"]
+    check_result = event["check_result"]
+    state = {"state": check_result["state"], "state_type": 1.0}
+    base = {"type": type, "timestamp": event["timestamp"]}
+    if type == "StateChange":
+        return {**event, **state, "type": type}
+    if type == "Notification":
+        return {
+            **base,
+            "host": host,
+            "service": service,
+            "command": "mail-service-notification",
+            "users": ["icingaadmin"],
+            "notification_type": "PROBLEM",
+            "author": "",
+            "text": "",
+            "check_result": check_result,
+        }
+    if type == "Flapping":
+        return {
+            **base,
+            **state,
+            "host": host,
+            "service": service,
+            "is_flapping": True,
+            "flapping_current": 32.5,
+            "threshold_low": 25.0,
+            "threshold_high": 30.0,
+        }
+    if type == "AcknowledgementSet":
+        return {
+            **base,
+            **state,
+            "host": host,
+            "service": service,
+            "author": "icingaadmin",
+            "comment": "Working on it.",
+            "acknowledgement_type": 1.0,
+            "notify": True,
+            "expiry": 0.0,
+        }
+    if type == "AcknowledgementCleared":
+        return {**base, **state, "host": host, "service": service}
+    if type.startswith("Comment"):
+        return {**base, "comment": _comment(host, service, index)}
+    if type.startswith("Downtime"):
+        return {**base, "downtime": _downtime(host, service, index)}
+    return {**base, "object_type": "Service", "object_name": f"{host}!{service}"}
+
+
+def _encode(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # The headers and the body are written separately, without TCP_NODELAY
+    # every response would wait for the delayed ACK of the client.
+    disable_nagle_algorithm = True
+
+    server: _Server
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.__handle("GET")
+
+    def do_POST(self) -> None:
+        self.__handle(self.headers.get("X-HTTP-Method-Override", "POST").upper())
+
+    def do_PUT(self) -> None:
+        self.__handle("PUT")
+
+    def do_DELETE(self) -> None:
+        self.__handle("DELETE")
+
+    def __send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "application/json",
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __error(self, status: int, message: str) -> None:
+        self.__send(status, _encode({"error": float(status), "status": message}))
+
+    def __handle(self, method: str) -> None:
+        api = self.server.api
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length)) if length else {}
+        if self.headers.get("Authorization") != api.authorization:
+            self.__error(401, "Unauthorized. Please check your user credentials.")
+            return
+        if api.latency:
+            time.sleep(api.latency)
+        path = [unquote(part) for part in self.path.split("?")[0].split("/")[2:]]
+        with api.lock:
+            api.requests += 1
+        if path[0] == "objects":
+            self.__objects(method, path[1], path[2] if len(path) > 2 else None)
+        elif path[:2] == ["actions", "process-check-result"]:
+            self.__process_check_result(body)
+        elif path[0] == "events":
+            self.__events()
+        elif path[0] == "status":
+            self.__send(200, api.status)
+        elif path[0] == "config":
+            self.__config(path[1:])
+        else:
+            self.__error(404, "The requested path could not be found.")
+
+    def __objects(self, method: str, type: str, name: Optional[str]) -> None:
+        api = self.server.api
+        if name is None:
+            if method != "GET":
+                self.__error(400, "Invalid request.")
+            else:
+                self.__send(200, api.get_listing(type))
+            return
+        key = (type, name)
+        if method == "GET":
+            result = api.get_object(type, name)
+            if result is None:
+                self.__error(404, "No objects found.")
+            else:
+                self.__send(200, _encode({"results": [result]}))
+        elif method == "PUT":
+            with api.lock:
+                api.created.add(key)
+            self.__send(
+                200,
+                _encode({"results": [{"code": 200.0, "status": "Object was created"}]}),
+            )
+        elif method == "DELETE":
+            with api.lock:
+                api.created.discard(key)
+            self.__send(
+                200,
+                _encode(
+                    {"results": [{"code": 200.0, "status": "Object was deleted."}]}
+                ),
+            )
+
+    def __process_check_result(self, body: dict[str, Any]) -> None:
+        api = self.server.api
+        type = body.get("type", "Service")
+        name = body.get(type.lower(), "")
+        if not api.exists(type, name):
+            self.__error(404, "No objects found.")
+            return
+        with api.lock:
+            api.check_results += 1
+        self.__send(
+            200,
+            _encode(
+                {
+                    "results": [
+                        {
+                            "code": 200.0,
+                            "status": "Successfully processed check result for "
+                            f"object '{name}'.",
+                        }
+                    ]
+                }
+            ),
+        )
+
+    def __events(self) -> None:
+        api = self.server.api
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        batch: list[bytes] = []
+        for index in range(api.events):
+            batch.append(
+                _encode(api.create_event(index, api.hosts, api.services)) + b"\n"
+            )
+            if len(batch) == 100 or index == api.events - 1:
+                chunk = b"".join(batch)
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                batch = []
+        if api.idle_events:
+            api.stopping.wait()
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def __config(self, path: list[str]) -> None:
+        api = self.server.api
+        if path == ["packages"]:
+            self.__send(200, _encode({"results": api.packages}))
+        elif len(path) == 3 and path[0] == "stages":
+            self.__send(
+                200,
+                _encode(
+                    {
+                        "results": [{"name": "conf.d", "type": "directory"}]
+                        + [
+                            {"name": f"conf.d/hosts{index}.conf", "type": "file"}
+                            for index in range(api.files)
+                        ]
+                    }
+                ),
+            )
+        elif len(path) > 3 and path[0] == "files":
+            self.__send(
+                200,
+                b'object Host "example.org" {\n  check_command = "hostalive"\n}\n',
+                "application/octet-stream",
+            )
+        else:
+            self.__error(404, "The requested path could not be found.")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    api: MockApi
+
+
+class MockApi:
+    """
+    A local HTTPS server that mimics the Icinga2 API.
+
+    :param hosts: The number of synthesized hosts.
+    :param services: The number of services per host.
+    :param events: The number of events sent on each event stream
+        subscription, before the stream ends.
+    :param mixed_events: Whether the event stream contains all event types
+        (:func:`create_mixed_event`) instead of only check results.
+    :param idle_events: Whether the event stream stays open without further
+        events until the server stops, instead of ending after the last event.
+    :param packages: The number of configuration packages.
+    :param stages: The number of stages per configuration package.
+    :param files: The number of files per stage.
+    :param latency: The seconds each request is delayed, to simulate a
+        remote server.
+    :param port: The TCP port, ``0`` picks a free port.
+    """
+
+    hosts: int
+
+    services: int
+
+    events: int
+
+    create_event: Callable[[int, int, int], dict[str, Any]]
+
+    idle_events: bool
+
+    files: int
+
+    latency: float
+
+    packages: list[dict[str, Any]]
+
+    authorization: str
+
+    status: bytes
+
+    stopping: threading.Event
+    """Set when the server stops, ends idle event streams."""
+
+    requests: int = 0
+    """The number of handled requests."""
+
+    check_results: int = 0
+    """The number of processed check results."""
+
+    created: set[tuple[str, str]]
+    """The objects created with ``PUT``, as ``(url type, name)``."""
+
+    lock: threading.Lock
+
+    ca_certificate: str
+    """The path of the self-signed certificate."""
+
+    def __init__(
+        self,
+        hosts: int = 10,
+        services: int = 10,
+        events: int = 100,
+        mixed_events: bool = False,
+        idle_events: bool = False,
+        packages: int = 2,
+        stages: int = 3,
+        files: int = 20,
+        latency: float = 0,
+        port: int = 0,
+    ) -> None:
+        self.hosts = hosts
+        self.services = services
+        self.events = events
+        self.create_event = create_mixed_event if mixed_events else create_event
+        self.idle_events = idle_events
+        self.stopping = threading.Event()
+        self.files = files
+        self.latency = latency
+        self.packages = [
+            {
+                "name": f"package{package}",
+                "stages": [f"stage{package}-{stage}" for stage in range(stages)],
+                "active-stage": f"stage{package}-{stages - 1}",
+            }
+            for package in range(packages)
+        ]
+        self.authorization = "Basic " + base64.b64encode(
+            f"{USERNAME}:{PASSWORD}".encode()
+        ).decode("ascii")
+        self.status = _encode(
+            {
+                "results": [
+                    {
+                        "name": "IcingaApplication",
+                        "perfdata": [],
+                        "status": {
+                            "icingaapplication": {
+                                "app": {"node_name": "master.example.org"}
+                            }
+                        },
+                    }
+                ]
+            }
+        )
+        self.created = set()
+        self.lock = threading.Lock()
+        self.__listings: dict[str, bytes] = {}
+        self.__directory = tempfile.TemporaryDirectory(prefix="pretiac-mock-api-")
+        certificate, key = create_certificate(Path(self.__directory.name))
+        self.ca_certificate = str(certificate)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certificate, key)
+        self.__server = _Server(("127.0.0.1", port), _Handler, bind_and_activate=False)
+        self.__server.api = self
+        self.__server.server_bind()
+        self.__server.server_activate()
+        self.__server.socket = context.wrap_socket(
+            self.__server.socket, server_side=True
+        )
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.__server.server_address[1]
+
+    def get_config(self, **kwargs: Any) -> Config:
+        """
+        A configuration for the client pointing to this server. It uses
+        HTTP basic authentication, so the certificate is not verified.
+
+        :param kwargs: Further attributes of the configuration.
+        """
+        config = load_config(
+            config_file=False,
+            api_endpoint_host="localhost",
+            api_endpoint_port=self.port,
+            http_basic_username=USERNAME,
+            http_basic_password=PASSWORD,
+        )
+        for name, value in kwargs.items():
+            setattr(config, name, value)
+        return config
+
+    def get_listing(self, type: str) -> bytes:
+        """The encoded response body of ``v1/objects/<type>``."""
+        listing = self.__listings.get(type)
+        if listing is None:
+            results: list[dict[str, Any]] = []
+            if type == "hosts":
+                results = [create_host(index) for index in range(self.hosts)]
+            elif type == "services":
+                results = [
+                    create_service(host, index)
+                    for host in range(self.hosts)
+                    for index in range(self.services)
+                ]
+            listing = self.__listings[type] = _encode({"results": results})
+        return listing
+
+    def __parse_name(self, type: str, name: str) -> Optional[tuple[int, int]]:
+        host, _, service = name.partition("!")
+        try:
+            host_index = int(host.removeprefix("host").removesuffix(".example.org"))
+            service_index = (
+                int(service.removeprefix("service")) if type == "services" else 0
+            )
+        except ValueError:
+            return None
+        if (
+            host_index < self.hosts
+            and service_index < self.services
+            and name
+            == (
+                f"host{host_index:05d}.example.org"
+                + (f"!service{service_index:03d}" if type == "services" else "")
+            )
+        ):
+            return host_index, service_index
+        return None
+
+    def exists(self, type: str, name: str) -> bool:
+        """
+        Whether a synthesized or created object exists.
+
+        :param type: ``Host`` or ``Service``.
+        :param name: The full object name.
+        """
+        url_type = type.lower() + "s"
+        with self.lock:
+            if (url_type, name) in self.created:
+                return True
+        return self.__parse_name(url_type, name) is not None
+
+    def get_object(self, type: str, name: str) -> Optional[dict[str, Any]]:
+        """The result of ``v1/objects/<type>/<name>``."""
+        indexes = self.__parse_name(type, name)
+        if indexes is None:
+            return None
+        if type == "hosts":
+            return create_host(indexes[0])
+        return create_service(*indexes)
+
+    def start(self) -> MockApi:
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, name="pretiac-mock-api", daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__directory.cleanup()
+
+    def __enter__(self) -> MockApi:
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="A local mock of the Icinga2 API.")
+    parser.add_argument("--hosts", type=int, default=100)
+    parser.add_argument("--services", type=int, default=10)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--port", type=int, default=5665)
+    args = parser.parse_args()
+    with MockApi(
+        hosts=args.hosts,
+        services=args.services,
+        events=args.events,
+        latency=args.latency,
+        port=args.port,
+    ) as api:
+        print(
+            f"Listening on https://localhost:{api.port} "
+            f"(user {USERNAME}, password {PASSWORD})"
+        )
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from pretiac.agent import Agent
+from pretiac.check_executor import CheckExecution, ServiceCheck
+from pretiac.client import Client
+from pretiac.config import Config
+
+
+def _write_checks(path: Path, services: dict[str, float]) -> None:
+    # JSON is a subset of YAML.
+    path.write_text(
+        json.dumps(
+            {
+                "host": "host",
+                "checks": [
+                    {
+                        "service": service,
+                        "check_command": f"{sys.executable} -c 'print(\"{service}\")'",
+                        "interval": interval,
+                    }
+                    for service, interval in services.items()
+                ],
+            }
+        )
+    )
+
+
+class TestAgent:
+    @pytest.fixture
+    def sent(self, monkeypatch: pytest.MonkeyPatch) -> list[str]:
+        sent: list[str] = []
+        lock = threading.Lock()
+
+        def send(check: ServiceCheck, execution: CheckExecution, client: Any) -> Any:
+            with lock:
+                sent.append(execution.plugin_output)
+
+        monkeypatch.setattr(ServiceCheck, "send", send)
+        return sent
+
+    @pytest.fixture
+    def client(self, client: Client) -> Client:
+        client.load_known_objects = lambda *args: []  # type: ignore
+        return client
+
+    def _run(self, agent: Agent) -> threading.Thread:
+        thread = threading.Thread(target=agent.run)
+        thread.start()
+        return thread
+
+    def test_intervals(self, tmp_path: Path, client: Client, sent: list[str]) -> None:
+        file = tmp_path / "checks.yml"
+        _write_checks(file, {"fast": 0.2, "slow": 10})
+        agent = Agent(file, client=client, jitter=0)
+        thread = self._run(agent)
+        time.sleep(1.5)
+        agent.stop()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert sent.count("fast") >= 4
+        assert sent.count("slow") <= 1
+        assert agent.stats.executions == len(sent)
+        assert agent.stats.lag_max < 0.5
+
+    def test_reload(self, tmp_path: Path, client: Client, sent: list[str]) -> None:
+        file = tmp_path / "checks.yml"
+        _write_checks(file, {"old": 0.1})
+        agent = Agent(file, client=client)
+        thread = self._run(agent)
+        time.sleep(0.5)
+        _write_checks(file, {"new": 0.1})
+        agent.reload()
+        time.sleep(0.2)
+        sent.clear()
+        time.sleep(0.5)
+        agent.stop()
+        thread.join(5)
+        assert "new" in sent
+        assert "old" not in sent
+        assert [check.service for check in agent.collection.checks] == ["new"]
+
+    def test_reload_invalid(self, tmp_path: Path, client: Client) -> None:
+        file = tmp_path / "checks.yml"
+        _write_checks(file, {"old": 10})
+        agent = Agent(file, client=client)
+        thread = self._run(agent)
+        file.write_text("checks: invalid")
+        agent.reload()
+        time.sleep(0.2)
+        agent.stop()
+        thread.join(5)
+        assert [check.service for check in agent.collection.checks] == ["old"]
+
+    def test_slow_reload(self, tmp_path: Path, client: Client, sent: list[str]) -> None:
+        file = tmp_path / "checks.yml"
+        _write_checks(file, {"old": 0.1})
+        agent = Agent(file, client=client, jitter=0)
+        thread = self._run(agent)
+        time.sleep(0.3)
+
+        def load_known_objects(*args: Any) -> list[Any]:
+            time.sleep(1)
+            return []
+
+        client.load_known_objects = load_known_objects  # type: ignore
+        _write_checks(file, {"new": 0.1})
+        agent.reload()
+        time.sleep(0.1)
+        sent.clear()
+        time.sleep(0.5)
+        # The checks keep running while the API is queried.
+        assert sent.count("old") >= 3
+        time.sleep(1)
+        agent.stop()
+        thread.join(5)
+        assert "new" in sent
+        assert [check.service for check in agent.collection.checks] == ["new"]
+
+    def test_slow_report(self, tmp_path: Path, client: Client, sent: list[str]) -> None:
+        file = tmp_path / "checks.yml"
+        _write_checks(file, {"ssh": 0.1})
+
+        def send_service_check_result(*args: Any, **kwargs: Any) -> None:
+            time.sleep(1)
+
+        client.send_service_check_result = send_service_check_result  # type: ignore
+        agent = Agent(
+            file, client=client, jitter=0, report_interval=0.1, report_service="agent"
+        )
+        thread = self._run(agent)
+        time.sleep(0.8)
+        agent.stop()
+        thread.join(5)
+        assert sent.count("ssh") >= 4
+
+
+def test_unreachable(tmp_path: Path, unreachable_config: Config) -> None:
+    file = tmp_path / "checks.yml"
+    _write_checks(file, {"ssh": 0.1})
+    client = Client(config=unreachable_config)
+    # The agent starts while the API endpoint is down and spools the results.
+    agent = Agent(file, client=client, jitter=0)
+    thread = threading.Thread(target=agent.run)
+    thread.start()
+    time.sleep(0.5)
+    agent.stop()
+    thread.join(5)
+    assert agent.stats.executions >= 2
+    assert client.spool is not None
+    assert client.spool.pending()
+
+
+def test_lag_includes_worker_wait(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, client: Client
+) -> None:
+    monkeypatch.setattr(ServiceCheck, "send", lambda check, execution, client: None)
+    # Both checks are due immediately.
+    monkeypatch.setattr("pretiac.agent.random.uniform", lambda a, b: a)
+    file = tmp_path / "checks.yml"
+    file.write_text(
+        json.dumps(
+            {
+                "host": "host",
+                "concurrency": 1,
+                "checks": [
+                    {
+                        "service": service,
+                        "check_command": f"{sys.executable} -c 'import time; time.sleep(0.5)'",
+                        "interval": 10,
+                    }
+                    for service in ("a", "b")
+                ],
+            }
+        )
+    )
+    client.load_known_objects = lambda *args: []  # type: ignore
+    agent = Agent(file, client=client, jitter=0)
+    thread = threading.Thread(target=agent.run)
+    thread.start()
+    time.sleep(1.3)
+    agent.stop()
+    thread.join(5)
+    assert agent.stats.executions == 2
+    # The second check waited for the only check worker.
+    assert agent.stats.lag_max >= 0.4
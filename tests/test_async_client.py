@@ -0,0 +1,205 @@
+import asyncio
+import inspect
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from pretiac.async_client import (
+    AsyncActionsUrlEndpoint,
+    AsyncClient,
+    AsyncConfigUrlEndpoint,
+    AsyncEventsUrlEndpoint,
+    AsyncObjectsUrlEndpoint,
+    AsyncRawClient,
+    AsyncStatusUrlEndpoint,
+    AsyncTemplatesUrlEndpoint,
+    AsyncTypesUrlEndpoint,
+    AsyncVariablesUrlEndpoint,
+)
+from pretiac.client import Client
+from pretiac.config import Config
+from pretiac.raw_client import (
+    ActionsUrlEndpoint,
+    ConfigUrlEndpoint,
+    EventsUrlEndpoint,
+    ObjectsUrlEndpoint,
+    StatusUrlEndpoint,
+    TemplatesUrlEndpoint,
+    TypesUrlEndpoint,
+    VariablesUrlEndpoint,
+)
+from tests.mock_api import MockApi, is_available
+
+
+def _public_methods(cls: type) -> set[str]:
+    return {
+        name
+        for name, member in inspect.getmembers(cls, inspect.isfunction)
+        if not name.startswith("_")
+    }
+
+
+@pytest.mark.parametrize(
+    "sync_class,async_class",
+    [
+        (ObjectsUrlEndpoint, AsyncObjectsUrlEndpoint),
+        (ActionsUrlEndpoint, AsyncActionsUrlEndpoint),
+        (EventsUrlEndpoint, AsyncEventsUrlEndpoint),
+        (StatusUrlEndpoint, AsyncStatusUrlEndpoint),
+        (ConfigUrlEndpoint, AsyncConfigUrlEndpoint),
+        (TypesUrlEndpoint, AsyncTypesUrlEndpoint),
+        (TemplatesUrlEndpoint, AsyncTemplatesUrlEndpoint),
+        (VariablesUrlEndpoint, AsyncVariablesUrlEndpoint),
+        (Client, AsyncClient),
+    ],
+)
+def test_mirrors_every_method(sync_class: type, async_class: type) -> None:
+    assert _public_methods(sync_class) <= _public_methods(async_class)
+
+
+class FakeStream:
+    closed = False
+
+    def iter_lines(self) -> Any:
+        yield b'{"type": "CheckResult"}'
+        yield b'{"type": "StateChange"}'
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class TestAsyncRawClient:
+    def test_request(self, config: Config) -> None:
+        async def main() -> Any:
+            async with AsyncRawClient(config) as raw_client:
+                raw_client.raw_client.objects._request = (  # type: ignore
+                    lambda method, url_path, payload, **kwargs: {
+                        "results": [method, url_path, payload]
+                    }
+                )
+                return await asyncio.gather(
+                    raw_client.objects.list("Host"),
+                    raw_client.objects.list("Service", attrs=["state"]),
+                )
+
+        assert asyncio.run(main()) == [
+            ["GET", "hosts", {}],
+            ["GET", "services", {"attrs": ["state"]}],
+        ]
+
+    def test_subscribe(self, config: Config) -> None:
+        stream = FakeStream()
+
+        async def main() -> list[Any]:
+            async with AsyncRawClient(config) as raw_client:
+                raw_client.raw_client.events._request = (  # type: ignore
+                    lambda *args, **kwargs: stream
+                )
+                return [
+                    event
+                    async for event in raw_client.events.subscribe(
+                        ["CheckResult"], "queue"
+                    )
+                ]
+
+        assert asyncio.run(main()) == [
+            {"type": "CheckResult"},
+            {"type": "StateChange"},
+        ]
+        assert stream.closed
+
+    def test_idle_streams_do_not_block_requests(self, config: Config) -> None:
+        released = threading.Event()
+
+        class IdleStream(FakeStream):
+            def iter_lines(self) -> Any:
+                released.wait(5)
+                yield b'{"type": "CheckResult"}'
+
+        async def main() -> Any:
+            async with AsyncRawClient(config, max_workers=1) as raw_client:
+                events = raw_client.raw_client.events
+                events._request = lambda *args, **kwargs: IdleStream()  # type: ignore
+                raw_client.raw_client.objects._request = (  # type: ignore
+                    lambda method, url_path, payload, **kwargs: {"results": [1]}
+                )
+                streams = [
+                    raw_client.events.subscribe(["CheckResult"], f"queue{index}")
+                    for index in range(3)
+                ]
+                waiting = [
+                    asyncio.ensure_future(stream.__anext__()) for stream in streams
+                ]
+                result = await asyncio.wait_for(raw_client.objects.list("Host"), 2)
+                released.set()
+                await asyncio.gather(*waiting)
+                for stream in streams:
+                    await stream.aclose()
+                return result
+
+        assert asyncio.run(main()) == [1]
+
+    def test_exit_does_not_block_loop(self, config: Config) -> None:
+        async def main() -> int:
+            ticks = 0
+
+            async def tick() -> None:
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            def slow_request(*args: Any, **kwargs: Any) -> Any:
+                time.sleep(0.3)
+                return {"results": []}
+
+            async with AsyncRawClient(config) as raw_client:
+                raw_client.raw_client.objects._request = slow_request  # type: ignore
+                request = asyncio.ensure_future(raw_client.objects.list("Host"))
+                await asyncio.sleep(0.05)
+                ticker = asyncio.ensure_future(tick())
+            ticker.cancel()
+            await request
+            return ticks
+
+        assert asyncio.run(main()) > 5
+
+
+@pytest.mark.skipif(not is_available(), reason="openssl is missing")
+@pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+def test_cancel_idle_stream() -> None:
+    async def main() -> bool:
+        async with AsyncRawClient(api.get_config()) as raw_client:
+            stream = await raw_client.events.open(["CheckResult"], "queue")
+            events = raw_client.events.read(stream)
+            assert (await events.__anext__())["type"] == "CheckResult"
+            pending = asyncio.ensure_future(events.__anext__())
+            await asyncio.sleep(0.1)
+            pending.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await pending
+            await asyncio.wait_for(events.aclose(), 2)
+            return stream.raw.closed
+
+    with MockApi(events=1, idle_events=True) as api:
+        assert asyncio.run(main())
+    assert not [
+        thread
+        for thread in threading.enumerate()
+        if thread.name.startswith("pretiac-stream")
+    ]
+
+
+def test_async_client_shares_raw_client(client: Client) -> None:
+    async_client = AsyncClient(client=client)
+    assert async_client.raw_client.raw_client is client.raw_client
+    async_client.close()
+
+
+def test_async_max_workers(config: Config) -> None:
+    config.async_max_workers = 50
+    async_client = AsyncRawClient(config)
+    assert async_client._executor._max_workers == 50
+    async_client.close()
@@ -1,7 +1,19 @@
+import sys
+import threading
+import time
+from typing import Any
+
+import pytest
+
 from pretiac.check_executor import (
+    CheckCollection,
     CheckExecution,
+    ServiceCheck,
     _read_check_collection,  # type: ignore
 )
+from pretiac.client import CheckError, CheckResponse, Client
+from pretiac.config import Config
+from pretiac.exceptions import PretiacException
 from pretiac.object_types import ServiceState
 from tests.conftest import get_resources_path
 
@@ -90,3 +102,200 @@ class TestClassCheckExecution:
             "/xxxxx",
         ]
         assert check.plugin_output == "Plugin not found: /xxxxx"
+
+
+def _sleep_command(seconds: float, output: str) -> list[str]:
+    return [
+        sys.executable,
+        "-c",
+        f"import time; time.sleep({seconds}); print({output!r})",
+    ]
+
+
+class TestRunChecks:
+    @pytest.fixture
+    def sent(self, monkeypatch: pytest.MonkeyPatch) -> list[Any]:
+        sent: list[Any] = []
+        lock = threading.Lock()
+
+        def send(check: ServiceCheck, execution: CheckExecution, client: Any) -> Any:
+            with lock:
+                sent.append((check.host, check.service, execution.plugin_output))
+            assert client is self.client
+            return execution.plugin_output
+
+        monkeypatch.setattr(ServiceCheck, "send", send)
+        return sent
+
+    @pytest.fixture(autouse=True)
+    def inject_client(self, client: Client) -> None:
+        client.load_known_objects = lambda *args: []  # type: ignore
+        self.client = client
+
+    def _collection(self, concurrency: int) -> CheckCollection:
+        return CheckCollection(
+            host="host",
+            concurrency=concurrency,
+            checks=[
+                ServiceCheck(
+                    service=f"service{i}",
+                    check_command=_sleep_command(0.3, f"output{i}"),  # type: ignore
+                )
+                for i in range(4)
+            ],
+        )
+
+    def test_parallel(self, sent: list[Any]) -> None:
+        start = time.monotonic()
+        results = self._collection(4).run_checks(self.client)
+        assert time.monotonic() - start < 1.0
+        assert results == ["output0", "output1", "output2", "output3"]
+        assert sorted(sent) == [("host", f"service{i}", f"output{i}") for i in range(4)]
+
+    def test_sequential(self, sent: list[Any]) -> None:
+        start = time.monotonic()
+        self._collection(1).run_checks(self.client)
+        assert time.monotonic() - start >= 1.2
+        assert len(sent) == 4
+
+    def test_send_error(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        def send(check: ServiceCheck, execution: CheckExecution, client: Any) -> Any:
+            if check.service == "service1":
+                raise PretiacException("Rejected")
+            return execution.plugin_output
+
+        monkeypatch.setattr(ServiceCheck, "send", send)
+        results = self._collection(4).run_checks(self.client)
+        assert results[0] == "output0"
+        assert results[1] == CheckError(error=500, status="PretiacException: Rejected")
+        assert results[2:] == ["output2", "output3"]
+
+
+def test_prepare_unreachable(unreachable_config: Config) -> None:
+    client = Client(config=unreachable_config)
+    collection = CheckCollection(
+        host="host", checks=[ServiceCheck(service="ssh", check_command="true")]
+    )
+    # The bulk existence query is only an optimisation.
+    collection.prepare(client)
+    assert client.known_objects.unknown("Service", ["host!ssh"]) == ["host!ssh"]
+
+
+def test_run_checks_unreachable(unreachable_config: Config) -> None:
+    client = Client(config=unreachable_config)
+    collection = CheckCollection(
+        host="host",
+        checks=[
+            ServiceCheck(service=f"service{i}", check_command=_sleep_command(0, "OK"))  # type: ignore
+            for i in range(3)
+        ],
+    )
+    results = collection.run_checks(client)
+    assert all(
+        isinstance(result, CheckError) and "spooled" in result.status
+        for result in results
+    )
+    assert client.spool is not None
+    spooled: list[Any] = []
+
+    def send(record: Any) -> CheckResponse:
+        spooled.append(record)
+        return CheckResponse(code=200, status="")
+
+    client.spool.drain(send)
+    assert sorted(record["service"] for record in spooled) == [
+        "service0",
+        "service1",
+        "service2",
+    ]
+
+
+class TestLimits:
+    def test_timeout(self) -> None:
+        start = time.monotonic()
+        check = CheckExecution(
+            [
+                sys.executable,
+                "-c",
+                "import subprocess, sys, time; "
+                "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+                "time.sleep(30)",
+            ],
+            timeout=0.5,
+        )
+        # The grandchild is killed too, otherwise it would keep the pipes open.
+        assert time.monotonic() - start < 3
+        assert check.timed_out
+        assert check.exit_status == ServiceState.UNKNOWN
+        assert check.plugin_output.startswith("Plugin timed out after 0.")
+
+    def test_timeout_exit_status(self) -> None:
+        check = CheckExecution(
+            _sleep_command(10, "never"),
+            timeout=0.1,
+            timeout_exit_status=ServiceState.CRITICAL,
+        )
+        assert check.exit_status == ServiceState.CRITICAL
+
+    def test_no_time_left(self) -> None:
+        check = CheckExecution(_sleep_command(10, "never"), timeout=0)
+        assert check.timed_out
+        assert "not started" in check.plugin_output
+
+    def test_max_output_size(self) -> None:
+        check = CheckExecution(
+            [sys.executable, "-c", "print('x' * 1000000 + ' | a=1')"],
+            max_output_size=100,
+        )
+        assert check.truncated
+        assert check.exit_status == ServiceState.OK
+        assert check.plugin_output == "x" * 100
+        assert check.performance_data is None
+
+    def test_stderr(self) -> None:
+        check = CheckExecution(
+            [
+                sys.executable,
+                "-c",
+                "import sys; print('WARNING | a=1'); sys.stderr.write('disk slow')",
+            ]
+        )
+        assert check.plugin_output == "WARNING\ndisk slow"
+        assert check.performance_data == "a=1"
+
+    def test_output_within_limit(self) -> None:
+        check = CheckExecution(_sleep_command(0, "OK | a=1"), max_output_size=100)
+        assert not check.truncated
+        assert check.plugin_output == "OK"
+        assert check.performance_data == "a=1"
+
+    def test_total_timeout(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(
+            ServiceCheck, "send", lambda check, execution, client: execution
+        )
+        client: Any = type(
+            "FakeClient",
+            (),
+            {
+                "load_known_objects": lambda self, names: [],
+                "drain_spool": lambda self: 0,
+            },
+        )()
+        collection = CheckCollection(
+            host="host",
+            concurrency=1,
+            total_timeout=0.5,
+            checks=[
+                ServiceCheck(
+                    service=f"service{i}",
+                    check_command=_sleep_command(10, "never"),  # type: ignore
+                )
+                for i in range(3)
+            ],
+        )
+        start = time.monotonic()
+        executions: Any = collection.run_checks(client)
+        assert time.monotonic() - start < 3
+        assert [e.exit_status for e in executions] == [ServiceState.UNKNOWN] * 3
+        assert "timed out" in executions[0].plugin_output
+        assert "not started" in executions[2].plugin_output
@@ -23,3 +23,18 @@ def test_option_debug(pytester: Pytester) -> None:
     result.stderr.fnmatch_lines(
         "log level \x1b[0;36m3\x1b[0m (\x1b[0;36mverbose\x1b[0m): \x1b[0;36m-ddd\x1b[0m"
     )
+
+
+def test_invalid_exit_status(pytester: Pytester) -> None:
+    result = pytester.run(
+        "pretiac",
+        "actions",
+        "send-service-check-result",
+        "--socket",
+        "/nonexistent.sock",
+        "--exit-status",
+        "critical",
+        "backup",
+    )
+    assert result.ret == 2
+    result.stderr.fnmatch_lines("*Invalid value for '--exit-status'*")
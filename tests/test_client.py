@@ -1,6 +1,16 @@
-from pretiac.client import CheckError, CheckResponse, Client
+import json
+from typing import Any
+
+from pretiac.client import (
+    CheckError,
+    CheckResponse,
+    Client,
+    _convert_objects,  # type: ignore
+    _convert_objects_json,  # type: ignore
+    _get_adapter,  # type: ignore
+)
 from pretiac.config import Config
-from pretiac.object_types import Function
+from pretiac.object_types import Function, Host, Service, Zone
 from pretiac.raw_client import RawClient
 
 
@@ -37,6 +47,111 @@ def test_client_setup() -> None:
     assert client.ca_certificate is None
 
 
+class TestConvertObjects:
+    def test_adapter_cache(self) -> None:
+        assert _get_adapter(Host) is _get_adapter(Host)
+        assert _get_adapter(list[Host]) is _get_adapter(list[Host])
+        assert _get_adapter(Host) is not _get_adapter(list[Host])
+
+    def test_hosts(self) -> None:
+        hosts = _convert_objects(
+            [
+                {"attrs": {"__name": "Host1", "state": 0}, "type": "Host"},
+                {"attrs": {"__name": "Host2", "state": 1}, "type": "Host"},
+            ],
+            Host,
+        )
+        assert [host.name for host in hosts] == ["Host1", "Host2"]
+        assert hosts[1].state.value == 1
+
+    def test_zone_global(self) -> None:
+        zones = _convert_objects(
+            [{"attrs": {"__name": "global-templates", "global": True}}], Zone
+        )
+        assert zones[0].name == "global-templates"
+        assert zones[0].is_global is True
+
+    def test_json(self) -> None:
+        hosts = _convert_objects_json(
+            b'{"results": [{"attrs": {"__name": "Host1", "name": "Host1", "state": 1},'
+            b' "joins": {}, "meta": {}, "name": "Host1", "type": "Host"}]}',
+            Host,
+        )
+        assert hosts[0].name == "Host1"
+        assert hosts[0].state.value == 1
+
+    def test_json_zone_global(self) -> None:
+        zones = _convert_objects_json(
+            b'{"results": [{"attrs": {"__name": "director-global", "global": true}}]}',
+            Zone,
+        )
+        assert zones[0].is_global is True
+
+    def test_projected_attrs(self) -> None:
+        results = [
+            {
+                "attrs": {"state": 2.0},
+                "joins": {"host": {"state": 1.0}},
+                "name": "Host1!ssh",
+                "type": "Service",
+            }
+        ]
+        for services in (
+            _convert_objects_json(json.dumps({"results": results}), Service),
+            _convert_objects(results, Service),
+        ):
+            assert services[0].name == "Host1!ssh"
+            assert services[0].state.value == 2
+            assert services[0].joins == {"host": {"state": 1.0}}
+            assert services[0].last_check is None
+
+    def test_json_equals_python(self) -> None:
+        results = [
+            {"attrs": {"__name": "Host1", "name": "Host1", "state": 0}},
+            {"attrs": {"__name": "Host2", "name": "Host2", "state": 1}},
+        ]
+        assert _convert_objects_json(
+            json.dumps({"results": results}), Host
+        ) == _convert_objects(results, Host)
+
+
+def test_get_services_query(client: Client) -> None:
+    queries: list[Any] = []
+
+    def list_objects(object_type: str, **kwargs: Any) -> list[Any]:
+        queries.append((object_type, kwargs))
+        return [{"attrs": {"state": 0.0}, "name": "Host1!ssh"}]
+
+    client.raw_client.objects.list = list_objects  # type: ignore
+    services = client.get_services(
+        attrs=["state"],
+        filters="match(pattern, host.name)",
+        filter_vars={"pattern": "Host*"},
+        joins=["host.state"],
+    )
+    assert services[0].name == "Host1!ssh"
+    assert queries == [
+        (
+            "Service",
+            {
+                "attrs": ["state"],
+                "filters": "match(pattern, host.name)",
+                "filter_vars": {"pattern": "Host*"},
+                "joins": ["host.state"],
+            },
+        )
+    ]
+
+
+def test_iter_hosts(client: Client) -> None:
+    client.raw_client.objects.iter = lambda object_type, **kwargs: iter(  # type: ignore
+        [{"attrs": {"__name": object_type + "1"}}, {"attrs": {"__name": "Host2"}}]
+    )
+    hosts = client.iter_hosts()
+    assert next(hosts).name == "Host1"
+    assert next(hosts).name == "Host2"
+
+
 class TestApiUser:
     def test_get_all(self, client: Client) -> None:
         # o = object
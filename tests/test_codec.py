@@ -0,0 +1,67 @@
+import io
+from typing import Any
+
+import pytest
+import requests
+
+from pretiac.codec import Codec, OrjsonCodec, StdlibCodec, get_codec
+from pretiac.config import Config
+from pretiac.raw_client import RawClient
+from pretiac.request_handler import RequestHandler
+
+CODECS: list[Codec] = [StdlibCodec()]
+try:
+    import orjson  # noqa: F401
+
+    CODECS.append(OrjsonCodec())
+except ImportError:
+    pass
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+class TestCodec:
+    def test_round_trip(self, codec: Codec) -> None:
+        obj = {"name": "host!ssh", "state": 2.0, "vars": {"ümlaut": [1, None, True]}}
+        data = codec.dumps(obj)
+        assert isinstance(data, bytes)
+        assert b" " not in data
+        assert codec.loads(data) == obj
+        assert codec.loads(memoryview(data)) == obj
+        assert codec.loads(data.decode()) == obj
+
+    def test_non_str_keys(self, codec: Codec) -> None:
+        assert codec.loads(codec.dumps({1: "a"})) == {"1": "a"}
+
+    def test_stream(self, codec: Codec) -> None:
+        response = requests.Response()
+        response.raw = io.BytesIO(
+            b'{"type": "CheckResult"}\n\n{"type": "StateChange"}\n'
+        )
+        assert list(RequestHandler._get_message_from_stream(response, codec)) == [
+            {"type": "CheckResult"},
+            {"type": "StateChange"},
+        ]
+
+
+def test_get_codec() -> None:
+    assert get_codec("json").name == "json"
+    assert get_codec().name == ("orjson" if len(CODECS) == 2 else "json")
+
+
+def test_request(config: Config) -> None:
+    config.json_codec = "json"
+    raw_client = RawClient(config)
+    sent: list[Any] = []
+
+    def post(**kwargs: Any) -> requests.Response:
+        sent.append(kwargs)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"results":[{"code":200.0,"status":"ok"}]}'
+        return response
+
+    raw_client.session.post = post  # type: ignore
+    result = raw_client.actions.process_check_result("Service", "host!ssh", 0, "OK")
+    assert result == {"results": [{"code": 200.0, "status": "ok"}]}
+    assert sent[0]["headers"]["Content-Type"] == "application/json"
+    assert StdlibCodec().loads(sent[0]["data"])["plugin_output"] == "OK"
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from pretiac.client import CheckResponse, Client
+from pretiac.daemon import SubmissionDaemon, validate_result
+from pretiac.exceptions import PretiacException
+from pretiac.raw_client import ThroughputStats
+from pretiac.submit import main, submit
+
+
+class FakeClient:
+    """Record the check results and answer like Icinga."""
+
+    def __init__(self) -> None:
+        self.results: list[dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.raw_client = SimpleNamespace(throughput=ThroughputStats())
+
+    send_service_check_results = Client.send_service_check_results
+
+    def load_known_objects(self, services: Any) -> list[str]:
+        return []
+
+    def send_service_check_result(self, **kwargs: Any) -> CheckResponse:
+        time.sleep(0.01)
+        with self.lock:
+            self.results.append(kwargs)
+        return CheckResponse(code=200, status="ok")
+
+
+@pytest.fixture
+def fake_client() -> FakeClient:
+    return FakeClient()
+
+
+@contextmanager
+def running(daemon: SubmissionDaemon) -> Iterator[SubmissionDaemon]:
+    """Run the daemon in a thread and stop it after the queue is sent."""
+    ready = threading.Event()
+    thread = threading.Thread(target=daemon.run, args=(ready,))
+    thread.start()
+    assert ready.wait(5)
+    try:
+        yield daemon
+    finally:
+        daemon.stop()
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+def test_validate_result() -> None:
+    record = validate_result({"service": "ssh", "exit_status": 2})
+    assert record["execution_end"] == record["execution_start"]
+    with pytest.raises(PretiacException, match="service"):
+        validate_result({"host": "host"})
+    with pytest.raises(PretiacException, match="Unknown keys: foo"):
+        validate_result({"service": "ssh", "foo": 1})
+    with pytest.raises(PretiacException, match="exit status"):
+        validate_result({"service": "ssh", "exit_status": 4})
+    with pytest.raises(PretiacException, match="exit status: True"):
+        validate_result({"service": "ssh", "exit_status": True})
+
+
+def test_submit(tmp_path: Path, fake_client: FakeClient) -> None:
+    daemon = SubmissionDaemon(tmp_path / "pretiac.sock", client=fake_client)  # type: ignore
+    with running(daemon):
+        answer = submit(
+            [
+                {"service": "backup", "host": "web1", "exit_status": 1},
+                {"service": "backup", "host": "web1", "foo": 1},
+            ],
+            daemon.socket_path,
+        )
+    assert answer == {"queued": 1, "errors": ["Unknown keys: foo"]}
+    assert fake_client.results[0]["exit_status"] == 1
+    assert "execution_end" in fake_client.results[0]
+    assert not daemon.socket_path.exists()
+
+
+def test_main(
+    tmp_path: Path, fake_client: FakeClient, capsys: pytest.CaptureFixture[str]
+) -> None:
+    daemon = SubmissionDaemon(tmp_path / "pretiac.sock", client=fake_client)  # type: ignore
+    with running(daemon):
+        socket_path = str(daemon.socket_path)
+        assert main(["--socket", socket_path, "--exit-status", "2", "backup"]) == 0
+    assert capsys.readouterr().out == '{"queued": 1, "errors": []}\n'
+    assert fake_client.results[0]["service"] == "backup"
+    assert fake_client.results[0]["exit_status"] == 2
+    assert main(["--socket", socket_path, "backup"]) == 1
+    assert "pretiac-submit" in capsys.readouterr().err
+
+
+def test_concurrent(tmp_path: Path, fake_client: FakeClient) -> None:
+    daemon = SubmissionDaemon(
+        tmp_path / "pretiac.sock",
+        client=fake_client,  # type: ignore
+        concurrency=10,
+    )
+    start = time.monotonic()
+    with running(daemon):
+        for i in range(5):
+            submit(
+                [
+                    {"service": f"service{j}", "plugin_output": str(i)}
+                    for j in range(20)
+                ],
+                daemon.socket_path,
+            )
+        queued = time.monotonic()
+    # 100 results, 10 ms each: sent concurrently, in order per service.
+    assert queued - start < 0.1
+    assert daemon.sent == 100
+    outputs = [
+        r["plugin_output"] for r in fake_client.results if r["service"] == "service0"
+    ]
+    assert outputs == ["0", "1", "2", "3", "4"]
+
+
+def test_queue_full(tmp_path: Path, fake_client: FakeClient) -> None:
+    release = threading.Event()
+    send = fake_client.send_service_check_result
+
+    def blocked(**kwargs: Any) -> CheckResponse:
+        release.wait(5)
+        return send(**kwargs)
+
+    fake_client.send_service_check_result = blocked  # type: ignore
+    daemon = SubmissionDaemon(
+        tmp_path / "pretiac.sock",
+        client=fake_client,  # type: ignore
+        batch_size=1,
+        max_queued=2,
+    )
+    with running(daemon):
+        answer = submit(
+            [{"service": f"service{i}", "exit_status": 0} for i in range(10)],
+            daemon.socket_path,
+        )
+        release.set()
+    # The dispatcher may already have taken the first check result.
+    assert answer["queued"] in (2, 3)
+    assert len(answer["errors"]) == 10 - answer["queued"]
+    assert "The queue is full" in answer["errors"][0]
+    assert daemon.rejected == len(answer["errors"])
+    assert len(fake_client.results) == answer["queued"]
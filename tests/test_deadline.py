@@ -0,0 +1,140 @@
+import io
+import json
+import threading
+import time
+from typing import Any, Optional
+
+import pytest
+import requests
+
+from pretiac.client import CheckResponse, Client
+from pretiac.deadline import bind, deadline, get_remaining, limit_timeout
+from pretiac.exceptions import PretiacDeadlineExceededException
+from pretiac.raw_client import RawClient
+from pretiac.retry import RetryPolicy
+
+
+def _response(status: int, body: Any) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO()
+    response._content = json.dumps(body).encode()
+    return response
+
+
+class TestDeadline:
+    def test_nested(self) -> None:
+        assert get_remaining() is None
+        with deadline(10):
+            with deadline(20):
+                remaining = get_remaining()
+                assert remaining is not None and 9 < remaining <= 10
+            with deadline(1):
+                remaining = get_remaining()
+                assert remaining is not None and remaining <= 1
+            with deadline(None):
+                remaining = get_remaining()
+                assert remaining is not None and 9 < remaining <= 10
+        assert get_remaining() is None
+
+    def test_limit_timeout(self) -> None:
+        assert limit_timeout(10, None) == (10, None)
+        with deadline(2):
+            connect, read = limit_timeout(10, None)
+            assert connect is not None and connect <= 2
+            assert read is not None and read <= 2
+            assert limit_timeout(1, 1) == (1, 1)
+        with deadline(0):
+            with pytest.raises(PretiacDeadlineExceededException):
+                limit_timeout(10, 60)
+
+    def test_bind(self) -> None:
+        remaining: list[Optional[float]] = []
+
+        def record() -> None:
+            remaining.append(get_remaining())
+
+        with deadline(5):
+            thread = threading.Thread(target=bind(record))
+        thread.start()
+        thread.join()
+        assert remaining[0] is not None and remaining[0] <= 5
+
+
+class TestRequest:
+    timeouts: list[Any]
+
+    @pytest.fixture
+    def raw_client(self, raw_client: RawClient) -> RawClient:
+        self.timeouts = []
+
+        def post(**kwargs: Any) -> requests.Response:
+            self.timeouts.append(kwargs["timeout"])
+            return _response(200, {"results": []})
+
+        raw_client.session.post = post  # type: ignore
+        return raw_client
+
+    def test_default(self, raw_client: RawClient) -> None:
+        raw_client.status.list()
+        assert self.timeouts == [(10, 60)]
+
+    def test_config(self, raw_client: RawClient) -> None:
+        config = raw_client.get_client_config()
+        config.connect_timeout = 3
+        config.read_timeout = 0
+        raw_client.status.list()
+        assert self.timeouts == [(3, None)]
+
+    def test_with_options(self, raw_client: RawClient) -> None:
+        raw_client.with_options(timeout=5).status.list()
+        raw_client.with_options(timeout=(1, None)).status.list()
+        raw_client.status.list()
+        assert self.timeouts == [(5, 5), (1, None), (10, 60)]
+
+    def test_subscribe(self, raw_client: RawClient) -> None:
+        list(raw_client.events.subscribe(["CheckResult"], "queue"))
+        list(raw_client.events.subscribe(["CheckResult"], "queue", timeout=30))
+        assert self.timeouts == [(10, None), (30, 30)]
+
+    def test_deadline(self, raw_client: RawClient) -> None:
+        with deadline(1):
+            raw_client.status.list()
+        connect, read = self.timeouts[0]
+        assert connect <= 1 and read <= 1
+
+    def test_no_retry_after_deadline(self, raw_client: RawClient) -> None:
+        attempts = 0
+
+        def post(**kwargs: Any) -> requests.Response:
+            nonlocal attempts
+            attempts += 1
+            raise requests.ReadTimeout()
+
+        raw_client.session.post = post  # type: ignore
+        policy = RetryPolicy(attempts=10, backoff=1, backoff_max=1)
+        with deadline(0.5):
+            start = time.monotonic()
+            with pytest.raises(
+                (requests.ReadTimeout, PretiacDeadlineExceededException)
+            ):
+                raw_client.with_options(retry_policy=policy).status.list()
+        assert time.monotonic() - start < 0.6
+        assert attempts < 10
+
+
+def test_send_service_check_result(client: Client) -> None:
+    client.known_objects.add("Host", "deadline-host")
+    client.known_objects.add("Service", "deadline-host!ssh")
+    timeouts: list[Any] = []
+
+    def post(**kwargs: Any) -> requests.Response:
+        timeouts.append(kwargs["timeout"])
+        return _response(200, {"results": [{"code": 200.0, "status": "ok"}]})
+
+    client.raw_client.session.post = post  # type: ignore
+    result = client.send_service_check_result(
+        "ssh", "deadline-host", timeout=2, spool=False
+    )
+    assert isinstance(result, CheckResponse)
+    assert timeouts[0][0] <= 2 and timeouts[0][1] <= 2
@@ -0,0 +1,134 @@
+import io
+import json
+import threading
+import time
+from typing import Any
+
+import pytest
+import requests
+import urllib3
+
+from pretiac.config import Config
+from pretiac.endpoints import EndpointPool, normalize_endpoint
+from pretiac.raw_client import RawClient
+
+FIRST = "https://master1:5665"
+SECOND = "https://master2:5665"
+
+
+def _refused() -> requests.ConnectionError:
+    return requests.ConnectionError(
+        urllib3.exceptions.MaxRetryError(
+            None,  # type: ignore
+            "/",
+            urllib3.exceptions.NewConnectionError(None, "Connection refused"),  # type: ignore
+        )
+    )
+
+
+def _response(status: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO()
+    response._content = json.dumps({"results": [], "status": status}).encode()
+    return response
+
+
+def test_normalize_endpoint() -> None:
+    assert normalize_endpoint("master2") == SECOND
+    assert normalize_endpoint("master2:5666") == "https://master2:5666"
+    assert normalize_endpoint("master2", 5667) == "https://master2:5667"
+    assert normalize_endpoint("[::1]:5666") == "https://[::1]:5666"
+    assert normalize_endpoint("https://master2") == SECOND
+
+
+class TestEndpointPool:
+    def test_read_in_turn(self) -> None:
+        pool = EndpointPool([FIRST, SECOND])
+        first = [pool.get_candidates(read=True)[0].url for _ in range(4)]
+        assert first == [FIRST, SECOND, FIRST, SECOND]
+        assert pool.get_candidates(read=False)[0].url == FIRST
+
+    def test_down(self) -> None:
+        pool = EndpointPool([FIRST, SECOND, FIRST], probe_interval=60)
+        assert len(pool.endpoints) == 2
+        pool.mark_down(pool.endpoints[0])
+        candidates = [endpoint.url for endpoint in pool.get_candidates(read=True)]
+        assert candidates == [SECOND, FIRST]
+        assert [endpoint.url for endpoint in pool.healthy] == [SECOND]
+
+    def test_probe(self) -> None:
+        probed = threading.Event()
+        answers = [False, True]
+
+        def probe(url: str) -> bool:
+            probed.set()
+            return answers.pop(0)
+
+        pool = EndpointPool([FIRST, SECOND], probe_interval=0, probe=probe)
+        first = pool.endpoints[0]
+        pool.mark_down(first)
+        pool.get_candidates(read=False)
+        assert probed.wait(1)
+        while first.probing:
+            time.sleep(0.01)
+        assert not first.healthy
+        pool.get_candidates(read=False)
+        while answers or first.probing:
+            time.sleep(0.01)
+        assert first.healthy
+
+
+class TestRequest:
+    @pytest.fixture
+    def raw_client(self, config: Config) -> RawClient:
+        config.api_endpoint_host = "master1"
+        config.api_endpoints = ["master2"]
+        config.endpoint_probe_interval = 60
+        return RawClient(config)
+
+    def _answer(self, raw_client: RawClient, answers: dict[str, Any]) -> list[str]:
+        urls: list[str] = []
+
+        def post(url: str, **kwargs: Any) -> requests.Response:
+            urls.append(url)
+            answer = answers[url.split("/v1/")[0]]
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        raw_client.session.post = post  # type: ignore
+        return urls
+
+    def test_read_in_turn(self, raw_client: RawClient) -> None:
+        urls = self._answer(raw_client, {FIRST: _response(200), SECOND: _response(200)})
+        raw_client.status.list()
+        raw_client.status.list()
+        assert [url.split("/v1/")[0] for url in urls] == [FIRST, SECOND]
+
+    def test_failover(self, raw_client: RawClient) -> None:
+        urls = self._answer(raw_client, {FIRST: _refused(), SECOND: _response(200)})
+        raw_client.actions.process_check_result("Service", "host!ssh", 0, "OK")
+        raw_client.actions.process_check_result("Service", "host!ssh", 0, "OK")
+        assert [url.split("/v1/")[0] for url in urls] == [FIRST, SECOND, SECOND]
+        assert not raw_client.endpoints.endpoints[0].healthy
+
+    def test_unavailable(self, raw_client: RawClient) -> None:
+        urls = self._answer(raw_client, {FIRST: _response(503), SECOND: _response(200)})
+        raw_client.actions.process_check_result("Service", "host!ssh", 0, "OK")
+        assert [url.split("/v1/")[0] for url in urls] == [FIRST, SECOND]
+
+    def test_no_failover_of_non_idempotent(self, raw_client: RawClient) -> None:
+        urls = self._answer(
+            raw_client, {FIRST: requests.ReadTimeout(), SECOND: _response(200)}
+        )
+        with pytest.raises(requests.ReadTimeout):
+            raw_client.actions.process_check_result("Service", "host!ssh", 0, "OK")
+        assert len(urls) == 1
+
+    def test_all_down(self, raw_client: RawClient) -> None:
+        urls = self._answer(raw_client, {FIRST: _refused(), SECOND: _refused()})
+        with pytest.raises(requests.ConnectionError):
+            raw_client.with_options(timeout=1).status.list()
+        # Three attempts on both endpoints.
+        assert len(urls) == 6
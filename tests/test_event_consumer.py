@@ -0,0 +1,118 @@
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+import urllib3
+
+from pretiac.client import Client
+from pretiac.config import Config
+from pretiac.event_consumer import EventConsumer, EventGap
+from pretiac.object_types import Payload
+from tests.mock_api import MockApi, is_available
+
+
+def _event(timestamp: float) -> Payload:
+    return {"type": "CheckResult", "timestamp": timestamp, "host": "example.org"}
+
+
+def _stalled() -> requests.ConnectionError:
+    return requests.ConnectionError(
+        urllib3.exceptions.ReadTimeoutError(None, "/", "Read timed out.")  # type: ignore
+    )
+
+
+def _consumer(config: Config, streams: list[list[Any]], **kwargs: Any) -> EventConsumer:
+    """
+    :param streams: The events of each connection. An exception ends the
+        connection, after the last connection the consumer is stopped.
+    """
+    consumer = EventConsumer(
+        ["CheckResult"], client=Client(config=config), backoff=0, **kwargs
+    )
+    remaining = iter(streams)
+
+    def subscribe(*args: Any, **kwargs: Any) -> Iterator[Payload]:
+        stream = next(remaining, None)
+        if stream is None:
+            consumer.stop()
+            return
+        for item in stream:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    consumer.client.raw_client.events.subscribe = subscribe  # type: ignore
+    return consumer
+
+
+def _drain(consumer: EventConsumer) -> list[float]:
+    return [event["timestamp"] for event in consumer]
+
+
+def test_reconnect_and_gap(config: Config) -> None:
+    gaps: list[EventGap] = []
+    consumer = _consumer(
+        config,
+        [[_event(1), _event(2), _stalled()], [], [_event(5)]],
+        on_gap=gaps.append,
+    )
+    consumer.run()
+    assert _drain(consumer) == [1, 2, 5]
+    assert consumer.reconnects == 3
+    assert gaps == list(consumer.gaps)
+    gap = gaps[0]
+    assert gap.reason == "stalled"
+    assert gap.last_event_timestamp == 2
+    assert gap.next_event_timestamp == 5
+    assert gap.reconnects == 2
+    assert gap.duration is not None
+
+
+def test_drop_oldest(config: Config) -> None:
+    consumer = _consumer(
+        config, [[_event(i) for i in range(5)]], maxsize=2, overflow="drop_oldest"
+    )
+    consumer.run()
+    assert consumer.dropped == 3
+    assert _drain(consumer) == [3, 4]
+
+
+def test_spill(config: Config, tmp_path: Path) -> None:
+    consumer = _consumer(
+        config,
+        [[_event(i) for i in range(7)]],
+        maxsize=2,
+        overflow="spill",
+        spill_directory=tmp_path,
+        spill_batch_size=2,
+    )
+    consumer.run()
+    assert consumer.spilled == 5
+    assert len(list(tmp_path.iterdir())) == 2
+    assert consumer.pending == 7
+    assert _drain(consumer) == list(range(7))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_block(config: Config) -> None:
+    consumer = _consumer(config, [[_event(i) for i in range(50)]], maxsize=1)
+    consumer.start()
+    assert _drain(consumer) == list(range(50))
+    assert consumer.dropped == 0
+
+
+@pytest.mark.skipif(not is_available(), reason="openssl is missing")
+@pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+def test_mock_api() -> None:
+    with MockApi(events=20) as api:
+        consumer = EventConsumer(
+            ["CheckResult"], client=Client(config=api.get_config()), backoff=0
+        )
+        consumer.on_gap = lambda gap: consumer.stop()
+        consumer.start()
+        events = list(consumer)
+    assert len(events) >= 21
+    assert consumer.gaps[0].reason == "closed by the API endpoint"
+    assert consumer.gaps[0].last_event_timestamp == events[19]["timestamp"]
@@ -0,0 +1,123 @@
+import gzip
+import json
+import time
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from pretiac import cli
+from pretiac.client import Client
+from pretiac.event_recording import (
+    EventRecorder,
+    EventReplay,
+    read_recording,
+    zstandard,
+)
+from pretiac.exceptions import PretiacException
+from pretiac.object_types import EventStreamTypeCheckResult
+from tests.mock_api import MockApi, create_event, create_mixed_event, is_available
+
+
+def _record(directory: Path, events: int, interval: float = 0.01) -> list[Path]:
+    with EventRecorder(directory, max_events=4) as recorder:
+        for index in range(events):
+            recorder.write(
+                json.dumps(create_mixed_event(index, 10, 10)).encode(),
+                received=1700000000 + index * interval,
+            )
+    return recorder.files
+
+
+def test_rotation(tmp_path: Path) -> None:
+    files = _record(tmp_path, 10)
+    assert [file.name[-15:] for file in files] == [
+        "-0001.ndjson.gz",
+        "-0002.ndjson.gz",
+        "-0003.ndjson.gz",
+    ]
+    assert not list(tmp_path.glob("*.part"))
+    record = json.loads(gzip.decompress(files[0].read_bytes()).splitlines()[1])
+    assert record["received"] == 1700000000.01
+    assert record["event"] == create_mixed_event(1, 10, 10)
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard is missing")
+def test_zstd(tmp_path: Path) -> None:
+    with EventRecorder(tmp_path, compression="zstd", max_events=4) as recorder:
+        for index in range(10):
+            recorder.write(json.dumps(create_mixed_event(index, 10, 10)).encode())
+    assert [file.suffix for file in recorder.files] == [".zst"] * 3
+    assert [event for _, event in read_recording(recorder.files)] == [
+        create_mixed_event(index, 10, 10) for index in range(10)
+    ]
+
+
+def test_read_recording(tmp_path: Path) -> None:
+    records = list(read_recording(_record(tmp_path, 10)))
+    assert [event for _, event in records] == [
+        create_mixed_event(index, 10, 10) for index in range(10)
+    ]
+
+
+def test_replay_max_speed(tmp_path: Path) -> None:
+    replay = EventReplay(_record(tmp_path, 10, interval=60), speed=None)
+    start = time.monotonic()
+    assert len(list(replay)) == 10
+    assert time.monotonic() - start < 1
+    assert replay.events == 10
+
+
+def test_replay_speed(tmp_path: Path) -> None:
+    # 9 intervals of 1 s replayed 30 times as fast.
+    replay = EventReplay(_record(tmp_path, 10, interval=1), speed=30)
+    start = time.monotonic()
+    list(replay)
+    assert 0.28 < time.monotonic() - start < 1
+
+
+def test_replay_invalid_speed() -> None:
+    with pytest.raises(PretiacException, match="must be positive"):
+        EventReplay([], speed=0)
+
+
+def test_subscribe_events(tmp_path: Path) -> None:
+    replay = EventReplay(_record(tmp_path, 100), speed=None)
+    events = list(replay.subscribe_events(["CheckResult"], "test"))
+    assert 0 < len(events) < 100
+    assert all(isinstance(event, EventStreamTypeCheckResult) for event in events)
+    assert replay.events == 100
+
+
+def test_subscribe_filter(tmp_path: Path) -> None:
+    replay = EventReplay(_record(tmp_path, 1), speed=None)
+    with pytest.raises(PretiacException, match="while recording"):
+        list(replay.subscribe(["CheckResult"], "test", filter="true"))
+
+
+@pytest.mark.skipif(not is_available(), reason="openssl is missing")
+@pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+def test_cli(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    runner = CliRunner()
+    with MockApi(events=25) as api:
+        monkeypatch.setattr(
+            cli, "get_default_client", lambda: Client(config=api.get_config())
+        )
+        result = runner.invoke(
+            cli.main,
+            ["events", "record", "--max-events", "10", str(tmp_path)],
+        )
+    assert result.exit_code == 0, result.output
+    assert "Recorded 25 events to 3 files" in result.output
+
+    result = runner.invoke(
+        cli.main,
+        ["events", "replay", "--speed", "0"]
+        + [str(path) for path in sorted(tmp_path.glob("*.gz"))],
+    )
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert len(lines) == 25
+    assert (
+        json.loads(lines[0])["host"] == create_event(0, api.hosts, api.services)["host"]
+    )
@@ -0,0 +1,120 @@
+import io
+import json
+from typing import Any
+
+import pytest
+import requests
+import urllib3
+
+from pretiac.config import Config
+from pretiac.exceptions import PretiacRequestException
+from pretiac.instrumentation import RequestInfo, RequestObserver, get_url_template
+from pretiac.raw_client import RawClient
+from pretiac.retry import RetryPolicy
+
+
+class Recorder(RequestObserver):
+    calls: list[tuple[str, RequestInfo]]
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def before_request(self, info: RequestInfo) -> None:
+        self.calls.append(("before_request", info))
+
+    def after_response(self, info: RequestInfo) -> None:
+        self.calls.append(("after_response", info))
+
+    def on_error(self, info: RequestInfo, error: Exception) -> None:
+        self.calls.append(("on_error", info))
+
+
+def _response(status: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(
+        json.dumps({"results": [{"name": "example.org"}], "status": status}).encode()
+    )
+    return response
+
+
+def _client(config: Config, status: int) -> tuple[RawClient, Recorder]:
+    raw_client = RawClient(config)
+
+    def post(**kwargs: Any) -> requests.Response:
+        return _response(status)
+
+    raw_client.session.post = post  # type: ignore
+    recorder = Recorder()
+    raw_client.add_observer(recorder)
+    return raw_client, recorder
+
+
+def test_get_url_template() -> None:
+    assert get_url_template("v1/objects/hosts") == "v1/objects/hosts"
+    assert get_url_template("v1/objects/hosts/example.org") == (
+        "v1/objects/hosts/{name}"
+    )
+    assert get_url_template("v1/config/stages/pkg/stage/") == (
+        "v1/config/stages/{name}/{name}/"
+    )
+
+
+def test_after_response(config: Config) -> None:
+    raw_client, recorder = _client(config, 200)
+    raw_client.objects.get("Host", "example.org")
+    assert [hook for hook, _ in recorder.calls] == ["before_request", "after_response"]
+    info = recorder.calls[-1][1]
+    assert info.method == "GET"
+    assert info.url_endpoint == "objects"
+    assert info.url_template == "v1/objects/hosts/{name}"
+    assert info.status == 200
+    assert info.attempts == 1
+    assert info.response_bytes > 0
+    assert info.parse_seconds is not None
+    assert info.total_seconds >= info.parse_seconds
+    assert not info.suppressed
+
+
+def test_error_response(config: Config) -> None:
+    raw_client, recorder = _client(config, 404)
+    with pytest.raises(PretiacRequestException):
+        raw_client.objects.list("Host")
+    assert recorder.calls[-1][0] == "after_response"
+    assert recorder.calls[-1][1].status == 404
+
+
+def test_suppressed(config: Config) -> None:
+    config.suppress_exception = True
+    raw_client, recorder = _client(config, 404)
+    raw_client.objects.list("Host")
+    assert recorder.calls[-1][1].suppressed
+
+
+def test_on_error(config: Config) -> None:
+    raw_client, recorder = _client(config, 200)
+
+    def post(**kwargs: Any) -> requests.Response:
+        raise requests.ConnectionError(
+            urllib3.exceptions.NewConnectionError(None, "Connection refused")  # type: ignore
+        )
+
+    raw_client.session.post = post  # type: ignore
+    with pytest.raises(requests.ConnectionError):
+        raw_client.with_options(retry_policy=RetryPolicy(attempts=1)).objects.list(
+            "Host"
+        )
+    assert [hook for hook, _ in recorder.calls] == ["before_request", "on_error"]
+
+
+def test_failing_observer(config: Config) -> None:
+    class Failing(RequestObserver):
+        def after_response(self, info: RequestInfo) -> None:
+            raise ValueError("broken")
+
+    raw_client, recorder = _client(config, 200)
+    raw_client.observers.insert(0, Failing())
+    assert raw_client.objects.list("Host") == [{"name": "example.org"}]
+    assert recorder.calls[-1][0] == "after_response"
+    raw_client.remove_observer(recorder)
+    assert len(raw_client.observers) == 1
@@ -0,0 +1,157 @@
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from pretiac.client import Client
+from pretiac.known_objects import KnownObjects, get_known_objects
+
+
+class TestKnownObjects:
+    def test_known(self) -> None:
+        known = KnownObjects()
+        known.add("Service", "host!ssh")
+        assert known.is_known("Service", "host!ssh")
+        assert not known.is_known("Host", "host!ssh")
+        known.discard("Service", "host!ssh")
+        assert not known.is_known("Service", "host!ssh")
+
+    def test_missing_ttl(self) -> None:
+        known = KnownObjects(missing_ttl=0.05)
+        known.add_missing("Host", "host")
+        assert known.is_missing("Host", "host")
+        time.sleep(0.06)
+        assert not known.is_missing("Host", "host")
+
+    def test_add_clears_missing(self) -> None:
+        known = KnownObjects()
+        known.add_missing("Host", "host")
+        known.add("Host", "host")
+        assert not known.is_missing("Host", "host")
+
+    def test_unknown(self) -> None:
+        known = KnownObjects()
+        known.add("Host", "a")
+        known.add_missing("Host", "b")
+        assert known.unknown("Host", ["a", "b", "c", "c"]) == ["c"]
+
+    def test_file(self, tmp_path: Path) -> None:
+        file = tmp_path / "known.json"
+        KnownObjects(file).add("Service", "host!ssh")
+        KnownObjects(file).add_missing("Host", "missing")
+        known = KnownObjects(file)
+        assert known.is_known("Service", "host!ssh")
+        assert not known.is_missing("Host", "missing")
+
+    def test_corrupt_file(self, tmp_path: Path) -> None:
+        file = tmp_path / "known.json"
+        file.write_text("{")
+        assert not KnownObjects(file).is_known("Host", "host")
+
+    def test_process_wide(self) -> None:
+        url = "https://known-objects.example.com:5665"
+        assert get_known_objects(url) is get_known_objects(url)
+
+
+class FakeApi:
+    """Record the requests and answer like Icinga."""
+
+    existing: set[str]
+
+    requests: list[str]
+
+    def __init__(self, client: Client, existing: set[str]) -> None:
+        self.existing = existing
+        self.requests = []
+        client.known_objects.clear()
+        actions = client.raw_client.actions
+        actions.process_check_result = self.process_check_result  # type: ignore
+        client.raw_client.objects.create = self.create  # type: ignore
+        client.raw_client.objects.list = self.list  # type: ignore
+
+    def process_check_result(self, type: str, name: str, **kwargs: Any) -> Any:
+        self.requests.append(f"POST {name}")
+        if name in self.existing:
+            return {"results": [{"code": 200.0, "status": "ok"}]}
+        return {"error": 404.0, "status": "No objects found."}
+
+    def create(self, object_type: str, name: str, **kwargs: Any) -> Any:
+        self.requests.append(f"PUT {name}")
+        self.existing.add(name)
+        return {"results": [{"code": 200.0, "status": "Object was created"}]}
+
+    def list(self, object_type: str, filter_vars: Any, **kwargs: Any) -> Any:
+        self.requests.append(f"GET {object_type}")
+        return [
+            {"name": name, "attrs": {"host_name": name.split("!")[0], "name": name}}
+            for name in filter_vars["names"]
+            if name in self.existing
+        ]
+
+
+class TestSendServiceCheckResult:
+    @pytest.fixture
+    def client(self) -> Client:
+        return Client(
+            config_file=False,
+            api_endpoint_host="known-objects.example.org",
+            http_basic_username="u",
+            http_basic_password="p",
+        )
+
+    def test_steady_state(self, client: Client) -> None:
+        api = FakeApi(client, {"host", "host!ssh"})
+        for _ in range(3):
+            client.send_service_check_result("ssh", "host")
+        assert api.requests == ["POST host!ssh"] * 3
+
+    def test_cold_start(self, client: Client) -> None:
+        api = FakeApi(client, set())
+        client.send_service_check_result("ssh", "host")
+        assert api.requests == [
+            "POST host!ssh",
+            "PUT host",
+            "PUT host!ssh",
+            "POST host!ssh",
+        ]
+
+    def test_preflight(self, client: Client) -> None:
+        api = FakeApi(client, {"host", "host!ssh"})
+        missing = client.load_known_objects(["host!ssh", "host!http"])
+        assert missing == ["host!http"]
+        # Known hosts are derived from the services found.
+        assert api.requests == ["GET Service"]
+        client.send_service_check_result("ssh", "host")
+        client.send_service_check_result("http", "host")
+        client.send_service_check_result("http", "host")
+        assert api.requests == [
+            "GET Service",
+            "POST host!ssh",
+            "PUT host!http",
+            "POST host!http",
+            "POST host!http",
+        ]
+        # Everything is known now.
+        client.load_known_objects(["host!ssh", "host!http"])
+        assert api.requests[-1] == "POST host!http"
+
+    def test_bulk(self, client: Client) -> None:
+        api = FakeApi(client, {"host", "host!ssh"})
+        responses = client.send_service_check_results(
+            [
+                {"service": "ssh", "host": "host", "plugin_output": "1"},
+                {"service": "http", "host": "host", "plugin_output": "2"},
+                {"service": "ssh", "host": "host", "plugin_output": "3"},
+            ]
+        )
+        assert [r.status for r in responses] == ["ok", "ok", "ok"]
+        # One query for all services, the missing one is created first.
+        assert api.requests[0] == "GET Service"
+        assert api.requests.index("PUT host!http") < api.requests.index(
+            "POST host!http"
+        )
+        assert api.requests.count("POST host!ssh") == 2
+        throughput = client.raw_client.throughput
+        assert (throughput.batches, throughput.last_results) == (1, 3)
+        assert throughput.results_per_second > 0
@@ -0,0 +1,76 @@
+import urllib.request
+from pathlib import Path
+
+from pretiac.instrumentation import RequestInfo
+from pretiac.metrics import MetricsCollector
+
+
+def _info(status: int = 200, seconds: float = 0.2) -> RequestInfo:
+    info = RequestInfo("GET", "objects", "v1/objects/hosts/{name}", 10)
+    info.status = status
+    info.attempts = 2
+    info.response_bytes = 100
+    info.dns_seconds = 0.005
+    info.connect_seconds = 0.01
+    info.server_seconds = 0.1
+    info.total_seconds = seconds
+    return info
+
+
+def _collector() -> MetricsCollector:
+    metrics = MetricsCollector()
+    metrics.after_response(_info())
+    metrics.after_response(_info(seconds=3))
+    suppressed = _info(404)
+    suppressed.suppressed = True
+    metrics.after_response(suppressed)
+    metrics.on_error(_info(), ConnectionError())
+    return metrics
+
+
+def test_render() -> None:
+    text = _collector().render()
+    labels = (
+        'method="GET",url_endpoint="objects",url_template="v1/objects/hosts/{name}"'
+    )
+    assert f'pretiac_requests_total{{{labels},status="200"}} 2' in text
+    assert f'pretiac_requests_total{{{labels},status="404"}} 1' in text
+    assert f'pretiac_request_errors_total{{{labels},error="ConnectionError"}} 1' in text
+    assert f"pretiac_suppressed_errors_total{{{labels}}} 1" in text
+    assert f"pretiac_request_retries_total{{{labels}}} 4" in text
+    assert f'pretiac_request_duration_seconds_bucket{{{labels},le="0.25"}} 3' in text
+    assert f'pretiac_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4' in text
+    assert f"pretiac_request_duration_seconds_count{{{labels}}} 4" in text
+    assert f"pretiac_request_duration_seconds_sum{{{labels}}} 3.6" in text
+    assert (
+        'pretiac_request_phase_seconds_count{url_endpoint="objects",phase="connect"} 4'
+        in text
+    )
+    assert (
+        'pretiac_request_phase_seconds_count{url_endpoint="objects",phase="dns"} 4'
+        in text
+    )
+    assert 'phase="tls"' not in text
+    assert 'pretiac_response_bytes_total{url_endpoint="objects"} 300' in text
+    assert "# TYPE pretiac_request_duration_seconds histogram" in text
+
+
+def test_write(tmp_path: Path) -> None:
+    path = tmp_path / "pretiac.prom"
+    metrics = _collector()
+    metrics.write(path)
+    assert path.read_text() == metrics.render()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_serve() -> None:
+    metrics = _collector()
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read().decode() == metrics.render()
+    finally:
+        server.shutdown()
+        server.server_close()
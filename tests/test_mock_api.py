@@ -0,0 +1,98 @@
+from collections.abc import Generator
+
+import pytest
+
+from pretiac.client import CheckResponse, Client
+from pretiac.instrumentation import RequestInfo, RequestObserver
+from tests.mock_api import MockApi, is_available
+
+pytestmark = [
+    pytest.mark.skipif(not is_available(), reason="openssl is missing"),
+    pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning"),
+]
+
+
+@pytest.fixture(scope="module")
+def api() -> Generator[MockApi, None, None]:
+    with MockApi(hosts=20, services=5, events=250) as api:
+        yield api
+
+
+@pytest.fixture
+def mock_client(
+    api: MockApi, monkeypatch: pytest.MonkeyPatch
+) -> Generator[Client, None, None]:
+    # The CA bundles of the environment must not override the configured
+    # verification.
+    monkeypatch.setenv("REQUESTS_CA_BUNDLE", "/nonexistent/ca-bundle.crt")
+    monkeypatch.setenv("CURL_CA_BUNDLE", "/nonexistent/ca-bundle.crt")
+    with Client(config=api.get_config()) as client:
+        yield client
+
+
+def test_get_services(mock_client: Client) -> None:
+    services = mock_client.get_services()
+    assert len(services) == 100
+    assert services[0].name == "host00000.example.org!service000"
+    assert services[0].host_name == "host00000.example.org"
+    assert services[0].last_check_result is not None
+
+
+def test_probe(mock_client: Client) -> None:
+    raw_client = mock_client.raw_client
+    assert raw_client._RawClient__probe(raw_client.url)  # type: ignore
+
+
+def test_get_host(mock_client: Client) -> None:
+    host = mock_client.get_host("host00003.example.org")
+    assert host is not None
+    assert host.address == "10.0.0.3"
+
+
+def test_send_service_check_result(api: MockApi, mock_client: Client) -> None:
+    count = api.check_results
+    result = mock_client.send_service_check_result(
+        "service001", "host00001.example.org", 0, "OK"
+    )
+    assert isinstance(result, CheckResponse)
+    assert api.check_results == count + 1
+
+
+def test_send_service_check_result_create(api: MockApi, mock_client: Client) -> None:
+    result = mock_client.send_service_check_result("new", "new.example.org", 2, "x")
+    assert isinstance(result, CheckResponse)
+    assert ("hosts", "new.example.org") in api.created
+    assert ("services", "new.example.org!new") in api.created
+
+
+def test_subscribe_events(mock_client: Client) -> None:
+    events = list(mock_client.subscribe_events(["CheckResult"], "pretiac"))
+    assert len(events) == 250
+    assert events[-1].type == "CheckResult"
+
+
+def test_list_all_config_stage_files(mock_client: Client) -> None:
+    stages = mock_client.list_all_config_stage_files()
+    assert len(stages) == 6
+    assert len(stages[0].files) == 21
+
+
+def test_get_status(mock_client: Client) -> None:
+    assert mock_client.get_status()[0].name == "IcingaApplication"
+
+
+def test_connection_timings(mock_client: Client) -> None:
+    infos: list[RequestInfo] = []
+
+    class Recorder(RequestObserver):
+        def after_response(self, info: RequestInfo) -> None:
+            infos.append(info)
+
+    mock_client.raw_client.add_observer(Recorder())
+    mock_client.get_status()
+    mock_client.get_status()
+    assert infos[0].dns_seconds is not None
+    assert infos[0].connect_seconds is not None
+    assert infos[0].tls_seconds is not None
+    assert infos[1].dns_seconds is None
+    assert infos[1].connect_seconds is None
@@ -1,9 +1,19 @@
+import functools
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
 from pretiac.object_types import (
+    EventStream,
+    EventStreamTypeAcknowledgementSet,
+    EventStreamTypeObjectDeleted,
+    EventStreamTypeStateChange,
     _convert_pascal_to_snake_case,  # type: ignore
     get_object_types_names,
     normalize_to_plural_snake_object_type_name,
     object_type_names_snake,
 )
+from tests.mock_api import MIXED_EVENT_TYPES, create_mixed_event
 
 
 def test_convert_pascal_to_snake_case() -> None:
@@ -112,3 +122,63 @@ class TestNormalizeToPluralSnakeObjectTypeName:
 
     def test_singular(self) -> None:
         self.assert_name("windows_event_log_logger", "windows_event_log_loggers")
+
+
+class TestEventStream:
+    adapter: TypeAdapter[EventStream] = TypeAdapter(EventStream)
+
+    def test_all_types(self) -> None:
+        events = [
+            self.adapter.validate_python(create_mixed_event(index, 10, 10))
+            for index in range(len(MIXED_EVENT_TYPES))
+        ]
+        assert {type(event).__name__ for event in events} == {
+            f"EventStreamType{type}" for type in MIXED_EVENT_TYPES
+        }
+
+    def test_fields(self) -> None:
+        event = next(
+            event
+            for event in map(
+                functools.partial(create_mixed_event, hosts=10, services=10),
+                range(len(MIXED_EVENT_TYPES)),
+            )
+            if event["type"] == "StateChange"
+        )
+        state_change = self.adapter.validate_python(event)
+        assert isinstance(state_change, EventStreamTypeStateChange)
+        assert state_change.state == event["state"]
+        assert state_change.check_result is not None
+
+    def test_acknowledgement(self) -> None:
+        event = self.adapter.validate_python(
+            {
+                "type": "AcknowledgementSet",
+                "timestamp": 1700000000.0,
+                "host": "host1",
+                "state": 2,
+                "state_type": 1,
+                "author": "icingaadmin",
+                "comment": "Working on it.",
+                "acknowledgement_type": 1,
+                "notify": True,
+                "expiry": 0,
+            }
+        )
+        assert isinstance(event, EventStreamTypeAcknowledgementSet)
+        assert event.service is None
+
+    def test_object_deleted(self) -> None:
+        event = self.adapter.validate_python(
+            {
+                "type": "ObjectDeleted",
+                "timestamp": 1700000000.0,
+                "object_type": "Host",
+                "object_name": "host1",
+            }
+        )
+        assert isinstance(event, EventStreamTypeObjectDeleted)
+
+    def test_unknown_type(self) -> None:
+        with pytest.raises(ValidationError, match="union_tag_invalid"):
+            self.adapter.validate_python({"type": "Unknown", "timestamp": 0})
@@ -1,11 +1,16 @@
+import json
 import re
 import time
-from typing import Optional
+from typing import Any, Optional
 
 import pytest
+import requests
 
+from pretiac.codec import CodecName, get_codec, orjson
+from pretiac.config import Config
 from pretiac.exceptions import PretiacException, PretiacRequestException
 from pretiac.raw_client import RawClient
+from pretiac.request_handler import RequestHandler
 
 
 class TestClient:
@@ -27,12 +32,170 @@ class TestClient:
     def test_version(self, raw_client: RawClient) -> None:
         assert isinstance(raw_client.version, str)
 
+    def test_shared_session(self, raw_client: RawClient) -> None:
+        assert raw_client.objects.raw_client.session is raw_client.session
+        assert raw_client.actions.raw_client.session is raw_client.session
+
+    def test_pool_size(self, config: Config) -> None:
+        config.pool_connections = 2
+        config.pool_maxsize = 20
+        adapter = RawClient(config).session.get_adapter(
+            "https://localhost:5665/v1/objects/hosts"
+        )
+        assert adapter._pool_connections == 2  # type: ignore
+        assert adapter._pool_maxsize == 20  # type: ignore
+
+    def test_context_manager(self, config: Config) -> None:
+        with RawClient(config) as raw_client:
+            assert raw_client.session.auth == ("apiuser", "password")
+
+
+class ChunkedResponse:
+    closed = False
+
+    def __init__(self, body: bytes, chunk_size: int) -> None:
+        self.body = body
+        self.size = chunk_size
+
+    read = 0
+
+    def iter_content(self, chunk_size: int) -> Any:
+        for i in range(0, len(self.body), self.size):
+            self.read = i + self.size
+            yield self.body[i : i + self.size]
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class TestResultsStream:
+    results = [
+        {"attrs": {"__name": "Höst1", "vars": {"list": [1, "]", "}"]}}},
+        {"attrs": {"__name": "Host2 ✓", "vars": None}, "joins": {}},
+    ]
+
+    body = json.dumps({"results": results}, ensure_ascii=False, indent=2).encode()
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 65536])
+    def test_chunks(self, chunk_size: int) -> None:
+        stream: Any = ChunkedResponse(self.body, chunk_size)
+        assert list(RequestHandler._get_results_from_stream(stream)) == self.results
+
+    def test_empty(self) -> None:
+        stream: Any = ChunkedResponse(b'{"results": []}', 3)
+        assert list(RequestHandler._get_results_from_stream(stream)) == []
+
+    def test_truncated(self) -> None:
+        stream: Any = ChunkedResponse(self.body[:-20], 5)
+        with pytest.raises(PretiacException, match="Unexpected end"):
+            list(RequestHandler._get_results_from_stream(stream))
+
+    def test_invalid(self) -> None:
+        body = b'{"results": [{"a": 1}, {"a": tru}, ' + b'{"b": 2}, ' * 100000 + b"]}"
+        stream: Any = ChunkedResponse(body, 64)
+        results = RequestHandler._get_results_from_stream(stream)
+        assert next(results) == {"a": 1}
+        with pytest.raises(PretiacException, match="Invalid result"):
+            next(results)
+        # The rest of the body was not buffered.
+        assert stream.read < 1000
+
+    def test_large_result(self) -> None:
+        result = {"vars": {f"key{i}": ['x\\"}', i] for i in range(50000)}}
+        body = json.dumps({"results": [result, 1, "]", None]}).encode()
+        stream: Any = ChunkedResponse(body, 1024)
+        start = time.perf_counter()
+        assert list(RequestHandler._get_results_from_stream(stream)) == [
+            result,
+            1,
+            "]",
+            None,
+        ]
+        assert time.perf_counter() - start < 2
+
+    def test_results_key(self) -> None:
+        body = b'{"meta": [{"a": 1}], "results" : [{"b": 2}]}'
+        stream: Any = ChunkedResponse(body, 4)
+        assert list(RequestHandler._get_results_from_stream(stream)) == [{"b": 2}]
+
+    def test_many_results_per_chunk(self) -> None:
+        body = json.dumps({"results": [{"a": i} for i in range(200000)]}).encode()
+        stream: Any = ChunkedResponse(body, len(body))
+        start = time.perf_counter()
+        assert sum(1 for _ in RequestHandler._get_results_from_stream(stream)) == 200000
+        assert time.perf_counter() - start < 2
+
+    @pytest.mark.parametrize("codec", ["json", "orjson"])
+    def test_codec(self, codec: CodecName) -> None:
+        if codec == "orjson" and orjson is None:
+            pytest.skip("orjson is not installed")
+        stream: Any = ChunkedResponse(self.body, 7)
+        results = RequestHandler._get_results_from_stream(
+            stream, codec=get_codec(codec)
+        )
+        assert list(results) == self.results
+
+    def test_objects_iter(self, raw_client: RawClient) -> None:
+        stream = ChunkedResponse(self.body, 10)
+        requests: list[Any] = []
+
+        def _request(*args: Any, **kwargs: Any) -> ChunkedResponse:
+            requests.append((args, kwargs))
+            return stream
+
+        raw_client.objects._request = _request  # type: ignore
+        iterator = raw_client.objects.iter("Host", attrs=["vars"])
+        assert next(iterator) == self.results[0]
+        iterator.close()
+        assert stream.closed
+        assert requests[0][0] == ("GET", "hosts", {"attrs": ["vars"]})
+        assert requests[0][1]["stream"] is True
+
 
 def test_get_services(raw_client: RawClient) -> None:
     services = raw_client.objects.list("Service")
     assert services[0]["type"] == "Service"
 
 
+def test_process_check_results(config: Config) -> None:
+    raw_client = RawClient(config)
+    actions = raw_client.actions
+
+    def request(method: str, url_path: str, payload: Any, **kwargs: Any) -> Any:
+        time.sleep(0.05)
+        if payload["service"] == "refused":
+            raise requests.ConnectionError("Connection refused")
+        return {"results": [{"code": 200, "status": payload["service"]}]}
+
+    actions._request = request  # type: ignore
+    results = [
+        {
+            "type": "Service",
+            "name": name,
+            "exit_status": 0,
+            "plugin_output": "OK",
+        }
+        for name in [f"host!service{i}" for i in range(20)] + ["refused"]
+    ]
+    start = time.monotonic()
+    responses = actions.process_check_results(
+        results, concurrency=10, suppress_exception=True
+    )
+    assert time.monotonic() - start < 0.5
+    assert [r["results"][0]["status"] for r in responses[:20]] == [
+        f"host!service{i}" for i in range(20)
+    ]
+    assert responses[20]["error"] == 503
+    throughput = raw_client.throughput
+    assert (throughput.batches, throughput.results) == (1, 21)
+    assert throughput.last_seconds == throughput.seconds > 0.1
+    assert throughput.last_results_per_second == pytest.approx(
+        21 / throughput.last_seconds
+    )
+    with pytest.raises(requests.ConnectionError):
+        actions.process_check_results(results[20:])
+
+
 class TestActions:
     class TestProcessCheckResult:
         def test_success(self, raw_client: RawClient) -> None:
@@ -0,0 +1,196 @@
+import io
+import json
+import time
+from typing import Any
+
+import pytest
+import requests
+import urllib3
+
+from pretiac.client import Client
+from pretiac.config import Config
+from pretiac.exceptions import (
+    PretiacCircuitOpenException,
+    PretiacDeadlineExceededException,
+)
+from pretiac.raw_client import RawClient
+from pretiac.retry import CircuitBreaker, RetryPolicy, should_retry
+
+NO_BACKOFF = RetryPolicy(backoff=0)
+
+
+def _refused() -> requests.ConnectionError:
+    return requests.ConnectionError(
+        urllib3.exceptions.MaxRetryError(
+            None,  # type: ignore
+            "/",
+            urllib3.exceptions.NewConnectionError(None, "Connection refused"),  # type: ignore
+        )
+    )
+
+
+def _response(status: int, headers: dict[str, str] = {}) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO()
+    response._content = json.dumps({"results": [], "status": status}).encode()
+    response.headers.update(headers)
+    return response
+
+
+class TestShouldRetry:
+    def test_idempotent(self) -> None:
+        timeout = requests.ReadTimeout()
+        assert should_retry(NO_BACKOFF, "GET", "v1/objects/hosts", 1, error=timeout)
+        assert should_retry(NO_BACKOFF, "POST", "v1/objects/hosts/a", 1, error=timeout)
+        assert not should_retry(
+            NO_BACKOFF, "POST", "v1/actions/process-check-result", 1, error=timeout
+        )
+        assert not should_retry(NO_BACKOFF, "GET", "v1/objects/hosts", 3, error=timeout)
+
+    def test_not_sent(self) -> None:
+        assert should_retry(
+            NO_BACKOFF, "POST", "v1/actions/process-check-result", 1, error=_refused()
+        )
+        assert should_retry(
+            NO_BACKOFF, "PUT", "v1/objects/hosts/a", 1, error=_refused()
+        )
+
+    def test_status(self) -> None:
+        path = "v1/actions/process-check-result"
+        assert should_retry(NO_BACKOFF, "POST", path, 1, status=503)
+        assert not should_retry(NO_BACKOFF, "POST", path, 1, status=502)
+        assert should_retry(NO_BACKOFF, "GET", "v1/status", 1, status=502)
+        assert not should_retry(NO_BACKOFF, "GET", "v1/status", 1, status=500)
+        assert not should_retry(NO_BACKOFF, "GET", "v1/status", 1, status=404)
+
+    def test_delay(self) -> None:
+        policy = RetryPolicy(backoff=1, backoff_max=5)
+        assert 0 <= policy.get_delay(1) <= 1
+        assert 0 <= policy.get_delay(10) <= 5
+        assert policy.get_delay(1, "2") == 2
+        assert policy.get_delay(1, "3600") == 5
+
+
+class TestCircuitBreaker:
+    def test_open_and_close(self) -> None:
+        breaker = CircuitBreaker(threshold=2, reset_timeout=0.1)
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(PretiacCircuitOpenException):
+            breaker.before_request()
+        time.sleep(0.11)
+        # One probe request is let through, the others still fail fast.
+        breaker.before_request()
+        with pytest.raises(PretiacCircuitOpenException):
+            breaker.before_request()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        breaker.before_request()
+
+    def test_failed_probe(self) -> None:
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+    def test_released_probe(self) -> None:
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.before_request()
+        breaker.release_probe()
+        assert breaker.before_request()
+
+    def test_disabled(self) -> None:
+        breaker = CircuitBreaker(threshold=0)
+        for _ in range(10):
+            breaker.record_failure()
+        breaker.before_request()
+
+
+class TestRequest:
+    @pytest.fixture
+    def raw_client(self, config: Config) -> RawClient:
+        config.retry_policy = NO_BACKOFF
+        config.circuit_breaker_threshold = 3
+        return RawClient(config)
+
+    def _answer(self, raw_client: RawClient, *answers: Any) -> list[Any]:
+        requests_: list[Any] = []
+        queue = list(answers)
+
+        def post(**kwargs: Any) -> requests.Response:
+            requests_.append(kwargs)
+            answer = queue.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        raw_client.session.post = post  # type: ignore
+        return requests_
+
+    def test_retry_after(self, raw_client: RawClient) -> None:
+        sent = self._answer(
+            raw_client, _response(503, {"Retry-After": "0"}), _response(200)
+        )
+        raw_client.actions.process_check_result("Service", "host!ssh", 0, "OK")
+        assert len(sent) == 2
+
+    def test_no_retry_of_non_idempotent(self, raw_client: RawClient) -> None:
+        sent = self._answer(raw_client, requests.ReadTimeout(), _response(200))
+        with pytest.raises(requests.ReadTimeout):
+            raw_client.actions.process_check_result("Service", "host!ssh", 0, "OK")
+        assert len(sent) == 1
+
+    def test_retry_of_idempotent(self, raw_client: RawClient) -> None:
+        sent = self._answer(raw_client, requests.ReadTimeout(), _response(200))
+        raw_client.status.list()
+        assert len(sent) == 2
+
+    def test_circuit_breaker(self, raw_client: RawClient) -> None:
+        sent = self._answer(raw_client, *[_refused() for _ in range(5)])
+        with pytest.raises(requests.ConnectionError):
+            raw_client.status.list()
+        with pytest.raises(PretiacCircuitOpenException):
+            raw_client.status.list()
+        assert len(sent) == 3
+
+    def test_probe_raising_other_exception(self, raw_client: RawClient) -> None:
+        raw_client.circuit_breaker.reset_timeout = 0.05
+        sent = self._answer(
+            raw_client,
+            *[_refused() for _ in range(3)],
+            PretiacDeadlineExceededException("The deadline is exceeded"),
+            _response(200),
+        )
+        with pytest.raises(requests.ConnectionError):
+            raw_client.status.list()
+        time.sleep(0.06)
+        with pytest.raises(PretiacDeadlineExceededException):
+            raw_client.status.list()
+        # The failed probe does not keep the circuit open forever.
+        raw_client.status.list()
+        assert raw_client.circuit_breaker.state == "closed"
+        assert len(sent) == 5
+
+    def test_with_options(self, raw_client: RawClient) -> None:
+        sent = self._answer(raw_client, _refused(), _response(200))
+        single = raw_client.with_options(retry_policy=RetryPolicy(attempts=1))
+        with pytest.raises(requests.ConnectionError):
+            single.status.list()
+        assert len(sent) == 1
+        assert single.circuit_breaker is raw_client.circuit_breaker
+        assert raw_client.get_client_config().retry_policy == NO_BACKOFF
+
+
+def test_client_with_options(client: Client) -> None:
+    policy = RetryPolicy(attempts=7)
+    copy = client.with_options(retry_policy=policy)
+    assert copy.raw_client.get_client_config().retry_policy == policy
+    assert copy.raw_client.session is client.raw_client.session
+    assert client.raw_client.get_client_config().retry_policy != policy
@@ -0,0 +1,177 @@
+import gzip
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+
+from pretiac.client import CheckError, CheckResponse, Client
+from pretiac.config import Config
+from pretiac.object_types import Payload
+from pretiac.spool import Spool
+
+OK = CheckResponse(code=200, status="ok")
+
+
+class Recorder:
+    """Record the sent check results and answer with success."""
+
+    records: list[Payload]
+
+    def __init__(self) -> None:
+        self.records = []
+
+    def __call__(self, record: Payload) -> CheckResponse:
+        self.records.append(record)
+        return OK
+
+    def get(self, key: str) -> list[Any]:
+        return [record[key] for record in self.records]
+
+
+def _record(service: str, execution_end: float = 0) -> Payload:
+    return {
+        "service": service,
+        "host": "host",
+        "exit_status": 0,
+        "execution_end": execution_end or time.time(),
+    }
+
+
+class TestSpool:
+    def test_append_and_drain(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path)
+        spool.append(_record("a"), _record("b"))
+        spool.append(_record("c"))
+        assert spool.pending()
+        sent = Recorder()
+        assert spool.drain(sent) == 3
+        assert sorted(sent.get("service")) == ["a", "b", "c"]
+        assert not spool.pending()
+
+    def test_execution_end_preserved(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path)
+        spool.append({"service": "a", "host": "host", "exit_status": 0})
+        time.sleep(0.05)
+        sent = Recorder()
+        spool.drain(sent)
+        drained = sent.records
+        assert drained[0]["execution_end"] < time.time() - 0.04
+        assert drained[0]["execution_start"] == drained[0]["execution_end"]
+
+    def test_unreachable(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path)
+        spool.append(*[_record(f"service{i}") for i in range(10)])
+
+        def send(record: Payload) -> Any:
+            raise requests.ConnectionError("Connection refused")
+
+        assert spool.drain(send) == 0
+        assert spool.pending()
+        assert spool.drain(Recorder()) == 10
+
+    def test_order_per_service(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path)
+        spool.append(*[_record("a", 1000 + i) for i in range(50)])
+        spool.max_age = time.time()
+        ends: list[float] = []
+        lock = threading.Lock()
+
+        def send(record: Payload) -> Any:
+            with lock:
+                ends.append(record["execution_end"])
+            return OK
+
+        spool.drain(send, batch_size=7, concurrency=4)
+        assert ends == sorted(ends)
+        assert len(ends) == 50
+
+    def test_server_error_keeps_result(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path)
+        spool.append(_record("a"), _record("b"))
+        assert spool.drain(lambda record: CheckError(error=503, status="")) == 0
+        # A client error (for example 404) drops the result.
+        assert spool.drain(lambda record: CheckError(error=404, status="")) == 2
+        assert not spool.pending()
+
+    def test_rejected_result_dropped(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path)
+        spool.append(_record("a"), _record("b"))
+        # An internal server error is not an outage, the results are dropped
+        # instead of blocking the spool.
+        assert spool.drain(lambda record: CheckError(error=500, status="")) == 2
+        assert not spool.pending()
+
+    def test_max_age(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path, max_age=60)
+        spool.append(_record("old", time.time() - 120), _record("new"))
+        sent = Recorder()
+        spool.drain(sent)
+        assert sent.get("service") == ["new"]
+
+    def test_max_size(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path, max_size=2000, segment_size=500)
+        for i in range(100):
+            spool.append({**_record("a"), "plugin_output": f"{i} " * 50})
+        assert spool.size() <= 2000
+        sent = Recorder()
+        spool.drain(sent)
+        # The oldest segments were evicted.
+        outputs = sent.get("plugin_output")
+        assert outputs[-1].startswith("99 ")
+        assert not outputs[0].startswith("0 ")
+
+    def test_truncated_segment(self, tmp_path: Path) -> None:
+        spool = Spool(tmp_path)
+        spool.append(_record("a"))
+        segment = next(tmp_path.glob("*.ndjson.gz"))
+        with open(segment, "ab") as file:
+            file.write(gzip.compress(b'{"service": "b"}\n')[:-8])
+        sent = Recorder()
+        spool.drain(sent)
+        assert sent.get("service") == ["a"]
+
+
+class TestClient:
+    @pytest.fixture
+    def client(self, tmp_path: Path) -> Client:
+        client = Client(
+            config=Config(
+                api_endpoint_host="spool.example.org",
+                http_basic_username="u",
+                http_basic_password="p",
+                spool_directory=str(tmp_path),
+            )
+        )
+        client.known_objects.add("Host", "host")
+        client.known_objects.add("Service", "host!ssh")
+        return client
+
+    def test_spool_and_drain(self, client: Client) -> None:
+        requests_: list[Payload] = []
+        reachable = False
+
+        def process_check_result(**kwargs: Any) -> Any:
+            if not reachable:
+                raise requests.ConnectionError("Connection refused")
+            requests_.append(kwargs)
+            return {"results": [{"code": 200.0, "status": "ok"}]}
+
+        client.raw_client.actions.process_check_result = process_check_result  # type: ignore
+
+        result = client.send_service_check_result("ssh", "host", plugin_output="1")
+        assert isinstance(result, CheckError)
+        assert "spooled" in result.status
+        client.send_service_check_result("ssh", "host", plugin_output="2")
+        assert client.spool
+        assert client.spool.pending()
+
+        reachable = True
+        result = client.send_service_check_result("ssh", "host", plugin_output="3")
+        assert isinstance(result, CheckResponse)
+        # The spooled results are sent first, with their original timestamps.
+        assert [r["plugin_output"] for r in requests_] == ["1", "2", "3"]
+        assert requests_[0]["execution_end"] < requests_[1]["execution_end"]
+        assert not client.spool.pending()
@@ -0,0 +1,305 @@
+import threading
+import time
+from collections.abc import Iterator
+from queue import Queue
+from typing import Any
+
+import pytest
+
+from pretiac.client import Client, _convert_objects
+from pretiac.object_types import Host, Service, ServiceState, StateType
+from pretiac.state_mirror import StateMirror
+
+HOSTS = [
+    {"attrs": {"__name": "web1", "state": 0, "groups": ["web"], "zone": "master"}},
+    {"attrs": {"__name": "db1", "state": 1, "groups": ["db"], "zone": "satellite"}},
+]
+
+SERVICES = [
+    {
+        "attrs": {
+            "__name": f"{host}!{service}",
+            "host_name": host,
+            "state": state,
+            "state_type": state_type,
+            "groups": ["linux"],
+            "zone": "master",
+        }
+    }
+    for host, service, state, state_type in [
+        ("web1", "http", 2, 1),
+        ("web1", "ssh", 0, 1),
+        ("db1", "mysql", 2, 0),
+        ("db1", "ssh", 2, 1),
+    ]
+]
+
+
+@pytest.fixture
+def mirror(client: Client) -> StateMirror:
+    client.get_hosts = lambda **kwargs: _convert_objects(HOSTS, Host)  # type: ignore
+    client.get_services = lambda **kwargs: _convert_objects(  # type: ignore
+        SERVICES, Service
+    )
+    mirror = StateMirror(client)
+    mirror.load()
+    return mirror
+
+
+def _names(objects: Any) -> list[str]:
+    return [o.name for o in objects]
+
+
+class TestLookup:
+    def test_get(self, mirror: StateMirror) -> None:
+        host = mirror.get_host("web1")
+        assert host
+        assert host.name == "web1"
+        service = mirror.get_service("db1!mysql")
+        assert service
+        assert service.state == ServiceState.CRITICAL
+        assert mirror.get_service("db1!http") is None
+
+    def test_all(self, mirror: StateMirror) -> None:
+        assert len(mirror.get_services()) == 4
+        assert len(mirror.get_hosts()) == 2
+
+    def test_host(self, mirror: StateMirror) -> None:
+        assert _names(mirror.get_services(host="web1")) == ["web1!http", "web1!ssh"]
+
+    def test_critical_hard_in_host_group(self, mirror: StateMirror) -> None:
+        assert _names(
+            mirror.get_services(
+                state=ServiceState.CRITICAL,
+                state_type=StateType.StateTypeHard,
+                host_group="db",
+            )
+        ) == ["db1!ssh"]
+
+    def test_hosts(self, mirror: StateMirror) -> None:
+        assert _names(mirror.get_hosts(state=1)) == ["db1"]
+        assert _names(mirror.get_hosts(zone="master", group="web")) == ["web1"]
+        assert mirror.get_hosts(group="unknown") == []
+
+
+class TestApply:
+    def test_state_change(self, mirror: StateMirror) -> None:
+        mirror.apply(
+            {
+                "type": "StateChange",
+                "host": "web1",
+                "service": "http",
+                "state": 0.0,
+                "state_type": 1.0,
+                "downtime_depth": 0.0,
+                "acknowledgement": False,
+            }
+        )
+        assert _names(mirror.get_services(state=ServiceState.CRITICAL)) == [
+            "db1!mysql",
+            "db1!ssh",
+        ]
+        assert _names(mirror.get_services(state=ServiceState.OK)) == [
+            "web1!http",
+            "web1!ssh",
+        ]
+
+    def test_check_result(self, mirror: StateMirror) -> None:
+        mirror.apply(
+            {
+                "type": "CheckResult",
+                "host": "db1",
+                "service": "ssh",
+                "check_result": {
+                    "active": True,
+                    "check_source": "master",
+                    "command": None,
+                    "execution_end": 1700000001.0,
+                    "execution_start": 1700000000.0,
+                    "exit_status": 2.0,
+                    "output": "connection refused",
+                    "performance_data": [],
+                    "previous_hard_state": 2.0,
+                    "schedule_end": 1700000001.0,
+                    "schedule_start": 1700000000.0,
+                    "scheduling_source": "master",
+                    "state": 2.0,
+                    "ttl": 0.0,
+                    "type": "CheckResult",
+                    "vars_after": {},
+                    "vars_before": {},
+                },
+                "downtime_depth": 1.0,
+                "acknowledgement": True,
+            }
+        )
+        service = mirror.get_service("db1!ssh")
+        assert service
+        assert service.last_check == 1700000001.0
+        assert service.downtime_depth == 1
+        assert service.acknowledgement == 1
+
+    def test_acknowledgement(self, mirror: StateMirror) -> None:
+        event = {"host": "db1", "service": "mysql", "state": 2.0, "state_type": 0.0}
+        mirror.apply(
+            {"type": "AcknowledgementSet", "acknowledgement_type": 2.0, **event}
+        )
+        service = mirror.get_service("db1!mysql")
+        assert service
+        assert service.acknowledgement == 2
+        mirror.apply({"type": "AcknowledgementCleared", **event})
+        assert service.acknowledgement == 0
+
+    def test_downtime(self, mirror: StateMirror) -> None:
+        downtime = {"host_name": "web1", "service_name": "", "trigger_time": 1.0}
+        mirror.apply({"type": "DowntimeTriggered", "downtime": downtime})
+        host = mirror.get_host("web1")
+        assert host
+        assert host.downtime_depth == 1
+        mirror.apply({"type": "DowntimeRemoved", "downtime": downtime})
+        assert host.downtime_depth == 0
+
+    def test_downtime_in_snapshot(self, mirror: StateMirror) -> None:
+        downtime = {"host_name": "web1", "service_name": "", "trigger_time": 1.0}
+        # Triggered before the snapshot was requested, already reflected.
+        mirror.apply(
+            {
+                "type": "DowntimeTriggered",
+                "downtime": downtime,
+                "timestamp": time.time() - 60,
+            }
+        )
+        host = mirror.get_host("web1")
+        assert host
+        assert not host.downtime_depth
+        mirror.apply(
+            {
+                "type": "DowntimeTriggered",
+                "downtime": downtime,
+                "timestamp": time.time(),
+            }
+        )
+        assert host.downtime_depth == 1
+
+    def test_object_deleted(self, mirror: StateMirror) -> None:
+        mirror.apply(
+            {
+                "type": "ObjectDeleted",
+                "object_type": "Service",
+                "object_name": "web1!http",
+            }
+        )
+        assert mirror.get_service("web1!http") is None
+        assert _names(mirror.get_services(host="web1")) == ["web1!ssh"]
+
+    def test_object_created(self, mirror: StateMirror) -> None:
+        mirror.client.raw_client.objects.get = (  # type: ignore
+            lambda object_type, name, **kwargs: {
+                "attrs": {"__name": name, "host_name": "db1", "state": 3}
+            }
+        )
+        mirror.apply(
+            {
+                "type": "ObjectCreated",
+                "object_type": "Service",
+                "object_name": "db1!disk",
+            }
+        )
+        assert _names(mirror.get_services(state=ServiceState.UNKNOWN)) == ["db1!disk"]
+
+    def test_fetch_without_lock(self, mirror: StateMirror) -> None:
+        fetching = threading.Event()
+        release = threading.Event()
+
+        def get(object_type: str, name: str, **kwargs: Any) -> Any:
+            fetching.set()
+            release.wait(5)
+            return {"attrs": {"__name": name, "host_name": "db1", "state": 3}}
+
+        mirror.client.raw_client.objects.get = get  # type: ignore
+        event = {
+            "type": "ObjectCreated",
+            "object_type": "Service",
+            "object_name": "db1!disk",
+        }
+        thread = threading.Thread(target=mirror.apply, args=(event,))
+        thread.start()
+        assert fetching.wait(5)
+        lookup = threading.Thread(target=mirror.get_services)
+        lookup.start()
+        lookup.join(1)
+        # Lookups are answered while the object is fetched.
+        assert not lookup.is_alive()
+        release.set()
+        thread.join(5)
+        assert mirror.get_service("db1!disk") is not None
+
+    def test_unknown_object(self, mirror: StateMirror) -> None:
+        mirror.apply({"type": "StateChange", "host": "unknown", "state": 1.0})
+        assert len(mirror.get_hosts()) == 2
+
+
+class FakeStream:
+    closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeEvents:
+    """An event stream whose events are pushed by the test."""
+
+    timeout = (10, None)
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.events: Queue[Any] = Queue()
+
+    def open(self, types: Any, queue: str, timeout: Any = None) -> Any:
+        self.calls.append("open")
+        self.timeout_used = timeout
+        self.stream = FakeStream()
+        return self.stream
+
+    def read(self, stream: Any) -> Iterator[Any]:
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            yield event
+
+
+def test_event_during_snapshot(client: Client) -> None:
+    events = FakeEvents()
+    client.raw_client.events = events  # type: ignore
+
+    def get_hosts(**kwargs: Any) -> Any:
+        events.calls.append("snapshot")
+        # The service recovers while the snapshot is loaded.
+        events.events.put(
+            {"type": "StateChange", "host": "web1", "service": "http", "state": 0.0}
+        )
+        time.sleep(0.1)
+        return _convert_objects(HOSTS, Host)
+
+    client.get_hosts = get_hosts  # type: ignore
+    client.get_services = lambda **kwargs: _convert_objects(  # type: ignore
+        SERVICES, Service
+    )
+    mirror = StateMirror(client, stall_timeout=60)
+    thread = mirror.start()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        service = mirror.get_service("web1!http")
+        if service is not None and service.state == ServiceState.OK:
+            break
+        time.sleep(0.01)
+    mirror.stop()
+    thread.join(2)
+    assert not thread.is_alive()
+    assert events.calls[:2] == ["open", "snapshot"]
+    assert events.timeout_used == (10, 60)
+    assert events.stream.closed
+    service = mirror.get_service("web1!http")
+    assert service is not None
+    assert service.state == ServiceState.OK
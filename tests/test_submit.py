@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+import pytest
+
+from pretiac.submit import main
+
+
+def test_stdlib_only() -> None:
+    modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, pretiac.submit; print(' '.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.split()
+    assert "pretiac.submit" in modules
+    for module in ("requests", "urllib3", "pydantic", "yaml", "pretiac.client"):
+        assert module not in modules
+
+
+def test_invalid_exit_status(capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit) as exit:
+        main(["--exit-status", "critical", "backup"])
+    assert exit.value.code == 2
+    assert "--exit-status: invalid int value: 'critical'" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(["--exit-status", "4", "backup"])
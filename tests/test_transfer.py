@@ -0,0 +1,71 @@
+import gzip
+import io
+import json
+from typing import Any
+
+import requests
+import urllib3
+
+from pretiac.config import Config
+from pretiac.raw_client import RawClient
+from pretiac.request_handler import RequestHandler, TransferStats
+
+RESULTS = [
+    {"name": f"host{i}", "attrs": {"state": 0.0, "vars": None}} for i in range(200)
+]
+
+
+def _gzip_response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = urllib3.HTTPResponse(
+        body=io.BytesIO(gzip.compress(body)),
+        headers={"Content-Encoding": "gzip"},
+        preload_content=False,
+        decode_content=True,
+    )
+    return response
+
+
+def test_results_stream() -> None:
+    body = json.dumps({"results": RESULTS}).encode()
+    transfer = TransferStats()
+    stream = _gzip_response(body)
+    results = list(
+        RequestHandler._get_results_from_stream(stream, 1024, transfer=transfer)
+    )
+    assert results == RESULTS
+    assert transfer.responses == 1
+    assert transfer.decoded_bytes == len(body)
+    assert transfer.wire_bytes == len(gzip.compress(body))
+    assert transfer.compression_ratio > 5
+
+
+def test_event_stream() -> None:
+    body = b"".join(json.dumps(result).encode() + b"\n" for result in RESULTS)
+    transfer = TransferStats()
+    events = list(
+        RequestHandler._get_message_from_stream(_gzip_response(body), transfer=transfer)
+    )
+    assert events == RESULTS
+    assert transfer.decoded_bytes == len(body)
+    assert transfer.wire_bytes < transfer.decoded_bytes
+
+
+def test_request(config: Config) -> None:
+    raw_client = RawClient(config)
+    body = json.dumps({"results": RESULTS}).encode()
+
+    def post(**kwargs: Any) -> requests.Response:
+        return _gzip_response(body)
+
+    raw_client.session.post = post  # type: ignore
+    assert raw_client.objects.list("Host") == RESULTS
+    assert raw_client.transfer.decoded_bytes == len(body)
+    assert raw_client.transfer.wire_bytes < len(body)
+
+
+def test_accept_encoding(config: Config) -> None:
+    assert "gzip" in RawClient(config).session.headers["Accept-Encoding"]
+    config.compression = False
+    assert RawClient(config).session.headers["Accept-Encoding"] == "identity"